@@ -0,0 +1,127 @@
+# admission.py
+"""
+보고서 엔드포인트 앞단의 승인(Admission) 제어
+
+동시에 실행되는 보고서 생성 수를 max_concurrent로 제한하고, 초과 요청은 최대 max_queue 개까지 대기시킵니다.
+대기열이 가득 찼거나 대기 시간이 queue_timeout_seconds를 넘으면 AdmissionRejectedError가 발생하며,
+엔드포인트는 이를 429 + Retry-After 응답으로 변환합니다.
+"""
+
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict
+
+
+class AdmissionRejectedError(Exception):
+    """요청을 받아들일 수 없을 때 발생합니다. retry_after는 재시도까지 권장 대기 시간(초)입니다."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    동시 실행 수 제한 + 크기 제한 대기열을 가진 asyncio 승인 제어기.
+
+    사용 예:
+        async with controller.admit():
+            ...  # 보고서 생성
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, queue_timeout_seconds: float,
+                 default_retry_after: int = 30):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.default_retry_after = default_retry_after
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self._lock = threading.Lock()  # /metrics는 스레드 풀에서 읽으므로 통계는 락으로 보호
+        self._active = 0
+        self._waiting = 0
+        self._admitted = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._total_wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+        self._avg_service_seconds = 0.0  # 처리 시간 지수 이동 평균 (Retry-After 추정용)
+
+    def estimate_retry_after(self) -> int:
+        """평균 처리 시간과 대기 중인 요청 수로 재시도까지의 시간을 추정합니다."""
+        with self._lock:
+            if self._avg_service_seconds <= 0:
+                return self.default_retry_after
+            rounds = (self._waiting + 1) / self.max_concurrent
+            return max(1, int(round(self._avg_service_seconds * rounds)))
+
+    @asynccontextmanager
+    async def admit(self):
+        with self._lock:
+            # 실행 중 + 대기 중인 요청 수로 판단 (세마포어 획득은 await 이후에 일어나므로 locked()는 쓰지 않음)
+            if self._active + self._waiting >= self.max_concurrent + self.max_queue:
+                self._rejected += 1
+                full = True
+            else:
+                self._waiting += 1
+                full = False
+        if full:
+            raise AdmissionRejectedError(
+                f"'{self.name}' queue is full ({self.max_queue} waiting, {self.max_concurrent} running).",
+                self.estimate_retry_after()
+            )
+
+        wait_start = time.monotonic()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout_seconds)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._waiting -= 1
+                self._rejected += 1
+                self._timed_out += 1
+            raise AdmissionRejectedError(
+                f"'{self.name}' queue wait exceeded {self.queue_timeout_seconds}s.",
+                self.estimate_retry_after()
+            )
+        except BaseException:
+            with self._lock:
+                self._waiting -= 1
+            raise
+
+        waited = time.monotonic() - wait_start
+        with self._lock:
+            self._waiting -= 1
+            self._active += 1
+            self._admitted += 1
+            self._total_wait_seconds += waited
+            self._max_wait_seconds = max(self._max_wait_seconds, waited)
+
+        service_start = time.monotonic()
+        try:
+            yield waited
+        finally:
+            service_time = time.monotonic() - service_start
+            with self._lock:
+                self._active -= 1
+                if self._avg_service_seconds <= 0:
+                    self._avg_service_seconds = service_time
+                else:
+                    self._avg_service_seconds = 0.8 * self._avg_service_seconds + 0.2 * service_time
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "active": self._active,
+                "waiting": self._waiting,
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+                "avg_wait_seconds": round(self._total_wait_seconds / self._admitted, 4) if self._admitted else 0.0,
+                "max_wait_seconds": round(self._max_wait_seconds, 4),
+                "avg_service_seconds": round(self._avg_service_seconds, 4),
+            }
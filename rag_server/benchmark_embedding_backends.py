@@ -0,0 +1,83 @@
+"""
+임베딩 백엔드 벤치마크
+
+torch(fp32), ONNX Runtime(fp32), ONNX Runtime(int8 동적 양자화) 백엔드의
+단건 지연 시간(p50/p95)과 배치 처리량(texts/sec)을 비교하고, torch 출력과의 패리티(코사인 유사도)를 확인합니다.
+
+사용 예:
+    python benchmark_embedding_backends.py --runs 50 --batch-size 32
+"""
+
+import argparse
+import statistics
+import time
+from typing import Dict, List
+
+import config
+import embedding_backends
+
+SAMPLE_TEXTS = embedding_backends.PARITY_SAMPLE_TEXTS + [
+    "셀트리온 24년 4분기 매출 1조 원 돌파 및 영업이익률 개선",
+    "CT-P47 CT-P41 등 후속 바이오시밀러 파이프라인 허가 일정",
+    "합병 이후 원가율 개선과 재고 자산 상각 영향",
+    "미국 유럽 시장 경쟁 심화와 가격 인하 압력",
+]
+
+
+def measure_latency(backend: embedding_backends.EmbeddingBackend, texts: List[str], runs: int) -> Dict[str, float]:
+    timings = []
+    for i in range(runs):
+        start = time.perf_counter()
+        backend.embed([texts[i % len(texts)]])
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "p50_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+    }
+
+
+def measure_throughput(backend: embedding_backends.EmbeddingBackend, texts: List[str], batch_size: int,
+                       rounds: int) -> float:
+    batch = [texts[i % len(texts)] for i in range(batch_size)]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        backend.embed(batch)
+    return round(batch_size * rounds / (time.perf_counter() - start), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="임베딩 백엔드 지연 시간/처리량 벤치마크")
+    parser.add_argument("--model", default=config.EMBEDDING_MODEL_NAME, help="임베딩 모델 이름 또는 경로")
+    parser.add_argument("--runs", type=int, default=30, help="단건 지연 시간 측정 횟수")
+    parser.add_argument("--batch-size", type=int, default=32, help="처리량 측정 배치 크기")
+    parser.add_argument("--rounds", type=int, default=5, help="처리량 측정 반복 횟수")
+    args = parser.parse_args()
+
+    tokenizer = embedding_backends.load_tokenizer(args.model)
+    torch_backend = embedding_backends.TorchEmbeddingBackend(args.model, tokenizer)
+    backends = {"torch-fp32": torch_backend}
+    for label, quantize in (("onnx-fp32", False), ("onnx-int8", True)):
+        try:
+            backends[label] = embedding_backends.load_onnx_backend(
+                args.model, tokenizer, quantize=quantize, torch_backend=torch_backend
+            )
+        except ImportError:
+            print("onnxruntime is not installed. Skipping ONNX backends.")
+            break
+        except Exception as e:
+            print(f"Skipping {label}: {e}")
+
+    print(f"\nModel: {args.model}")
+    print(f"{'backend':<12} {'p50(ms)':>9} {'p95(ms)':>9} {'texts/sec':>10} {'min cos':>9}")
+    for label, backend in backends.items():
+        for _ in range(3):  # 워밍업
+            backend.embed(SAMPLE_TEXTS[:2])
+        latency = measure_latency(backend, SAMPLE_TEXTS, args.runs)
+        throughput = measure_throughput(backend, SAMPLE_TEXTS, args.batch_size, args.rounds)
+        parity = embedding_backends.check_backend_parity(torch_backend, backend, SAMPLE_TEXTS)
+        print(f"{label:<12} {latency['p50_ms']:>9} {latency['p95_ms']:>9} {throughput:>10} {parity['min_cosine']:>9.4f}")
+
+
+if __name__ == "__main__":
+    main()
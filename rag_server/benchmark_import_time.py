@@ -0,0 +1,71 @@
+"""
+서버 시작(import) 시간 벤치마크
+
+새 파이썬 프로세스에서 모듈을 import하는 데 걸리는 시간과 torch/transformers가 import 시점에 로딩되는지 확인하고,
+임베딩 모델을 불러와 첫 임베딩을 만들기까지의 시간(모델 준비 시간)을 따로 측정합니다.
+
+사용 예:
+    python benchmark_import_time.py --runs 3
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAG_SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+IMPORT_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "torch_loaded": "torch" in sys.modules,
+    "transformers_loaded": "transformers" in sys.modules,
+}}))
+"""
+
+READY_SNIPPET = """
+import json, time
+import utils
+start = time.perf_counter()
+utils.initialize_models()
+loaded = time.perf_counter() - start
+utils.get_embedding("셀트리온 실적")
+print(json.dumps({"load_seconds": loaded, "first_embedding_seconds": time.perf_counter() - start}))
+"""
+
+
+def run_snippet(code: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=RAG_SERVER_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="모듈 import 시간 / 모델 준비 시간 벤치마크")
+    parser.add_argument("--runs", type=int, default=3, help="모듈별 측정 횟수 (새 프로세스에서 측정)")
+    parser.add_argument("--modules", nargs="+", default=["utils", "rag_report_pipeline", "main"])
+    parser.add_argument("--skip-model", action="store_true", help="모델 준비 시간 측정 생략")
+    args = parser.parse_args()
+
+    print(f"{'module':<22} {'median(s)':>10} {'torch':>7} {'transformers':>13}")
+    for module in args.modules:
+        samples = [run_snippet(IMPORT_SNIPPET.format(module=module)) for _ in range(args.runs)]
+        median = statistics.median(sample["seconds"] for sample in samples)
+        print(f"{module:<22} {median:>10.3f} {str(samples[-1]['torch_loaded']):>7} "
+              f"{str(samples[-1]['transformers_loaded']):>13}")
+
+    if not args.skip_model:
+        ready = run_snippet(READY_SNIPPET)
+        print(f"\nModel load: {ready['load_seconds']:.3f}s, first embedding ready after "
+              f"{ready['first_embedding_seconds']:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
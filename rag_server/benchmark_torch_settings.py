@@ -0,0 +1,115 @@
+"""
+torch 임베딩 런타임 설정 벤치마크
+
+스레드 수, inference mode, dtype(float32/bfloat16), torch.compile 조합마다 새 프로세스에서
+단건 지연 시간(p50/p99)과 배치 처리량(texts/sec)을 측정합니다. 서버 종류(코어 수, 워커 수)별로
+config의 EMBEDDING_INTRA_OP_THREADS / EMBEDDING_TORCH_* 값을 정하는 데 사용합니다.
+
+스레드 수는 프로세스당 한 번만 바꿀 수 있으므로 설정마다 별도 프로세스에서 측정합니다.
+
+사용 예:
+    python benchmark_torch_settings.py --threads 1 2 4 0 --dtypes float32 bfloat16 --runs 100
+    python benchmark_torch_settings.py --threads 2 --compile --no-inference-mode
+"""
+
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+
+RAG_SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+MEASURE_SNIPPET = """
+import json, statistics, sys, time
+import config
+import embedding_backends
+
+runs, batch_size, rounds = int(sys.argv[1]), int(sys.argv[2]), int(sys.argv[3])
+texts = embedding_backends.PARITY_SAMPLE_TEXTS
+tokenizer = embedding_backends.load_tokenizer(config.EMBEDDING_MODEL_NAME)
+backend = embedding_backends.create_torch_backend(config.EMBEDDING_MODEL_NAME, tokenizer)
+for _ in range(3):  # 워밍업 (torch.compile인 경우 컴파일 포함)
+    backend.embed(texts[:2])
+    backend.embed(texts[:1])
+
+timings = []
+for i in range(runs):
+    start = time.perf_counter()
+    backend.embed([texts[i % len(texts)]])
+    timings.append((time.perf_counter() - start) * 1000)
+timings.sort()
+
+batch = [texts[i % len(texts)] for i in range(batch_size)]
+start = time.perf_counter()
+for _ in range(rounds):
+    backend.embed(batch)
+throughput = batch_size * rounds / (time.perf_counter() - start)
+
+print(json.dumps({
+    "p50_ms": statistics.median(timings),
+    "p99_ms": timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+    "texts_per_sec": throughput,
+    "backend": backend.describe(),
+}))
+"""
+
+
+def run_setting(threads: int, dtype: str, inference_mode: bool, compile_model: bool, args) -> dict:
+    env = dict(
+        os.environ,
+        EMBEDDING_MODEL_NAME=args.model,
+        EMBEDDING_INTRA_OP_THREADS=str(threads),
+        EMBEDDING_INTER_OP_THREADS=str(args.inter_op_threads),
+        EMBEDDING_TORCH_DTYPE=dtype,
+        EMBEDDING_TORCH_INFERENCE_MODE=str(inference_mode).lower(),
+        EMBEDDING_TORCH_COMPILE=str(compile_model).lower(),
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", MEASURE_SNIPPET, str(args.runs), str(args.batch_size), str(args.rounds)],
+        cwd=RAG_SERVER_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "unknown error")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    import config
+
+    parser = argparse.ArgumentParser(description="torch 임베딩 런타임 설정별 지연 시간/처리량 벤치마크")
+    parser.add_argument("--model", default=config.EMBEDDING_MODEL_NAME, help="임베딩 모델 이름 또는 경로")
+    parser.add_argument("--threads", nargs="+", type=int, default=[1, 2, 4, 0],
+                        help="측정할 intra-op 스레드 수 목록 (0 = torch 기본값)")
+    parser.add_argument("--inter-op-threads", type=int, default=0, help="inter-op 스레드 수 (0 = torch 기본값)")
+    parser.add_argument("--dtypes", nargs="+", default=["float32", "bfloat16"], help="측정할 dtype 목록")
+    parser.add_argument("--no-inference-mode", action="store_true", help="torch.no_grad와도 비교")
+    parser.add_argument("--compile", action="store_true", help="torch.compile 적용 설정도 측정")
+    parser.add_argument("--runs", type=int, default=100, help="단건 지연 시간 측정 횟수")
+    parser.add_argument("--batch-size", type=int, default=32, help="처리량 측정 배치 크기")
+    parser.add_argument("--rounds", type=int, default=5, help="처리량 측정 반복 횟수")
+    args = parser.parse_args()
+
+    inference_modes = [True, False] if args.no_inference_mode else [True]
+    compile_options = [False, True] if args.compile else [False]
+
+    print(f"Model: {args.model} (cpu count {os.cpu_count()})")
+    print(f"{'threads':>7} {'dtype':<9} {'inf_mode':>8} {'compile':>7} {'p50(ms)':>9} {'p99(ms)':>9} {'texts/sec':>10}")
+    for threads, dtype, inference_mode, compile_model in itertools.product(
+        args.threads, args.dtypes, inference_modes, compile_options
+    ):
+        label = f"{threads or 'auto':>7} {dtype:<9} {str(inference_mode):>8} {str(compile_model):>7}"
+        try:
+            result = run_setting(threads, dtype, inference_mode, compile_model, args)
+        except RuntimeError as e:
+            print(f"{label} failed: {e}")
+            continue
+        # 장치가 지원하지 않는 dtype은 float32로 대체되므로 실제 적용된 값을 함께 표시
+        applied = result["backend"].get("dtype")
+        note = f" (ran as {applied})" if applied != dtype else ""
+        print(f"{label} {result['p50_ms']:>9.2f} {result['p99_ms']:>9.2f} {result['texts_per_sec']:>10.1f}{note}")
+
+
+if __name__ == "__main__":
+    main()
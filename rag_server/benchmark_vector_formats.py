@@ -0,0 +1,103 @@
+"""
+검색 벡터 표현 벤치마크
+
+쿼리 벡터 한 개당 메모리와 Milvus 검색 요청(placeholder) 직렬화 CPU 시간을 비교합니다.
+- list: 기존 방식 (query_vector.tolist(), 파이썬 float 객체 D개)
+- bytes: float32 바이트 (vector_utils.to_search_payload)
+캐시 저장 형식(float32/float16/int8)별 벡터당 메모리와 복원 오차(코사인 유사도)도 함께 측정합니다.
+
+사용 예:
+    python benchmark_vector_formats.py --dim 768 --runs 5000
+    python benchmark_vector_formats.py --model klue/bert-base   # 실제 임베딩으로 양자화 오차 측정
+"""
+
+import argparse
+import sys
+import time
+from typing import Callable, List
+
+import numpy as np
+
+import vector_utils
+
+
+def python_list_nbytes(values: List[float]) -> int:
+    return sys.getsizeof(values) + sum(sys.getsizeof(value) for value in values)
+
+
+def time_per_call_us(fn: Callable[[], object], runs: int) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - start) / runs * 1e6
+
+
+def load_vectors(args) -> np.ndarray:
+    if args.model:
+        import config
+        import utils
+
+        config.EMBEDDING_MODEL_NAME = args.model
+        config.EMBEDDING_CACHE_ENABLED = False
+        texts = [f"셀트리온 24년 4분기 섹션 {i} 실적 분석 매출 영업이익 바이오시밀러 전망" for i in range(args.samples)]
+        return np.stack(utils.get_embeddings(texts))
+    rng = np.random.default_rng(0)
+    return rng.standard_normal((args.samples, args.dim)).astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="검색 벡터 표현(메모리/직렬화 시간/양자화 오차) 벤치마크")
+    parser.add_argument("--dim", type=int, default=768, help="임의 벡터 차원 (--model을 주지 않은 경우)")
+    parser.add_argument("--samples", type=int, default=200, help="양자화 오차를 측정할 벡터 수")
+    parser.add_argument("--runs", type=int, default=5000, help="직렬화 시간 측정 반복 횟수")
+    parser.add_argument("--model", default=None, help="지정하면 임의 벡터 대신 실제 임베딩 사용")
+    args = parser.parse_args()
+
+    vectors = load_vectors(args)
+    query = vectors[0]
+    dim = query.shape[0]
+    print(f"Vectors: {len(vectors)} x {dim} ({'model ' + args.model if args.model else 'random normal'})")
+
+    print(f"\n{'query vector':<22} {'bytes':>8}")
+    print(f"{'python list (tolist)':<22} {python_list_nbytes(query.tolist()):>8}")
+    print(f"{'numpy float64':<22} {query.astype(np.float64).nbytes:>8}")
+    print(f"{'numpy float32':<22} {vector_utils.as_query_vector(query).nbytes:>8}")
+
+    try:
+        from pymilvus import DataType
+        from pymilvus.client.prepare import Prepare
+    except ImportError:
+        print("\npymilvus is not installed. Skipping search request serialization benchmark.")
+    else:
+        print(f"\n{'search payload':<22} {'us/query':>9}")
+        float64_query = query.astype(np.float64)
+        timings = {
+            "float64.tolist()": lambda: Prepare._prepare_placeholder_str([float64_query.tolist()]),
+            "list (float32)": lambda: Prepare._prepare_placeholder_str(
+                vector_utils.to_search_payload([query], "list")),
+        }
+        if vector_utils._pymilvus_supports_typed_bytes():
+            timings["bytes (float32)"] = lambda: Prepare._prepare_placeholder_str(
+                vector_utils.to_search_payload([query], "bytes"), False, DataType.FLOAT_VECTOR)
+        else:
+            print("(this pymilvus does not accept typed byte vectors; 'bytes' is unavailable)")
+        for label, fn in timings.items():
+            fn()  # 워밍업
+            print(f"{label:<22} {time_per_call_us(fn, args.runs):>9.2f}")
+        print(f"auto format: {vector_utils.get_search_payload_format()}")
+
+    print(f"\n{'cache dtype':<12} {'bytes/vec':>9} {'10k vecs(MB)':>13} {'min cos':>9} {'mean cos':>9} {'decode us':>10}")
+    for dtype in vector_utils.STORAGE_DTYPES:
+        stored = [vector_utils.encode_vector(vector, dtype) for vector in vectors]
+        restored = np.stack([vector_utils.decode_vector(item, dtype) for item in stored])
+        cosines = (vectors * restored).sum(axis=1) / (
+            np.linalg.norm(vectors, axis=1) * np.linalg.norm(restored, axis=1) + 1e-12
+        )
+        nbytes = vector_utils.stored_nbytes(stored[0])
+        decode_us = time_per_call_us(lambda: vector_utils.decode_vector(stored[0], dtype), args.runs)
+        print(f"{dtype:<12} {nbytes:>9} {nbytes * 10000 / 1e6:>13.2f} {cosines.min():>9.5f} {cosines.mean():>9.5f} "
+              f"{decode_us:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
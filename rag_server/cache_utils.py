@@ -0,0 +1,237 @@
+# cache_utils.py
+"""
+보고서/섹션 등 생성 결과를 재사용하기 위한 캐시 유틸리티
+
+- LRUTTLCache: 크기 제한(LRU)과 TTL을 가진 메모리 캐시 + 선택적 로컬 디스크 저장
+- make_cache_key: 정규화된 파라미터로부터 콘텐츠 주소 기반(sha256) 키 생성
+- 코퍼스 버전: Milvus 컬렉션이 재구축되면 버전을 올려 기존 캐시를 모두 무효화
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import config
+
+
+# --- Key Helpers ---
+def normalize_text(text: Optional[str]) -> str:
+    """줄바꿈 형식과 줄 끝 공백 차이로 캐시 키가 달라지지 않도록 문자열을 정규화합니다."""
+    if not text:
+        return ""
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+
+def make_cache_key(namespace: str, payload: Dict[str, Any]) -> str:
+    """네임스페이스와 파라미터 dict로부터 sha256 캐시 키를 만듭니다."""
+    serialized = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    digest = hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+    return f"{namespace}-{digest}"
+
+
+# --- Corpus Version ---
+def _corpus_version_path() -> str:
+    return os.path.join(config.CACHE_DIR, "corpus_version")
+
+
+def get_corpus_version() -> str:
+    """
+    현재 코퍼스 버전을 반환합니다.
+    config.CORPUS_VERSION과 재구축 시 갱신되는 버전 파일의 값을 합친 문자열입니다.
+    """
+    file_version = "0"
+    try:
+        with open(_corpus_version_path(), "r", encoding="utf-8") as f:
+            file_version = f.read().strip() or "0"
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"Warning: Could not read corpus version file: {e}")
+    return f"{config.CORPUS_VERSION}:{file_version}"
+
+
+def bump_corpus_version() -> str:
+    """Milvus 컬렉션 재구축 후 호출하여 코퍼스 버전에 의존하는 모든 캐시를 무효화합니다."""
+    os.makedirs(config.CACHE_DIR, exist_ok=True)
+    new_version = f"{int(time.time())}-{uuid.uuid4().hex[:8]}"
+    tmp_path = _corpus_version_path() + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(new_version)
+    os.replace(tmp_path, _corpus_version_path())
+    print(f"Corpus version bumped to {new_version}. Cached results are now stale.")
+    return get_corpus_version()
+
+
+# --- Cache ---
+class LRUTTLCache:
+    """
+    크기 제한 LRU + TTL 캐시. 값은 JSON 직렬화 가능해야 합니다.
+
+    disk_dir가 주어지면 항목을 JSON 파일로도 저장하여 프로세스 재시작 후에도 재사용합니다.
+    메모리에서 밀려난 항목도 디스크에 남아 있으면 다시 읽어옵니다.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: int, disk_dir: Optional[str] = None,
+                 max_disk_entries: Optional[int] = None):
+        self.name = name
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        self.max_disk_entries = max_disk_entries or self.max_entries * 10
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._disk_hits = 0
+        self._sets_since_prune = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    # --- public API ---
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._entries[key]
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is not None and entry[0] > now:
+                self._store_in_memory(key, entry)
+                self._hits += 1
+                self._disk_hits += 1
+                return entry[1]
+            self._misses += 1
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        entry = (time.time() + self.ttl_seconds, value)
+        with self._lock:
+            self._store_in_memory(key, entry)
+        self._write_disk(key, entry)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+        path = self._disk_path(key)
+        if path and os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"Warning: Could not delete cache file {path}: {e}")
+
+    def clear(self) -> int:
+        """모든 항목을 삭제하고 삭제된 메모리 항목 수를 반환합니다."""
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+        for path in self._disk_files():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        print(f"Cache '{self.name}' cleared ({count} in-memory entries).")
+        return count
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "name": self.name,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "disk_enabled": bool(self.disk_dir),
+            }
+
+    # --- internals ---
+    def _store_in_memory(self, key: str, entry: tuple):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_path(self, key: str) -> Optional[str]:
+        if not self.disk_dir:
+            return None
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _disk_files(self):
+        if not self.disk_dir or not os.path.isdir(self.disk_dir):
+            return []
+        return [
+            os.path.join(self.disk_dir, name)
+            for name in os.listdir(self.disk_dir) if name.endswith(".json")
+        ]
+
+    def _read_disk(self, key: str) -> Optional[tuple]:
+        path = self._disk_path(key)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data["expires_at"] <= time.time():
+                os.remove(path)
+                return None
+            return data["expires_at"], data["value"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Warning: Could not read cache file {path}: {e}")
+            return None
+
+    def _write_disk(self, key: str, entry: tuple):
+        path = self._disk_path(key)
+        if not path:
+            return
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"expires_at": entry[0], "value": entry[1]}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)  # 원자적 교체로 읽는 쪽이 깨진 파일을 보지 않도록 함
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Warning: Could not write cache file {path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        with self._lock:
+            self._sets_since_prune += 1
+            should_prune = self._sets_since_prune >= max(1, self.max_disk_entries // 10)
+            if should_prune:
+                self._sets_since_prune = 0
+        if should_prune:
+            self._prune_disk()
+
+    def _prune_disk(self):
+        """디스크 항목이 max_disk_entries를 넘으면 가장 오래된 파일부터 삭제합니다."""
+        files = self._disk_files()
+        if len(files) <= self.max_disk_entries:
+            return
+        files_with_mtime = []
+        for path in files:
+            try:
+                files_with_mtime.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+        files_with_mtime.sort()
+        for _, path in files_with_mtime[:len(files_with_mtime) - self.max_disk_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,203 @@
+# collection_registry.py
+"""
+Milvus 컬렉션 핸들 레지스트리
+
+검색할 때마다 Collection(c_name) 생성(스키마 조회), utility.has_collection, utility.load_state를 호출하지 않도록
+컬렉션별로 한 번 확인한 핸들과 스키마 정보를 재사용합니다.
+- MilvusException이 나면 해당 컬렉션 핸들을 버리고 다시 확인한 뒤 한 번 재시도합니다.
+- 코퍼스 버전(cache_utils.bump_corpus_version, 컬렉션 재구축 시 갱신)이 바뀌면 모든 핸들을 다시 확인합니다.
+  (버전 파일은 매 호출마다 읽지 않고 version_check_seconds 간격으로만 다시 읽습니다.)
+- 없는 컬렉션도 잠시 기억하여 매번 조회하지 않습니다.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from pymilvus import Collection, MilvusException, utility
+
+import cache_utils
+
+VECTOR_FIELD_NAME = "embedding"
+
+
+class CollectionHandle:
+    """확인된 컬렉션 핸들과 스키마 요약."""
+
+    def __init__(self, name: str, collection: Collection, corpus_version: str):
+        self.name = name
+        self.collection = collection
+        self.corpus_version = corpus_version
+        self.resolved_at = time.time()
+        self.fields: Dict[str, Any] = {field.name: field for field in collection.schema.fields}
+        vector_field = self.fields.get(VECTOR_FIELD_NAME)
+        dim = (vector_field.params or {}).get("dim") if vector_field is not None else None
+        self.vector_dim: Optional[int] = int(dim) if dim is not None else None
+
+
+class CollectionRegistry:
+    """컬렉션 이름 -> CollectionHandle 캐시. 핸들은 처음 사용할 때 확인하고 필요할 때만 다시 확인합니다."""
+
+    def __init__(self, collection_mappings: Dict[str, Dict[str, Any]], missing_retry_seconds: float = 30.0,
+                 version_fn: Callable[[], str] = cache_utils.get_corpus_version, version_check_seconds: float = 5.0):
+        self.collection_mappings = collection_mappings
+        self.missing_retry_seconds = missing_retry_seconds
+        self.version_fn = version_fn
+        self.version_check_seconds = version_check_seconds
+        self._version: Optional[str] = None
+        self._version_checked_at = 0.0
+        self._handles: Dict[str, CollectionHandle] = {}
+        self._missing: Dict[str, float] = {}  # 없는 컬렉션 -> 확인 시각
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "resolves": 0, "refreshes": 0, "retries": 0}
+        self._validation: Dict[str, Dict[str, Any]] = {}
+
+    def _collection_lock(self, name: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def _corpus_version(self) -> str:
+        """코퍼스 버전 (version_check_seconds 동안은 마지막으로 읽은 값을 재사용)."""
+        now = time.monotonic()
+        with self._lock:
+            if self._version is not None and now - self._version_checked_at < self.version_check_seconds:
+                return self._version
+        version = self.version_fn()
+        with self._lock:
+            self._version = version
+            self._version_checked_at = now
+        return version
+
+    def get(self, name: str) -> Optional[CollectionHandle]:
+        """
+        컬렉션 핸들을 반환합니다 (없는 컬렉션이면 None). 로드되지 않은 컬렉션은 확인할 때 로드합니다.
+
+        Raises:
+            MilvusException: 컬렉션 확인/로드 중 Milvus 오류
+        """
+        version = self._corpus_version()
+        handle = self._handles.get(name)
+        if handle is not None and handle.corpus_version == version:
+            with self._lock:
+                self._stats["hits"] += 1
+            return handle
+        missing_since = self._missing.get(name)
+        if handle is None and missing_since is not None and time.time() - missing_since < self.missing_retry_seconds:
+            return None
+
+        with self._collection_lock(name):  # 같은 컬렉션을 여러 스레드가 동시에 확인하지 않도록
+            handle = self._handles.get(name)
+            if handle is not None and handle.corpus_version == version:
+                return handle
+            return self._resolve(name, version, refresh=handle is not None)
+
+    def _resolve(self, name: str, version: str, refresh: bool) -> Optional[CollectionHandle]:
+        with self._lock:
+            self._stats["refreshes" if refresh else "resolves"] += 1
+        if not utility.has_collection(name):
+            print(f"  Warning: Collection '{name}' does not exist.")
+            with self._lock:
+                self._handles.pop(name, None)
+                self._missing[name] = time.time()
+            return None
+        collection = Collection(name)
+        if utility.load_state(name) != "Loaded":
+            print(f"  Loading collection '{name}'...")
+            collection.load()
+            utility.wait_for_loading_complete(name)
+            print(f"  Collection '{name}' loaded.")
+        handle = CollectionHandle(name, collection, version)
+        with self._lock:
+            self._handles[name] = handle
+            self._missing.pop(name, None)
+        print(f"  Collection '{name}' handle {'refreshed' if refresh else 'resolved'} "
+              f"({len(handle.fields)} fields, dim={handle.vector_dim}).")
+        return handle
+
+    def invalidate(self, name: Optional[str] = None):
+        """핸들을 버려 다음 사용 때 다시 확인하도록 합니다 (name이 없으면 전체)."""
+        with self._lock:
+            if name is None:
+                self._handles.clear()
+                self._missing.clear()
+                self._version = None  # 다음 사용 때 버전 파일도 다시 읽음
+            else:
+                self._handles.pop(name, None)
+                self._missing.pop(name, None)
+
+    def call(self, name: str, fn: Callable[[Collection], Any]) -> Any:
+        """
+        핸들로 fn(collection)을 실행합니다. MilvusException이 나면 핸들을 다시 확인하고 한 번 재시도합니다
+        (컬렉션이 재구축/해제된 경우 등).
+
+        Raises:
+            LookupError: 컬렉션이 없는 경우
+            MilvusException: 재시도 후에도 실패한 경우
+        """
+        handle = self.get(name)
+        if handle is None:
+            raise LookupError(f"Collection '{name}' does not exist.")
+        try:
+            return fn(handle.collection)
+        except MilvusException as e:
+            print(f"  Milvus error on collection '{name}' ({e}). Refreshing handle and retrying once...")
+            with self._lock:
+                self._stats["retries"] += 1
+            self.invalidate(name)
+            handle = self.get(name)
+            if handle is None:
+                raise LookupError(f"Collection '{name}' does not exist.")
+            return fn(handle.collection)
+
+    def validate(self, collection_names: List[str],
+                 expected_dims: Optional[Dict[str, Optional[int]]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        COLLECTION_FIELD_MAPPINGS가 실제 컬렉션 스키마와 맞는지 확인합니다.
+        (컬렉션 존재, 텍스트/출력 필드 존재, 벡터 필드와 차원)
+        """
+        expected_dims = expected_dims or {}
+        results = {}
+        for name in collection_names:
+            errors = []
+            mapping = self.collection_mappings.get(name)
+            try:
+                handle = self.get(name)
+            except MilvusException as e:
+                handle = None
+                errors.append(f"Milvus error: {e}")
+            if mapping is None:
+                errors.append("no field mapping in COLLECTION_FIELD_MAPPINGS")
+            if handle is None and not errors:
+                errors.append("collection does not exist")
+            if handle is not None:
+                if VECTOR_FIELD_NAME not in handle.fields:
+                    errors.append(f"vector field '{VECTOR_FIELD_NAME}' not found")
+                expected_dim = expected_dims.get(name)
+                if expected_dim is not None and handle.vector_dim is not None and handle.vector_dim != expected_dim:
+                    errors.append(f"vector dim {handle.vector_dim} != embedding model dim {expected_dim}")
+                if mapping is not None:
+                    for field in [mapping.get("text_field")] + list(mapping.get("output_fields", [])):
+                        if field and field not in handle.fields:
+                            errors.append(f"field '{field}' not found in schema")
+            results[name] = {"ok": not errors, "errors": errors, "vector_dim": handle.vector_dim if handle else None}
+            if errors:
+                print(f"Warning: Collection '{name}' failed validation: {'; '.join(errors)}")
+            else:
+                print(f"Collection '{name}' validated (dim={handle.vector_dim}).")
+        with self._lock:
+            self._validation.update(results)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "collections": {
+                    name: {"resolved_at": handle.resolved_at, "vector_dim": handle.vector_dim,
+                           "corpus_version": handle.corpus_version}
+                    for name, handle in self._handles.items()
+                },
+                "missing": list(self._missing),
+                "validation": dict(self._validation),
+            }
@@ -5,6 +5,12 @@ from dotenv import load_dotenv
 # Load environment variables from .env file if it exists
 load_dotenv()
 
+def _env_bool(name, default):
+    """환경 변수를 bool로 읽습니다 (1/true/yes/on -> True)."""
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
 # --- OpenAI Settings ---
 # API 키는 환경 변수에서 불러옵니다
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
@@ -18,6 +24,53 @@ SUMMARY_LLM_MODEL = os.getenv("SUMMARY_LLM_MODEL", "gpt-4o-mini")
 EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "klue/bert-base")
 VECTOR_DIM = int(os.getenv("VECTOR_DIM", "768"))  # 문자열을 정수로 변환
 
+# 서버 시작 시 백그라운드에서 임베딩 모델을 불러와 워밍업 (False이면 첫 임베딩 요청 때 로딩)
+MODEL_WARMUP_ON_STARTUP = _env_bool("MODEL_WARMUP_ON_STARTUP", True)
+# 보고서 요청이 모델 준비를 기다리는 최대 시간 (초과 시 503)
+MODEL_READY_TIMEOUT_SECONDS = float(os.getenv("MODEL_READY_TIMEOUT_SECONDS", "120"))
+# 워밍업 forward pass 횟수 (배치/길이를 바꿔가며 실행하여 메모리 할당, torch.compile 등 첫 요청 비용을 미리 처리)
+MODEL_WARMUP_PASSES = int(os.getenv("MODEL_WARMUP_PASSES", "3"))
+# 워밍업이 끝날 때까지 /ready에서 503 반환 (새로 뜬 파드에 트래픽이 몰려 첫 요청들이 느려지는 것을 방지)
+READY_REQUIRES_WARMUP = _env_bool("READY_REQUIRES_WARMUP", True)
+# 임베딩 백엔드: "torch" (기본) 또는 "onnx" (ONNX Runtime CPU, onnxruntime 필요)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+# ONNX 변환 모델 저장 위치와 동적 int8 양자화 여부
+EMBEDDING_ONNX_DIR = os.getenv("EMBEDDING_ONNX_DIR", os.path.join(BASE_DIR, "onnx_models"))
+EMBEDDING_ONNX_QUANTIZE = _env_bool("EMBEDDING_ONNX_QUANTIZE", False)
+# 임베딩 연산 스레드 수 (torch, ONNX Runtime 공통, 0이면 라이브러리 기본값)
+# 한 서버에서 워커 여러 개가 모델을 돌린다면 "코어 수 / 워커 수" 정도로 제한하여 코어 경쟁을 피함
+EMBEDDING_INTRA_OP_THREADS = int(os.getenv("EMBEDDING_INTRA_OP_THREADS", "0"))
+EMBEDDING_INTER_OP_THREADS = int(os.getenv("EMBEDDING_INTER_OP_THREADS", "0"))
+# torch 백엔드 런타임 설정
+# - INFERENCE_MODE: torch.no_grad 대신 torch.inference_mode 사용 (autograd 추적 비용 제거)
+# - DTYPE: "float32" (기본), "bfloat16" (CPU/지원 GPU에서 autocast), "float16" (CUDA 전용)
+# - COMPILE: torch.compile 사용 (첫 요청에서 컴파일 시간이 걸리므로 워밍업과 함께 사용, 실패 시 eager로 대체)
+EMBEDDING_TORCH_INFERENCE_MODE = _env_bool("EMBEDDING_TORCH_INFERENCE_MODE", True)
+EMBEDDING_TORCH_DTYPE = os.getenv("EMBEDDING_TORCH_DTYPE", "float32")
+EMBEDDING_TORCH_COMPILE = _env_bool("EMBEDDING_TORCH_COMPILE", False)
+# fast(Rust) 토크나이저가 없으면 모델 로딩 실패로 처리 (slow 토크나이저는 토큰화가 수 배 느림)
+EMBEDDING_REQUIRE_FAST_TOKENIZER = _env_bool("EMBEDDING_REQUIRE_FAST_TOKENIZER", True)
+# ONNX 모델과 torch 출력의 최소 코사인 유사도 (새로 변환할 때 항상 검사, 아래 옵션이 켜져 있으면 로드할 때마다 검사)
+EMBEDDING_PARITY_MIN_COSINE = float(os.getenv("EMBEDDING_PARITY_MIN_COSINE", "0.99"))
+EMBEDDING_PARITY_CHECK_ON_LOAD = _env_bool("EMBEDDING_PARITY_CHECK_ON_LOAD", False)
+# 512 토큰을 넘는 텍스트(문서, 보고서, 요약) 임베딩: 윈도우 크기(특수 토큰 제외), 윈도우 간 겹치는 토큰 수, 풀링 방식
+LONG_TEXT_WINDOW_TOKENS = int(os.getenv("LONG_TEXT_WINDOW_TOKENS", "510"))
+LONG_TEXT_OVERLAP_TOKENS = int(os.getenv("LONG_TEXT_OVERLAP_TOKENS", "128"))
+LONG_TEXT_POOLING = os.getenv("LONG_TEXT_POOLING", "token_count")  # "mean" 또는 "token_count" (윈도우 토큰 수 가중 평균)
+LONG_TEXT_MAX_WINDOWS = int(os.getenv("LONG_TEXT_MAX_WINDOWS", "64"))
+# 멀티 워커 배포: 모델을 올린 임베딩 서버 프로세스(embedding_server.py) 하나에 Unix 소켓으로 요청
+EMBEDDING_SERVER_ENABLED = _env_bool("EMBEDDING_SERVER_ENABLED", False)
+EMBEDDING_SERVER_SOCKET = os.getenv("EMBEDDING_SERVER_SOCKET", "/tmp/myanalyst_embedding.sock")
+EMBEDDING_SERVER_TIMEOUT_SECONDS = float(os.getenv("EMBEDDING_SERVER_TIMEOUT_SECONDS", "30"))
+# 서버가 한 번에 묶어 처리하는 최대 요청 수 (요청마다 여러 텍스트 포함 가능)
+EMBEDDING_SERVER_MAX_BATCH_REQUESTS = int(os.getenv("EMBEDDING_SERVER_MAX_BATCH_REQUESTS", "32"))
+# get_embeddings 한 번의 forward pass에 넣는 최대 텍스트 수 (길이순 정렬 후 묶음)
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+# 동시에 들어온 단건 get_embedding 요청을 모아서 한 번에 인코딩 (최대 배치 크기, 첫 요청 후 최대 대기 시간)
+EMBEDDING_MICROBATCH_ENABLED = _env_bool("EMBEDDING_MICROBATCH_ENABLED", True)
+EMBEDDING_MICROBATCH_MAX_SIZE = int(os.getenv("EMBEDDING_MICROBATCH_MAX_SIZE", "16"))
+EMBEDDING_MICROBATCH_MAX_WAIT_MS = float(os.getenv("EMBEDDING_MICROBATCH_MAX_WAIT_MS", "5"))
+
 # --- Milvus Settings ---
 MILVUS_HOST = os.getenv("MILVUS_HOST", "localhost")
 MILVUS_PORT = os.getenv("MILVUS_PORT", "19530")
@@ -34,17 +87,45 @@ SEARCH_PARAMS = {
     # For HNSW index:
     # "params": {"ef": 64}
 }
+# 검색 벡터를 Milvus로 보내는 형식: "bytes" (float32 바이트, 스키마로 타입 결정하는 pymilvus 필요),
+# "list" (파이썬 float 리스트), "auto" (설치된 pymilvus가 지원하면 bytes)
+MILVUS_QUERY_VECTOR_FORMAT = os.getenv("MILVUS_QUERY_VECTOR_FORMAT", "auto")
+# 여러 컬렉션 검색을 동시에 실행 (검색 지연 = 가장 느린 컬렉션). 스레드 풀은 모든 요청이 공유
+MILVUS_SEARCH_PARALLEL = _env_bool("MILVUS_SEARCH_PARALLEL", True)
+MILVUS_SEARCH_MAX_WORKERS = int(os.getenv("MILVUS_SEARCH_MAX_WORKERS", "8"))
+# 하이브리드 검색: 청크 텍스트 BM25(kiwipiepy 토큰화) 결과를 벡터 검색 결과와 RRF로 결합
+# (색인이 없는 컬렉션은 벡터 검색만 사용). 색인은 적재 시 생성: python lexical_index.py
+HYBRID_SEARCH_ENABLED = _env_bool("HYBRID_SEARCH_ENABLED", True)
+LEXICAL_INDEX_DIR = os.getenv("LEXICAL_INDEX_DIR", os.path.join(BASE_DIR, "lexical_index"))
+LEXICAL_INDEX_MAX_SEGMENTS = int(os.getenv("LEXICAL_INDEX_MAX_SEGMENTS", "8"))
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+# 컬렉션별 BM25 후보 수 (기본: SEARCH_TOP_K와 같음)와 RRF 상수 k (score = sum 1 / (k + rank))
+LEXICAL_TOP_K = int(os.getenv("LEXICAL_TOP_K", "0")) or None
+RRF_K = int(os.getenv("RRF_K", "60"))
+# 시작 시 COLLECTION_FIELD_MAPPINGS를 실제 컬렉션 스키마와 대조하고 컬렉션 핸들을 미리 확인 (백그라운드)
+MILVUS_VALIDATE_ON_STARTUP = _env_bool("MILVUS_VALIDATE_ON_STARTUP", True)
+# 존재하지 않는 컬렉션을 다시 확인하기까지 기다리는 시간(초)
+MILVUS_MISSING_COLLECTION_RETRY_SECONDS = float(os.getenv("MILVUS_MISSING_COLLECTION_RETRY_SECONDS", "30"))
+# 컬렉션 핸들 확인에 쓰는 코퍼스 버전을 파일에서 다시 읽는 간격 (초, 재구축 후 최대 이 시간 안에 반영)
+MILVUS_CORPUS_VERSION_CHECK_SECONDS = float(os.getenv("MILVUS_CORPUS_VERSION_CHECK_SECONDS", "5"))
 
 # --- Field Mappings per Collection ---
 # Define the name of the field containing the main text content for each collection
 # Also define any additional metadata fields you want to include in the context
+# embedding_model / vector_dim: 컬렉션을 만들 때 사용한 임베딩 모델과 벡터 차원 (기본값은 EMBEDDING_MODEL_NAME / VECTOR_DIM)
+# 다른 모델을 지정한 컬렉션은 그 모델을 처음 사용할 때 불러오며, 같은 모델은 여러 컬렉션이 공유
 COLLECTION_FIELD_MAPPINGS = {
     "celltrion_embeddings": {
         "text_field": "text",
-        "output_fields": ["text"] # Include other fields if needed
+        "output_fields": ["text"], # Include other fields if needed
+        "embedding_model": os.getenv("CELLTRION_EMBEDDING_MODEL_NAME", EMBEDDING_MODEL_NAME),
+        "vector_dim": int(os.getenv("CELLTRION_VECTOR_DIM", "0")) or None,
     },
     "news_embeddings": {
         "text_field": "chunk_text",
+        "embedding_model": os.getenv("NEWS_EMBEDDING_MODEL_NAME", EMBEDDING_MODEL_NAME),
+        "vector_dim": int(os.getenv("NEWS_VECTOR_DIM", "0")) or None,
         "output_fields": [
             "chunk_text", "original_article_id", "chunk_seq_id",
             "title", "datetime", "summary", "url"
@@ -67,6 +148,92 @@ REPORT_SECTIONS = {
 SECTION_GENERATION_ORDER = ["2", "3", "4", "5", "6"]
 SUMMARY_SECTION_KEY = "1"
 
+# --- Concurrency Settings ---
+# 요약을 제외한 섹션들은 서로 독립적이므로 동시에 생성합니다 (1이면 기존처럼 순차 실행)
+# SECTION_PIPELINE_ENABLED이면 동시 LLM 호출 수는 PIPELINE_LLM_WORKERS(기본값 = 이 값)로 제한됨
+SECTION_MAX_WORKERS = int(os.getenv("SECTION_MAX_WORKERS", "5"))
+# /reports 요청의 동기식 파이프라인을 실행할 스레드 수 (동시에 생성 가능한 보고서 수)
+REPORT_EXECUTOR_MAX_WORKERS = int(os.getenv("REPORT_EXECUTOR_MAX_WORKERS", "4"))
+# 섹션 생성을 키워드/임베딩/검색/LLM 단계별 파이프라인으로 실행 (False이면 섹션 단위 스레드 풀)
+SECTION_PIPELINE_ENABLED = _env_bool("SECTION_PIPELINE_ENABLED", True)
+# 단계별 워커 수 (모든 보고서 요청이 공유). 임베딩은 CPU 작업이므로 별도의 작은 워커 풀에서 실행
+PIPELINE_KEYWORD_WORKERS = int(os.getenv("PIPELINE_KEYWORD_WORKERS", "4"))
+PIPELINE_EMBED_WORKERS = int(os.getenv("PIPELINE_EMBED_WORKERS", "1"))
+PIPELINE_SEARCH_WORKERS = int(os.getenv("PIPELINE_SEARCH_WORKERS", "4"))
+# LLM 단계 워커 수는 기본적으로 SECTION_MAX_WORKERS를 따름 (파이프라인 사용 시 LLM 동시 호출 수 상한)
+PIPELINE_LLM_WORKERS = int(os.getenv("PIPELINE_LLM_WORKERS", str(SECTION_MAX_WORKERS)))
+# 단계별 대기열 크기 (가득 차면 앞 단계가 기다림)
+PIPELINE_STAGE_QUEUE_SIZE = int(os.getenv("PIPELINE_STAGE_QUEUE_SIZE", "32"))
+# /reports 승인 제어: 동시 생성 수 상한, 대기열 크기, 대기 시간 상한 (초과 시 429 + Retry-After)
+REPORT_ADMISSION_MAX_CONCURRENT = int(os.getenv("REPORT_ADMISSION_MAX_CONCURRENT", str(REPORT_EXECUTOR_MAX_WORKERS)))
+REPORT_ADMISSION_MAX_QUEUE = int(os.getenv("REPORT_ADMISSION_MAX_QUEUE", "8"))
+REPORT_ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("REPORT_ADMISSION_QUEUE_TIMEOUT_SECONDS", "120"))
+# 평균 처리 시간을 아직 모를 때 사용하는 Retry-After 값 (초)
+REPORT_ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("REPORT_ADMISSION_RETRY_AFTER_SECONDS", "30"))
+# 모든 섹션의 검색 키워드를 한 번의 JSON LLM 호출로 생성 (False이면 섹션별로 호출)
+KEYWORD_BATCH_ENABLED = _env_bool("KEYWORD_BATCH_ENABLED", True)
+# 미리 계획된 키워드가 있으면 모든 섹션의 키워드를 한 번에 임베딩하고 컬렉션마다 한 번의 검색으로 가져옴
+# (Milvus 검색 RPC: 섹션 수 x 컬렉션 수 -> 컬렉션 수)
+SECTION_BATCH_RETRIEVAL_ENABLED = _env_bool("SECTION_BATCH_RETRIEVAL_ENABLED", True)
+
+# --- Report Job Settings ---
+# POST /reports/jobs 로 접수된 작업을 동시에 실행할 워커 수와 대기열 한도
+REPORT_JOB_MAX_WORKERS = int(os.getenv("REPORT_JOB_MAX_WORKERS", "2"))
+REPORT_JOB_MAX_PENDING = int(os.getenv("REPORT_JOB_MAX_PENDING", "50"))
+# 작업 결과 저장소: "memory" 또는 "sqlite"
+REPORT_JOB_STORE = os.getenv("REPORT_JOB_STORE", "memory")
+REPORT_JOB_DB_PATH = os.getenv(
+    "REPORT_JOB_DB_PATH",
+    os.path.join(BASE_DIR, "job_store", "report_jobs.db")
+)
+# 마지막 갱신 후 작업 결과를 보관하는 시간 (초)
+REPORT_JOB_TTL_SECONDS = int(os.getenv("REPORT_JOB_TTL_SECONDS", "86400"))
+
+# --- Cache Settings ---
+# 캐시 파일(보고서 캐시, 코퍼스 버전 등)을 저장할 디렉토리
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(BASE_DIR, "cache"))
+# 코퍼스 버전: Milvus 데이터가 바뀌면 올려서 캐시를 무효화 (재구축 스크립트도 자동으로 버전을 올림)
+CORPUS_VERSION = os.getenv("CORPUS_VERSION", "1")
+# 동일한 보고서 요청에 대한 전체 보고서 캐시
+REPORT_CACHE_ENABLED = _env_bool("REPORT_CACHE_ENABLED", True)
+REPORT_CACHE_MAX_ENTRIES = int(os.getenv("REPORT_CACHE_MAX_ENTRIES", "128"))
+REPORT_CACHE_TTL_SECONDS = int(os.getenv("REPORT_CACHE_TTL_SECONDS", "86400"))
+REPORT_CACHE_DISK_ENABLED = _env_bool("REPORT_CACHE_DISK_ENABLED", True)
+REPORT_CACHE_MAX_DISK_ENTRIES = int(os.getenv("REPORT_CACHE_MAX_DISK_ENTRIES", "1000"))
+# 섹션 단위 캐시 (목차 일부만 바뀐 경우 나머지 섹션 재사용)
+SECTION_CACHE_ENABLED = _env_bool("SECTION_CACHE_ENABLED", True)
+SECTION_CACHE_MAX_ENTRIES = int(os.getenv("SECTION_CACHE_MAX_ENTRIES", "512"))
+SECTION_CACHE_TTL_SECONDS = int(os.getenv("SECTION_CACHE_TTL_SECONDS", "86400"))
+SECTION_CACHE_DISK_ENABLED = _env_bool("SECTION_CACHE_DISK_ENABLED", True)
+# 섹션 검색 키워드 캐시 (회사, 분기, 섹션 번호, 제목 기준)
+KEYWORD_CACHE_ENABLED = _env_bool("KEYWORD_CACHE_ENABLED", True)
+KEYWORD_CACHE_MAX_ENTRIES = int(os.getenv("KEYWORD_CACHE_MAX_ENTRIES", "1024"))
+KEYWORD_CACHE_TTL_SECONDS = int(os.getenv("KEYWORD_CACHE_TTL_SECONDS", str(7 * 86400)))
+KEYWORD_CACHE_DISK_ENABLED = _env_bool("KEYWORD_CACHE_DISK_ENABLED", True)
+# 캐시를 채울 때 temperature 0으로 키워드를 생성 (같은 입력에 같은 키워드)
+KEYWORD_CACHE_DETERMINISTIC = _env_bool("KEYWORD_CACHE_DETERMINISTIC", True)
+# 검색 결과에 텍스트 필드가 없을 때 채운 텍스트 캐시 (코퍼스 버전 + 컬렉션 + ID 기준, 메모리 전용)
+HIT_TEXT_CACHE_ENABLED = _env_bool("HIT_TEXT_CACHE_ENABLED", True)
+HIT_TEXT_CACHE_MAX_ENTRIES = int(os.getenv("HIT_TEXT_CACHE_MAX_ENTRIES", "20000"))
+HIT_TEXT_CACHE_TTL_SECONDS = int(os.getenv("HIT_TEXT_CACHE_TTL_SECONDS", "86400"))
+# 임베딩 벡터 캐시 (모델 + 텍스트 해시 기준). 디스크에는 SQLite BLOB으로 저장
+EMBEDDING_CACHE_ENABLED = _env_bool("EMBEDDING_CACHE_ENABLED", True)
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "10000"))
+EMBEDDING_CACHE_DISK_ENABLED = _env_bool("EMBEDDING_CACHE_DISK_ENABLED", True)
+EMBEDDING_CACHE_DB_PATH = os.getenv("EMBEDDING_CACHE_DB_PATH", os.path.join(CACHE_DIR, "embeddings.db"))
+# 캐시 저장 형식: "float32", "float16" 또는 "int8" (벡터별 scale을 둔 스칼라 양자화, 코사인 유사도 오차 1e-4 이하)
+EMBEDDING_CACHE_DTYPE = os.getenv("EMBEDDING_CACHE_DTYPE", "float32")  # 디스크
+EMBEDDING_CACHE_MEMORY_DTYPE = os.getenv("EMBEDDING_CACHE_MEMORY_DTYPE", "float32")  # 메모리 LRU
+# 워밍업 때 기본 보고서 템플릿의 검색 쿼리(기본/fallback 키워드, 캐시된 키워드)와 최근 자주 쓰인 쿼리를 미리 임베딩
+EMBEDDING_PRECOMPUTE_ON_STARTUP = _env_bool("EMBEDDING_PRECOMPUTE_ON_STARTUP", True)
+# 미리 계산할 (기업:시기) 목록, 쉼표로 구분 (예: "셀트리온:24년 4분기,셀트리온:25년 1분기")
+EMBEDDING_PRECOMPUTE_TARGETS = os.getenv("EMBEDDING_PRECOMPUTE_TARGETS", "셀트리온:24년 4분기")
+# 최근 자주 쓰인 쿼리 중 미리 계산할 개수와 사용 기록 보관 기준
+EMBEDDING_PRECOMPUTE_FREQUENT_QUERIES = int(os.getenv("EMBEDDING_PRECOMPUTE_FREQUENT_QUERIES", "50"))
+QUERY_USAGE_MAX_ENTRIES = int(os.getenv("QUERY_USAGE_MAX_ENTRIES", "1000"))
+QUERY_USAGE_MAX_AGE_DAYS = float(os.getenv("QUERY_USAGE_MAX_AGE_DAYS", "14"))
+QUERY_USAGE_PATH = os.getenv("QUERY_USAGE_PATH", os.path.join(CACHE_DIR, "query_usage.json"))
+
 
 # Check if essential configurations are set
 if not OPENAI_API_KEY or OPENAI_API_KEY == "YOUR_FALLBACK_API_KEY":
@@ -0,0 +1,414 @@
+# embedding_backends.py
+"""
+교체 가능한 임베딩 백엔드
+
+- TorchEmbeddingBackend: transformers AutoModel (fp32, GPU가 있으면 CUDA)
+- OnnxEmbeddingBackend: ONNX로 내보낸 모델을 ONNX Runtime(CPU)으로 실행, 선택적으로 동적 int8 양자화
+
+두 백엔드 모두 토크나이저 출력에 mean pooling을 적용한 같은 형태의 벡터를 반환합니다.
+config.EMBEDDING_BACKEND로 선택하며, onnxruntime이 없거나 변환/검증에 실패하면 torch 백엔드로 대체합니다.
+"""
+
+import contextlib
+import os
+import re
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import torch
+from transformers import AutoModel, AutoTokenizer
+
+import config
+
+# 패리티 검사에 사용하는 예시 문장
+PARITY_SAMPLE_TEXTS = [
+    "셀트리온 24년 4분기 실적 분석 매출 영업이익",
+    "짐펜트라 미국 출시 이후 처방 확대와 램시마 SC 유럽 점유율",
+    "바이오시밀러 시장 환경 및 전략 방향",
+    "향후 전망",
+]
+
+
+TORCH_DTYPES = {"float32": torch.float32, "bfloat16": torch.bfloat16, "float16": torch.float16}
+
+# set_num_interop_threads는 프로세스에서 병렬 작업이 시작되기 전 한 번만 호출할 수 있음
+_torch_threads_configured = False
+
+
+# --- Runtime ---
+def load_tokenizer(model_name: str, require_fast: Optional[bool] = None):
+    """
+    토크나이저를 불러옵니다. fast(Rust) 토크나이저를 우선 사용하며,
+    require_fast(기본 config.EMBEDDING_REQUIRE_FAST_TOKENIZER)가 켜져 있으면 slow 토크나이저일 때 RuntimeError.
+    """
+    require_fast = config.EMBEDDING_REQUIRE_FAST_TOKENIZER if require_fast is None else require_fast
+    tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+    if not tokenizer.is_fast:
+        message = f"No fast tokenizer available for '{model_name}' ({type(tokenizer).__name__})."
+        if require_fast:
+            raise RuntimeError(message + " Set EMBEDDING_REQUIRE_FAST_TOKENIZER=false to allow the slow tokenizer.")
+        print(f"Warning: {message} Tokenization will be several times slower.")
+    return tokenizer
+
+
+def configure_torch_threads(intra_op_threads: int = 0, inter_op_threads: int = 0) -> Dict[str, int]:
+    """
+    torch CPU 스레드 수를 설정합니다 (0이면 torch 기본값 유지).
+    한 서버에 워커가 여러 개일 때 코어 수 / 워커 수로 제한하면 워커끼리 코어를 두고 경쟁하지 않습니다.
+    """
+    global _torch_threads_configured
+    if intra_op_threads > 0:
+        torch.set_num_threads(intra_op_threads)
+    if inter_op_threads > 0 and not _torch_threads_configured:
+        try:
+            torch.set_num_interop_threads(inter_op_threads)
+        except RuntimeError as e:
+            print(f"Warning: Could not set torch inter-op threads ({e}).")
+    _torch_threads_configured = True
+    return {"intra_op_threads": torch.get_num_threads(), "inter_op_threads": torch.get_num_interop_threads()}
+
+
+def resolve_torch_dtype(dtype_name: str, device: torch.device) -> torch.dtype:
+    """요청한 dtype을 장치가 지원하지 않으면 float32로 대체합니다."""
+    dtype = TORCH_DTYPES.get((dtype_name or "float32").lower())
+    if dtype is None:
+        print(f"Warning: Unknown embedding torch dtype '{dtype_name}'. Using float32.")
+        return torch.float32
+    if dtype == torch.float16 and device.type != "cuda":
+        print("Warning: float16 embedding inference requires CUDA. Using float32.")
+        return torch.float32
+    if dtype == torch.bfloat16 and device.type == "cuda" and not torch.cuda.is_bf16_supported():
+        print("Warning: This GPU does not support bfloat16. Using float32.")
+        return torch.float32
+    return dtype
+
+
+# --- Pooling ---
+def mean_pooling(model_output, attention_mask):
+    """Mean Pooling helper function."""
+    token_embeddings = model_output[0]
+    input_mask_expanded = attention_mask.unsqueeze(-1).expand(token_embeddings.size()).float()
+    sum_embeddings = torch.sum(token_embeddings * input_mask_expanded, 1)
+    sum_mask = torch.clamp(input_mask_expanded.sum(1), min=1e-9)
+    return sum_embeddings / sum_mask
+
+
+def mean_pooling_numpy(token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """mean_pooling과 같은 계산을 numpy 배열에 적용합니다."""
+    mask = attention_mask[..., np.newaxis].astype(np.float32)
+    summed = (token_embeddings * mask).sum(axis=1)
+    return summed / np.clip(mask.sum(axis=1), 1e-9, None)
+
+
+# --- Backends ---
+class EmbeddingBackend(ABC):
+    """텍스트 목록을 [len(texts), dim] float32 배열로 인코딩하는 백엔드 인터페이스."""
+
+    name = "base"
+
+    def __init__(self, tokenizer, model_name: str = ""):
+        self.tokenizer = tokenizer
+        self.model_name = model_name
+        self.device = torch.device("cpu")
+
+    @property
+    def model_id(self) -> str:
+        """모델과 백엔드 변형을 구분하는 식별자 (백엔드마다 벡터가 조금씩 다르므로 캐시 키에 사용)."""
+        return f"{self.model_name}:{self.name}"
+
+    def embed(self, texts: List[str], max_length: int = 512) -> np.ndarray:
+        encoded_input = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=max_length, return_tensors='np'
+        )
+        return self.embed_encoded(encoded_input)
+
+    @abstractmethod
+    def embed_encoded(self, encoded_input: Dict[str, np.ndarray]) -> np.ndarray:
+        """이미 토큰화된 입력(input_ids, attention_mask, token_type_ids numpy 배열)을 임베딩합니다."""
+
+    def embed_token_windows(self, windows: List[List[int]]) -> np.ndarray:
+        """
+        특수 토큰이 없는 토큰 ID 목록(윈도우)들을 [CLS] ... [SEP] 형태로 감싸 한 번에 임베딩합니다.
+        긴 텍스트를 다시 토큰화하지 않고 윈도우 단위로 인코딩할 때 사용합니다.
+        """
+        cls_ids = [self.tokenizer.cls_token_id] if self.tokenizer.cls_token_id is not None else []
+        sep_ids = [self.tokenizer.sep_token_id] if self.tokenizer.sep_token_id is not None else []
+        sequences = [cls_ids + list(window) + sep_ids for window in windows]
+        max_len = max(len(sequence) for sequence in sequences)
+        pad_id = self.tokenizer.pad_token_id or 0
+        input_ids = np.full((len(sequences), max_len), pad_id, dtype=np.int64)
+        attention_mask = np.zeros((len(sequences), max_len), dtype=np.int64)
+        for i, sequence in enumerate(sequences):
+            input_ids[i, :len(sequence)] = sequence
+            attention_mask[i, :len(sequence)] = 1
+        return self.embed_encoded({
+            "input_ids": input_ids,
+            "attention_mask": attention_mask,
+            "token_type_ids": np.zeros_like(input_ids),
+        })
+
+    def describe(self) -> Dict[str, Any]:
+        return {"backend": self.name, "model_id": self.model_id, "device": str(self.device)}
+
+
+class TorchEmbeddingBackend(EmbeddingBackend):
+    name = "torch"
+
+    def __init__(self, model_name: str, tokenizer, model: Optional[torch.nn.Module] = None,
+                 inference_mode: bool = True, dtype: str = "float32", compile_model: bool = False):
+        super().__init__(tokenizer, model_name)
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.model = model if model is not None else AutoModel.from_pretrained(model_name)
+        self.model.to(self.device)
+        self.model.eval() # Set to evaluation mode
+        self.inference_mode = inference_mode
+        self.dtype = resolve_torch_dtype(dtype, self.device)
+        self.compiled = False
+        self._forward_model = self.model
+        if compile_model:
+            if hasattr(torch, "compile"):
+                # 입력 길이가 매번 달라지므로 dynamic shape로 컴파일 (첫 forward pass에서 실제 컴파일)
+                self._forward_model = torch.compile(self.model, dynamic=True)
+                self.compiled = True
+            else:
+                print("Warning: torch.compile is not available in this torch version. Running eagerly.")
+
+    def _grad_context(self):
+        return torch.inference_mode() if self.inference_mode else torch.no_grad()
+
+    def _autocast_context(self):
+        # 가중치는 fp32로 두고 연산만 bf16/fp16으로 수행 (pooling 결과는 fp32로 반환)
+        if self.dtype == torch.float32:
+            return contextlib.nullcontext()
+        return torch.autocast(device_type=self.device.type, dtype=self.dtype)
+
+    def _forward(self, tensors: Dict[str, torch.Tensor]) -> np.ndarray:
+        with self._grad_context(), self._autocast_context():
+            try:
+                model_output = self._forward_model(**tensors)
+            except Exception as e:
+                if not self.compiled:
+                    raise
+                print(f"Warning: torch.compile failed ({e}). Falling back to eager embedding model.")
+                self._forward_model = self.model
+                self.compiled = False
+                model_output = self.model(**tensors)
+            return mean_pooling(model_output, tensors['attention_mask']).float().cpu().numpy()
+
+    def embed(self, texts: List[str], max_length: int = 512) -> np.ndarray:
+        encoded_input = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=max_length, return_tensors='pt'
+        ).to(self.device)
+        return self._forward(dict(encoded_input))
+
+    def embed_encoded(self, encoded_input: Dict[str, np.ndarray]) -> np.ndarray:
+        tensors = {name: torch.from_numpy(np.asarray(value)).to(self.device) for name, value in encoded_input.items()}
+        return self._forward(tensors)
+
+    @property
+    def model_id(self) -> str:
+        # bf16/fp16 연산 결과는 fp32와 조금 다르므로 캐시를 분리
+        suffix = "" if self.dtype == torch.float32 else f"-{str(self.dtype).replace('torch.', '')}"
+        return f"{self.model_name}:{self.name}{suffix}"
+
+    def describe(self) -> Dict[str, Any]:
+        info = super().describe()
+        info.update({
+            "dtype": str(self.dtype).replace("torch.", ""),
+            "inference_mode": self.inference_mode,
+            "compiled": self.compiled,
+            "intra_op_threads": torch.get_num_threads(),
+            "inter_op_threads": torch.get_num_interop_threads(),
+        })
+        return info
+
+
+def create_torch_backend(model_name: str, tokenizer, model: Optional[torch.nn.Module] = None) -> TorchEmbeddingBackend:
+    """config의 torch 런타임 설정(스레드, inference mode, dtype, torch.compile)을 적용한 torch 백엔드를 생성합니다."""
+    configure_torch_threads(config.EMBEDDING_INTRA_OP_THREADS, config.EMBEDDING_INTER_OP_THREADS)
+    return TorchEmbeddingBackend(
+        model_name, tokenizer, model=model,
+        inference_mode=config.EMBEDDING_TORCH_INFERENCE_MODE,
+        dtype=config.EMBEDDING_TORCH_DTYPE,
+        compile_model=config.EMBEDDING_TORCH_COMPILE
+    )
+
+
+class OnnxEmbeddingBackend(EmbeddingBackend):
+    name = "onnx"
+
+    def __init__(self, onnx_path: str, tokenizer, intra_op_threads: int = 0, inter_op_threads: int = 0,
+                 model_name: str = "", quantized: bool = False):
+        import onnxruntime as ort  # 선택적 의존성
+
+        super().__init__(tokenizer, model_name)
+        self.onnx_path = onnx_path
+        self.quantized = quantized
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads > 0:
+            options.intra_op_num_threads = intra_op_threads
+        if inter_op_threads > 0:
+            options.inter_op_num_threads = inter_op_threads
+        self.session = ort.InferenceSession(onnx_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+
+    def embed_encoded(self, encoded_input: Dict[str, np.ndarray]) -> np.ndarray:
+        feeds = {name: encoded_input[name].astype(np.int64) for name in self.input_names if name in encoded_input}
+        token_embeddings = self.session.run(None, feeds)[0]
+        return mean_pooling_numpy(token_embeddings, encoded_input['attention_mask'])
+
+    @property
+    def model_id(self) -> str:
+        return f"{self.model_name}:{self.name}{'-int8' if self.quantized else ''}"
+
+    def describe(self) -> Dict[str, Any]:
+        info = super().describe()
+        info.update({
+            "onnx_path": self.onnx_path,
+            "intra_op_threads": self.intra_op_threads,
+            "inter_op_threads": self.inter_op_threads,
+        })
+        return info
+
+
+# --- ONNX Export ---
+class _LastHiddenStateWrapper(torch.nn.Module):
+    """ONNX 내보내기를 위해 모델 출력에서 last_hidden_state만 반환합니다."""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask, token_type_ids):
+        return self.model(
+            input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids
+        )[0]
+
+
+def get_onnx_model_paths(model_name: str, onnx_dir: Optional[str] = None) -> Dict[str, str]:
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name.strip("/"))
+    model_dir = os.path.join(onnx_dir or config.EMBEDDING_ONNX_DIR, safe_name)
+    return {
+        "dir": model_dir,
+        "fp32": os.path.join(model_dir, "model.onnx"),
+        "int8": os.path.join(model_dir, "model.int8.onnx"),
+    }
+
+
+def export_onnx_model(model: torch.nn.Module, tokenizer, output_path: str):
+    """PyTorch 모델을 배치/시퀀스 길이가 가변인 ONNX 모델로 내보냅니다."""
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    sample = tokenizer(PARITY_SAMPLE_TEXTS[:2], padding=True, return_tensors='pt')
+    if "token_type_ids" not in sample:
+        sample["token_type_ids"] = torch.zeros_like(sample["input_ids"])
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in ("input_ids", "attention_mask", "token_type_ids")}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+    # 내보내기 후 원래 학습 모드로 복원되므로 래퍼도 eval 모드로 둠 (dropout 비활성화)
+    export_args = (
+        _LastHiddenStateWrapper(model.cpu()).eval(),
+        (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+        output_path,
+    )
+    export_kwargs = dict(
+        input_names=["input_ids", "attention_mask", "token_type_ids"],
+        output_names=["last_hidden_state"],
+        dynamic_axes=dynamic_axes,
+        opset_version=17,
+    )
+    print(f"Exporting embedding model to ONNX: {output_path}")
+    with torch.no_grad():
+        try:
+            torch.onnx.export(*export_args, dynamo=False, **export_kwargs)
+        except TypeError:
+            # dynamo 인자가 없는 이전 버전의 torch
+            torch.onnx.export(*export_args, **export_kwargs)
+    model.eval()
+
+
+def quantize_onnx_model(input_path: str, output_path: str):
+    """ONNX Runtime 동적 int8 양자화 (가중치 int8, 활성값은 실행 시 양자화)."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    print(f"Quantizing ONNX model to int8: {output_path}")
+    quantize_dynamic(input_path, output_path, weight_type=QuantType.QInt8)
+
+
+# --- Parity ---
+def check_backend_parity(reference: EmbeddingBackend, candidate: EmbeddingBackend,
+                         texts: Optional[List[str]] = None, min_cosine: float = 0.99) -> Dict[str, Any]:
+    """두 백엔드의 임베딩 코사인 유사도를 비교합니다 (모든 문장이 min_cosine 이상이면 통과)."""
+    texts = texts or PARITY_SAMPLE_TEXTS
+    expected = reference.embed(texts)
+    actual = candidate.embed(texts)
+    cosines = (expected * actual).sum(axis=1) / (
+        np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1) + 1e-12
+    )
+    return {
+        "reference": reference.name,
+        "candidate": candidate.name,
+        "min_cosine": float(cosines.min()),
+        "mean_cosine": float(cosines.mean()),
+        "threshold": min_cosine,
+        "passed": bool(cosines.min() >= min_cosine),
+    }
+
+
+def load_onnx_backend(model_name: str, tokenizer, quantize: bool = False,
+                      torch_backend: Optional[TorchEmbeddingBackend] = None) -> OnnxEmbeddingBackend:
+    """
+    ONNX 백엔드를 생성합니다. 변환된 모델이 없으면 내보내기(및 양자화) 후 torch 출력과 패리티를 검사합니다.
+
+    Raises:
+        ImportError: onnxruntime이 설치되지 않은 경우
+        RuntimeError: 새로 변환한 모델이 패리티 검사를 통과하지 못한 경우
+    """
+    import onnxruntime  # noqa: F401  설치 여부를 먼저 확인
+
+    paths = get_onnx_model_paths(model_name)
+    onnx_path = paths["int8"] if quantize else paths["fp32"]
+    newly_built = False
+    if not os.path.exists(paths["fp32"]):
+        torch_backend = torch_backend or TorchEmbeddingBackend(model_name, tokenizer)
+        export_onnx_model(torch_backend.model, tokenizer, paths["fp32"])
+        torch_backend.model.to(torch_backend.device)
+        newly_built = True
+    if quantize and not os.path.exists(paths["int8"]):
+        quantize_onnx_model(paths["fp32"], paths["int8"])
+        newly_built = True
+
+    backend = OnnxEmbeddingBackend(
+        onnx_path, tokenizer,
+        intra_op_threads=config.EMBEDDING_INTRA_OP_THREADS,
+        inter_op_threads=config.EMBEDDING_INTER_OP_THREADS,
+        model_name=model_name,
+        quantized=quantize
+    )
+    if newly_built or config.EMBEDDING_PARITY_CHECK_ON_LOAD:
+        torch_backend = torch_backend or TorchEmbeddingBackend(model_name, tokenizer)
+        parity = check_backend_parity(torch_backend, backend, min_cosine=config.EMBEDDING_PARITY_MIN_COSINE)
+        print(f"Embedding backend parity (onnx{' int8' if quantize else ''} vs torch): {parity}")
+        if not parity["passed"]:
+            if newly_built and os.path.exists(onnx_path):
+                os.remove(onnx_path)  # 다음 실행에서 다시 변환하도록 삭제
+            raise RuntimeError(f"ONNX embedding parity check failed (min cosine {parity['min_cosine']:.4f}).")
+    return backend
+
+
+def create_embedding_backend(model_name: str, tokenizer=None) -> EmbeddingBackend:
+    """config.EMBEDDING_BACKEND ("torch" | "onnx")에 따라 임베딩 백엔드를 생성합니다."""
+    tokenizer = tokenizer or load_tokenizer(model_name)
+    backend_name = config.EMBEDDING_BACKEND.lower()
+    if backend_name == "onnx":
+        try:
+            return load_onnx_backend(model_name, tokenizer, quantize=config.EMBEDDING_ONNX_QUANTIZE)
+        except ImportError:
+            print("Warning: onnxruntime is not installed. Falling back to torch embedding backend.")
+        except Exception as e:
+            print(f"Warning: Could not load ONNX embedding backend ({e}). Falling back to torch embedding backend.")
+    elif backend_name != "torch":
+        print(f"Warning: Unknown EMBEDDING_BACKEND '{config.EMBEDDING_BACKEND}'. Using torch embedding backend.")
+    return create_torch_backend(model_name, tokenizer)
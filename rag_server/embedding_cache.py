@@ -0,0 +1,192 @@
+# embedding_cache.py
+"""
+임베딩 결과 캐시
+
+(모델 식별자, 텍스트 해시)를 키로 임베딩 벡터를 재사용하여 같은 문자열에 대한 BERT forward pass를 생략합니다.
+- 메모리: 크기 제한 LRU (float32, float16 또는 스칼라 int8 양자화로 저장)
+- 디스크(선택): SQLite 파일에 float32, float16 또는 int8 바이트(BLOB)로 압축 저장, 재시작 후에도 재사용
+조회 결과는 저장 형식과 관계없이 읽기 전용 float32 배열입니다.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+import vector_utils
+
+SUPPORTED_DTYPES = vector_utils.STORAGE_DTYPES
+
+
+class EmbeddingCache:
+    """모델별 텍스트 -> 임베딩 벡터 캐시. 반환되는 벡터는 읽기 전용 float32 배열입니다."""
+
+    def __init__(self, model_id: str, max_entries: int, db_path: Optional[str] = None, dtype: str = "float32",
+                 memory_dtype: str = "float32"):
+        if dtype not in SUPPORTED_DTYPES:
+            print(f"Warning: Unsupported embedding cache dtype '{dtype}'. Using float32.")
+            dtype = "float32"
+        if memory_dtype not in SUPPORTED_DTYPES:
+            print(f"Warning: Unsupported embedding cache memory dtype '{memory_dtype}'. Using float32.")
+            memory_dtype = "float32"
+        self.model_id = model_id
+        self.max_entries = max(1, max_entries)
+        self.dtype = dtype
+        self.memory_dtype = memory_dtype
+        self.db_path = db_path
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()  # 키 -> memory_dtype으로 압축된 벡터
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings ("
+                    "key TEXT PRIMARY KEY, model_id TEXT NOT NULL, dim INTEGER NOT NULL, "
+                    "dtype TEXT NOT NULL, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+                )
+
+    def make_key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_id}\0{text}".encode("utf-8")).hexdigest()
+
+    # --- public API ---
+    def get(self, text: str) -> Optional[np.ndarray]:
+        return self.get_many([text])[0]
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        keys = [self.make_key(text) for text in texts]
+        results: List[Optional[np.ndarray]] = [None] * len(texts)
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                stored = self._entries.get(key)
+                if stored is not None:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    results[i] = vector_utils.decode_vector(stored, self.memory_dtype)
+                else:
+                    missing.append(i)
+
+        if missing and self._conn is not None:
+            disk_vectors = self._read_disk([keys[i] for i in missing])
+            still_missing = []
+            with self._lock:
+                for i in missing:
+                    vector = disk_vectors.get(keys[i])
+                    if vector is None:
+                        still_missing.append(i)
+                        continue
+                    self._store_in_memory(keys[i], vector_utils.encode_vector(vector, self.memory_dtype))
+                    self._hits += 1
+                    self._disk_hits += 1
+                    results[i] = vector
+            missing = still_missing
+
+        with self._lock:
+            self._misses += len(missing)
+        return results
+
+    def set(self, text: str, vector: np.ndarray) -> None:
+        self.set_many([text], [vector])
+
+    def set_many(self, texts: List[str], vectors: List[np.ndarray]) -> None:
+        rows = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                if vector is None:
+                    continue
+                key = self.make_key(text)
+                vector = vector_utils.as_query_vector(vector)
+                self._store_in_memory(key, vector_utils.encode_vector(vector, self.memory_dtype))
+                rows.append((key, vector))
+        if rows and self._conn is not None:
+            self._write_disk(rows)
+
+    def clear(self) -> int:
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._memory_bytes = 0
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute("DELETE FROM embeddings WHERE model_id = ?", (self.model_id,))
+        print(f"Embedding cache cleared ({count} in-memory entries).")
+        return count
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            disk_entries = None
+            if self._conn is not None:
+                disk_entries = self._conn.execute(
+                    "SELECT COUNT(*) FROM embeddings WHERE model_id = ?", (self.model_id,)
+                ).fetchone()[0]
+            return {
+                "model_id": self.model_id,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "memory_dtype": self.memory_dtype,
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": disk_entries,
+                "disk_dtype": self.dtype if self._conn is not None else None,
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
+
+    # --- internals ---
+    def _store_in_memory(self, key: str, stored):
+        previous = self._entries.get(key)
+        if previous is not None:
+            self._memory_bytes -= vector_utils.stored_nbytes(previous)
+        self._entries[key] = stored
+        self._entries.move_to_end(key)
+        self._memory_bytes += vector_utils.stored_nbytes(stored)
+        while len(self._entries) > self.max_entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._memory_bytes -= vector_utils.stored_nbytes(evicted)
+
+    def _read_disk(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        vectors = {}
+        try:
+            with self._lock:
+                rows = []
+                for start in range(0, len(keys), 500):  # SQLite 변수 개수 제한
+                    chunk = keys[start:start + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows.extend(self._conn.execute(
+                        f"SELECT key, dtype, vector FROM embeddings WHERE model_id = ? AND key IN ({placeholders})",
+                        [self.model_id, *chunk]
+                    ).fetchall())
+            for key, dtype, blob in rows:
+                vectors[key] = vector_utils.decode_vector(blob, dtype if dtype in SUPPORTED_DTYPES else "float32")
+        except sqlite3.Error as e:
+            print(f"Warning: Could not read embedding cache: {e}")
+        return vectors
+
+    def _write_disk(self, rows: List[tuple]):
+        now = time.time()
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, model_id, dim, dtype, vector, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (key, self.model_id, vector.shape[0], self.dtype,
+                         vector_utils.encode_vector_bytes(vector, self.dtype), now)
+                        for key, vector in rows
+                    ]
+                )
+        except sqlite3.Error as e:
+            print(f"Warning: Could not write embedding cache: {e}")
@@ -0,0 +1,178 @@
+# embedding_registry.py
+"""
+컬렉션별 임베딩 모델 레지스트리
+
+config.COLLECTION_FIELD_MAPPINGS의 각 컬렉션을 자신의 임베딩 모델("embedding_model")과 벡터 차원("vector_dim")에 묶습니다.
+- 기본 모델(config.EMBEDDING_MODEL_NAME)은 utils의 기존 경로(마이크로 배처, 임베딩 서버, 워밍업)를 그대로 사용합니다.
+- 그 외 모델은 처음 사용할 때 불러오며, 여러 컬렉션이 같은 모델을 쓰면 한 번만 불러와 공유합니다.
+- 검색 쿼리는 서로 다른 모델마다 한 번씩만 임베딩합니다.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+import config
+from embedding_cache import EmbeddingCache
+
+
+def encode_texts(encode_fn: Callable[[List[str]], np.ndarray], texts: List[str],
+                 cache: Optional[EmbeddingCache] = None, batch_size: Optional[int] = None,
+                 check_cache: bool = True) -> List[Optional[np.ndarray]]:
+    """
+    텍스트를 길이순으로 정렬해 batch_size 단위로 인코딩합니다 (짧은 문장이 긴 문장 길이만큼 패딩되지 않도록).
+    캐시에 있는 텍스트는 forward pass 없이 반환하고(check_cache=False이면 조회 생략), 새 벡터는 캐시에 저장합니다.
+    결과는 입력 순서이며 실패한 텍스트는 None입니다.
+    """
+    batch_size = max(1, batch_size or config.EMBEDDING_BATCH_SIZE)
+    texts = [text or "" for text in texts]
+    results: List[Optional[np.ndarray]] = (
+        cache.get_many(texts) if cache is not None and check_cache else [None] * len(texts)
+    )
+    pending = [i for i, result in enumerate(results) if result is None]
+
+    order = sorted(pending, key=lambda i: len(texts[i]))
+    for start in range(0, len(order), batch_size):
+        bucket = order[start:start + batch_size]
+        try:
+            embeddings = encode_fn([texts[i] for i in bucket])
+            for i, embedding in zip(bucket, embeddings):
+                results[i] = embedding
+            if cache is not None:
+                cache.set_many([texts[i] for i in bucket], list(embeddings))
+        except Exception as e:
+            print(f"Error generating embeddings for a batch of {len(bucket)} texts: {e}")
+    return results
+
+
+class EmbeddingModel:
+    """레지스트리가 직접 불러오는 임베딩 모델 (토크나이저, 백엔드, 캐시). 처음 embed할 때 로딩합니다."""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.tokenizer = None
+        self.backend = None
+        self.cache: Optional[EmbeddingCache] = None
+        self.state = "not_loaded"
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self._load_lock = threading.Lock()
+        self._encode_lock = threading.Lock()  # 같은 모델을 여러 스레드가 동시에 실행하지 않도록
+
+    def load(self):
+        if self.backend is not None:
+            return
+        with self._load_lock:
+            if self.backend is not None:
+                return
+            print(f"Loading embedding model '{self.model_name}'...")
+            self.state = "loading"
+            start = time.time()
+            try:
+                import embedding_backends  # torch/transformers는 필요할 때 불러옴
+
+                tokenizer = embedding_backends.load_tokenizer(self.model_name)
+                backend = embedding_backends.create_embedding_backend(self.model_name, tokenizer)
+                if config.EMBEDDING_CACHE_ENABLED:
+                    self.cache = EmbeddingCache(
+                        model_id=backend.model_id,
+                        max_entries=config.EMBEDDING_CACHE_MAX_ENTRIES,
+                        db_path=config.EMBEDDING_CACHE_DB_PATH if config.EMBEDDING_CACHE_DISK_ENABLED else None,
+                        dtype=config.EMBEDDING_CACHE_DTYPE,
+                        memory_dtype=config.EMBEDDING_CACHE_MEMORY_DTYPE
+                    )
+                self.tokenizer = tokenizer
+                self.backend = backend
+            except Exception as e:
+                self.state, self.error = "failed", str(e)
+                print(f"Error loading embedding model '{self.model_name}': {e}")
+                raise RuntimeError(f"Could not load embedding model '{self.model_name}': {e}")
+            self.state, self.error = "ready", None
+            self.load_seconds = round(time.time() - start, 2)
+            print(f"Embedding model '{self.model_name}' loaded in {self.load_seconds}s: {backend.describe()}")
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        with self._encode_lock:
+            return self.backend.embed(texts, max_length=512)
+
+    def embed(self, texts: List[str], batch_size: Optional[int] = None) -> List[Optional[np.ndarray]]:
+        if not texts:
+            return []
+        try:
+            self.load()
+        except RuntimeError:
+            return [None] * len(texts)
+        return encode_texts(self._encode_batch, texts, cache=self.cache, batch_size=batch_size)
+
+    def dimension(self) -> int:
+        vector = self.embed(["차원 확인"])[0]
+        if vector is None:
+            raise RuntimeError(f"Could not determine the vector dimension of '{self.model_name}'.")
+        return int(vector.shape[-1])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "error": self.error,
+            "load_seconds": self.load_seconds,
+            "backend": self.backend.describe() if self.backend is not None else None,
+            "cache": self.cache.stats() if self.cache is not None else None,
+        }
+
+
+class EmbeddingModelRegistry:
+    """컬렉션 -> 임베딩 모델 바인딩과 (기본 모델이 아닌) 모델 인스턴스를 관리합니다."""
+
+    def __init__(self, default_model_name: str, default_vector_dim: int,
+                 collection_mappings: Dict[str, Dict[str, Any]]):
+        self.default_model_name = default_model_name
+        self.default_vector_dim = default_vector_dim
+        self.collection_mappings = collection_mappings
+        self._models: Dict[str, EmbeddingModel] = {}
+        self._lock = threading.Lock()
+
+    def model_for_collection(self, collection_name: str) -> str:
+        mapping = self.collection_mappings.get(collection_name) or {}
+        return mapping.get("embedding_model") or self.default_model_name
+
+    def configured_vector_dim(self, collection_name: str) -> Optional[int]:
+        """설정된 벡터 차원 (설정이 없으면 기본 모델은 config.VECTOR_DIM, 그 외 모델은 None)."""
+        mapping = self.collection_mappings.get(collection_name) or {}
+        if mapping.get("vector_dim"):
+            return int(mapping["vector_dim"])
+        return self.default_vector_dim if self.is_default(self.model_for_collection(collection_name)) else None
+
+    def vector_dim_for_collection(self, collection_name: str) -> int:
+        """컬렉션의 벡터 차원. 설정되지 않은 경우 모델을 불러와 출력 차원을 확인합니다."""
+        dim = self.configured_vector_dim(collection_name)
+        return dim if dim is not None else self.get_model(self.model_for_collection(collection_name)).dimension()
+
+    def is_default(self, model_name: str) -> bool:
+        return model_name == self.default_model_name
+
+    def group_collections_by_model(self, collection_names: List[str]) -> Dict[str, List[str]]:
+        """모델 이름 -> 그 모델을 쓰는 컬렉션 목록 (쿼리를 모델마다 한 번씩만 임베딩하기 위해)."""
+        groups: Dict[str, List[str]] = {}
+        for collection_name in collection_names:
+            groups.setdefault(self.model_for_collection(collection_name), []).append(collection_name)
+        return groups
+
+    def get_model(self, model_name: str) -> EmbeddingModel:
+        """기본 모델이 아닌 모델을 반환합니다 (처음 요청될 때 생성, 같은 이름이면 같은 인스턴스를 공유)."""
+        with self._lock:
+            model = self._models.get(model_name)
+            if model is None:
+                model = EmbeddingModel(model_name)
+                self._models[model_name] = model
+            return model
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            models = dict(self._models)
+        return {
+            "default_model": self.default_model_name,
+            "bindings": {name: self.model_for_collection(name) for name in self.collection_mappings},
+            "models": {name: model.stats() for name, model in models.items()},
+        }
@@ -0,0 +1,256 @@
+"""
+로컬 임베딩 서버 (멀티 워커 배포용)
+
+uvicorn을 여러 워커로 실행하면 워커마다 klue/bert-base와 torch 스레드 풀을 따로 올리게 됩니다.
+이 서버 프로세스 하나가 모델을 소유하고, API 워커들은 Unix 소켓으로 임베딩을 요청합니다.
+여러 워커에서 동시에 들어온 요청은 마이크로 배처로 묶여 한 번의 forward pass로 처리됩니다.
+
+실행:
+    python embedding_server.py                 # config.EMBEDDING_SERVER_SOCKET 에서 대기
+    EMBEDDING_SERVER_ENABLED=true uvicorn main:app --workers 4
+
+프로토콜 (요청/응답 동일한 프레임):
+    [헤더 길이 4바이트][페이로드 길이 4바이트][헤더 JSON][페이로드 바이트]
+    요청 헤더: {"op": "embed", "texts": [...], "long_text_pooling": (선택) "mean" | "token_count", "model": (선택) 모델 이름}
+              또는 {"op": "status"}
+    embed 응답: 헤더 {"dim": D, "count": N, "failed": [실패한 인덱스]}, 페이로드 float32 [N, D] (실패한 행은 0)
+"""
+
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import config
+
+_FRAME_HEADER = struct.Struct(">II")
+
+
+# --- Framing ---
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    remaining = size
+    while remaining > 0:
+        chunk = sock.recv(min(remaining, 1 << 20))
+        if not chunk:
+            raise ConnectionError("Embedding server connection closed.")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def send_message(sock: socket.socket, header: Dict[str, Any], payload: bytes = b"") -> None:
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    sock.sendall(_FRAME_HEADER.pack(len(header_bytes), len(payload)) + header_bytes + payload)
+
+
+def recv_message(sock: socket.socket) -> Tuple[Dict[str, Any], bytes]:
+    header_len, payload_len = _FRAME_HEADER.unpack(_recv_exact(sock, _FRAME_HEADER.size))
+    header = json.loads(_recv_exact(sock, header_len).decode("utf-8"))
+    payload = _recv_exact(sock, payload_len) if payload_len else b""
+    return header, payload
+
+
+# --- Client ---
+class EmbeddingClient:
+    """
+    임베딩 서버 클라이언트. 스레드마다 연결을 하나씩 유지하고, 연결이 끊기면 한 번 다시 연결합니다.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 30.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+            self._local.sock = None
+
+    def _request(self, header: Dict[str, Any]) -> Tuple[Dict[str, Any], bytes]:
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                send_message(sock, header)
+                return recv_message(sock)
+            except (ConnectionError, OSError):
+                self._close()
+                if attempt == 1:
+                    raise
+        raise ConnectionError("unreachable")
+
+    def embed(self, texts: List[str], long_text_pooling: Optional[str] = None,
+              model: Optional[str] = None) -> List[Optional[np.ndarray]]:
+        """
+        long_text_pooling이 주어지면 512 토큰을 넘는 텍스트도 윈도우로 나누어 임베딩합니다 ("mean" | "token_count").
+        model이 주어지면 기본 모델 대신 해당 모델(컬렉션별 임베딩 모델)로 임베딩합니다.
+
+        Raises:
+            ConnectionError / OSError: 서버에 연결할 수 없는 경우
+            RuntimeError: 서버가 오류를 반환한 경우
+        """
+        if not texts:
+            return []
+        request = {"op": "embed", "texts": texts}
+        if long_text_pooling:
+            request["long_text_pooling"] = long_text_pooling
+        if model:
+            request["model"] = model
+        response, payload = self._request(request)
+        if response.get("error"):
+            raise RuntimeError(f"Embedding server error: {response['error']}")
+        vectors = np.frombuffer(payload, dtype=np.float32).reshape(response["count"], response["dim"])
+        failed = set(response.get("failed", []))
+        return [None if i in failed else vectors[i] for i in range(len(texts))]
+
+    def status(self) -> Dict[str, Any]:
+        response, _ = self._request({"op": "status"})
+        return response
+
+    def wait_until_ready(self, timeout: Optional[float] = None, poll_interval: float = 0.5) -> Dict[str, Any]:
+        """서버가 모델을 준비할 때까지 기다립니다. 시간 안에 준비되지 않으면 TimeoutError."""
+        deadline = time.time() + timeout if timeout is not None else None
+        last_error = None
+        while True:
+            try:
+                status = self.status()
+                if status.get("ready"):
+                    return status
+                last_error = status.get("error") or status.get("state")
+            except (ConnectionError, OSError) as e:
+                last_error = e
+            if deadline is not None and time.time() > deadline:
+                raise TimeoutError(f"Embedding server at {self.socket_path} not ready: {last_error}")
+            time.sleep(poll_interval)
+
+
+# --- Server ---
+class _EmbeddingRequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        server: "EmbeddingServer" = self.server
+        while True:
+            try:
+                header, _ = recv_message(self.request)
+            except (ConnectionError, OSError, ValueError):
+                return  # 클라이언트 연결 종료
+            try:
+                if header.get("op") == "status":
+                    send_message(self.request, server.status())
+                elif header.get("op") == "embed":
+                    response, payload = server.embed(
+                        header.get("texts") or [], header.get("long_text_pooling"), header.get("model")
+                    )
+                    send_message(self.request, response, payload)
+                else:
+                    send_message(self.request, {"error": f"unknown op '{header.get('op')}'"})
+            except (ConnectionError, OSError):
+                return
+            except Exception as e:
+                print(f"Embedding server request failed: {e}")
+                send_message(self.request, {"error": str(e)})
+
+
+class EmbeddingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """모델을 소유하고 Unix 소켓으로 배치 임베딩을 제공하는 서버."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, max_batch_requests: int, max_wait_ms: float):
+        import utils  # 서버 프로세스에서만 모델 관련 모듈을 불러옴
+        from micro_batcher import MicroBatcher
+
+        self.utils = utils
+        config.EMBEDDING_SERVER_ENABLED = False  # 서버 프로세스 자신은 항상 로컬 모델을 사용
+        if os.path.exists(socket_path):
+            os.remove(socket_path)  # 이전 실행에서 남은 소켓 파일
+        os.makedirs(os.path.dirname(os.path.abspath(socket_path)), exist_ok=True)
+        super().__init__(socket_path, _EmbeddingRequestHandler)
+        os.chmod(socket_path, 0o660)
+        self.socket_path = socket_path
+        # 여러 워커에서 동시에 들어온 요청(텍스트 목록)을 모아 한 번에 인코딩
+        self.batcher = MicroBatcher("embedding-server", self._embed_request_batch,
+                                    max_batch_size=max_batch_requests, max_wait_ms=max_wait_ms)
+        self.started_at = time.time()
+
+    def _embed_request_batch(self, requests: List[List[str]]) -> List[List[Optional[np.ndarray]]]:
+        flat_texts = [text for texts in requests for text in texts]
+        vectors = self.utils.get_embeddings_local(flat_texts)
+        results, offset = [], 0
+        for texts in requests:
+            results.append(vectors[offset:offset + len(texts)])
+            offset += len(texts)
+        return results
+
+    def embed(self, texts: List[str], long_text_pooling: Optional[str] = None,
+              model: Optional[str] = None) -> Tuple[Dict[str, Any], bytes]:
+        if model and not self.utils.embedding_registry.is_default(model):
+            # 컬렉션별 임베딩 모델: 서버 프로세스의 레지스트리에서 불러와 공유
+            vectors = self.utils.get_embeddings_for_model(list(texts), model) if texts else []
+        elif long_text_pooling:
+            # 긴 텍스트는 요청 안에서 이미 윈도우 단위로 배치 처리됨
+            vectors = self.utils.get_long_text_embeddings_local(list(texts), long_text_pooling) if texts else []
+        else:
+            vectors = self.batcher(list(texts)) if texts else []
+        dim = next((vector.shape[-1] for vector in vectors if vector is not None), config.VECTOR_DIM)
+        matrix = np.zeros((len(texts), dim), dtype=np.float32)
+        failed = []
+        for i, vector in enumerate(vectors):
+            if vector is None:
+                failed.append(i)
+            else:
+                matrix[i] = vector.reshape(-1)
+        return {"dim": dim, "count": len(texts), "failed": failed}, np.ascontiguousarray(matrix).tobytes()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            **self.utils.get_model_status(),
+            "mode": "server",
+            "socket": self.socket_path,
+            "pid": os.getpid(),
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "embedding": self.utils.get_embedding_stats(),
+            "batcher": self.batcher.stats(),
+        }
+
+
+def main():
+    import utils
+
+    server = EmbeddingServer(
+        config.EMBEDDING_SERVER_SOCKET,
+        max_batch_requests=config.EMBEDDING_SERVER_MAX_BATCH_REQUESTS,
+        max_wait_ms=config.EMBEDDING_MICROBATCH_MAX_WAIT_MS
+    )
+    utils.start_model_warmup()  # 요청은 바로 받고, 모델이 준비될 때까지 status에 ready=False로 응답
+    print(f"Embedding server listening on {config.EMBEDDING_SERVER_SOCKET} (pid {os.getpid()}).")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Embedding server stopped.")
+    finally:
+        server.server_close()
+        if os.path.exists(config.EMBEDDING_SERVER_SOCKET):
+            os.remove(config.EMBEDDING_SERVER_SOCKET)
+
+
+if __name__ == "__main__":
+    main()
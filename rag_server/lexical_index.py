@@ -0,0 +1,364 @@
+# lexical_index.py
+"""
+청크 텍스트(text / chunk_text)에 대한 BM25 역색인
+
+"4Q24", "짐펜트라", "OPM" 같은 정확한 토큰은 평균 풀링 벡터가 놓치기 쉬우므로 벡터 검색과 함께 사용합니다.
+- 토큰화: kiwipiepy 형태소 분석 (조사/어미/문장부호 제외, 붙어 있는 영문/숫자 조각은 "4q24"처럼 하나로 합침)
+- 저장: 컬렉션마다 추가 전용(append-only) 세그먼트 디렉터리. 세그먼트는 CSR 형태의 numpy 배열
+    term_hashes.npy  (uint64, 정렬된 용어 해시)     offsets.npy   (int64, 용어별 포스팅 시작 위치, V+1)
+    post_docs.npy    (uint32, 세그먼트 내 문서 번호) post_tfs.npy  (uint16, 용어 빈도)
+    doc_ids.npy      (int64, Milvus primary key)    doc_lens.npy  (uint32, 문서 토큰 수)
+  용어 문자열 대신 64비트 해시를 정렬해 저장하므로 조회는 np.searchsorted 한 번이며, 서비스 시에는
+  모든 배열을 memory-map으로 열어 프로세스 메모리에 올리지 않습니다.
+- 색인 생성: 데이터 적재(rebuild_milvus_collections) 시 삽입한 묶음마다 세그먼트를 추가하고,
+  세그먼트가 많아지면 토큰화를 다시 하지 않고 포스팅 배열만 병합합니다.
+
+사용 예 (기존 컬렉션 색인 생성):
+    python lexical_index.py --collection news_embeddings
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import config
+
+MANIFEST_NAME = "manifest.json"
+SEGMENT_ARRAYS = ("term_hashes", "offsets", "post_docs", "post_tfs", "doc_ids", "doc_lens")
+# 검색에 쓰지 않는 품사 (조사, 어미, 접사 일부, 문장부호/기호)
+SKIP_TAG_PREFIXES = ("J", "E", "XSV", "XSA", "SF", "SP", "SS", "SE", "SO", "SW", "UN")
+# 붙어 있으면 하나의 토큰으로 합치는 품사 (영문, 숫자, 한자)
+ALNUM_TAGS = ("SL", "SN", "SH")
+MAX_TF = np.iinfo(np.uint16).max
+
+
+# --- Tokenizer ---
+_kiwi = None
+_kiwi_lock = threading.Lock()
+
+def _get_kiwi():
+    global _kiwi
+    with _kiwi_lock:
+        if _kiwi is None:
+            from kiwipiepy import Kiwi  # 선택적 의존성 (하이브리드 검색에만 필요)
+            _kiwi = Kiwi()
+        return _kiwi
+
+def _terms_from_tokens(tokens) -> List[str]:
+    terms: List[str] = []
+    prev_end = None
+    merging = False
+    for token in tokens:
+        tag = token.tag
+        if tag.startswith(SKIP_TAG_PREFIXES):
+            prev_end, merging = None, False
+            continue
+        form = token.form.lower()
+        is_alnum = tag in ALNUM_TAGS
+        if is_alnum and merging and token.start == prev_end:
+            terms[-1] += form  # "4" "Q" "24" -> "4q24"
+        else:
+            terms.append(form)
+        prev_end, merging = token.start + token.len, is_alnum
+    return terms
+
+def tokenize(text: str) -> List[str]:
+    """BM25 색인/검색용 용어 목록."""
+    if not text:
+        return []
+    kiwi = _get_kiwi()
+    with _kiwi_lock:
+        return _terms_from_tokens(kiwi.tokenize(text))
+
+def tokenize_many(texts: Sequence[str]) -> List[List[str]]:
+    """여러 텍스트를 한 번에 토큰화합니다 (적재 시)."""
+    kiwi = _get_kiwi()
+    with _kiwi_lock:
+        return [_terms_from_tokens(tokens) for tokens in kiwi.tokenize([text or "" for text in texts])]
+
+def term_hash(term: str) -> int:
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+# --- Segment files ---
+def _collection_dir(collection_name: str, index_dir: Optional[str] = None) -> str:
+    return os.path.join(index_dir or config.LEXICAL_INDEX_DIR, collection_name)
+
+def _read_manifest(collection_dir: str) -> Dict[str, Any]:
+    try:
+        with open(os.path.join(collection_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"segments": [], "num_docs": 0, "total_len": 0, "version": "empty"}
+
+def _write_manifest(collection_dir: str, manifest: Dict[str, Any]):
+    manifest["version"] = f"{int(time.time())}-{uuid.uuid4().hex[:8]}"
+    tmp_path = os.path.join(collection_dir, MANIFEST_NAME + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, os.path.join(collection_dir, MANIFEST_NAME))
+
+def _build_segment_arrays(doc_ids: Sequence[int], doc_terms: Sequence[List[str]]) -> Dict[str, np.ndarray]:
+    """문서별 용어 목록으로 CSR 포스팅 배열을 만듭니다."""
+    postings: Dict[int, List[Tuple[int, int]]] = {}
+    doc_lens = np.zeros(len(doc_terms), dtype=np.uint32)
+    for doc_index, terms in enumerate(doc_terms):
+        doc_lens[doc_index] = len(terms)
+        for term, tf in Counter(terms).items():
+            postings.setdefault(term_hash(term), []).append((doc_index, min(tf, MAX_TF)))
+    return _postings_to_arrays(postings, np.asarray(doc_ids, dtype=np.int64), doc_lens)
+
+def _postings_to_arrays(postings: Dict[int, List[Tuple[int, int]]], doc_ids: np.ndarray,
+                        doc_lens: np.ndarray) -> Dict[str, np.ndarray]:
+    hashes = np.array(sorted(postings), dtype=np.uint64)
+    offsets = np.zeros(len(hashes) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(postings[int(h)]) for h in hashes])
+    post_docs = np.empty(int(offsets[-1]), dtype=np.uint32)
+    post_tfs = np.empty(int(offsets[-1]), dtype=np.uint16)
+    for i, h in enumerate(hashes):
+        entries = postings[int(h)]
+        post_docs[offsets[i]:offsets[i + 1]] = [doc for doc, _ in entries]
+        post_tfs[offsets[i]:offsets[i + 1]] = [tf for _, tf in entries]
+    return {"term_hashes": hashes, "offsets": offsets, "post_docs": post_docs, "post_tfs": post_tfs,
+            "doc_ids": doc_ids, "doc_lens": doc_lens}
+
+def _write_segment(collection_dir: str, arrays: Dict[str, np.ndarray]) -> str:
+    name = f"seg-{int(time.time() * 1000)}-{uuid.uuid4().hex[:6]}"
+    segment_dir = os.path.join(collection_dir, name)
+    os.makedirs(segment_dir)
+    for key in SEGMENT_ARRAYS:
+        np.save(os.path.join(segment_dir, f"{key}.npy"), arrays[key])
+    return name
+
+def _load_segment(collection_dir: str, name: str, mmap: bool = True) -> Dict[str, np.ndarray]:
+    segment_dir = os.path.join(collection_dir, name)
+    return {
+        key: np.load(os.path.join(segment_dir, f"{key}.npy"), mmap_mode="r" if mmap else None)
+        for key in SEGMENT_ARRAYS
+    }
+
+
+# --- Ingestion (쓰기) ---
+_write_lock = threading.Lock()
+
+def reset_index(collection_name: str, index_dir: Optional[str] = None):
+    """컬렉션을 삭제/재생성할 때 색인도 비웁니다."""
+    collection_dir = _collection_dir(collection_name, index_dir)
+    with _write_lock:
+        if os.path.isdir(collection_dir):
+            shutil.rmtree(collection_dir)
+        os.makedirs(collection_dir, exist_ok=True)
+        _write_manifest(collection_dir, {"segments": [], "num_docs": 0, "total_len": 0})
+    print(f"Lexical index for '{collection_name}' reset.")
+
+def add_documents(collection_name: str, doc_ids: Sequence[int], texts: Sequence[str],
+                  index_dir: Optional[str] = None) -> int:
+    """
+    삽입한 문서 묶음을 새 세그먼트로 추가합니다 (Milvus insert 직후 호출).
+    세그먼트 수가 LEXICAL_INDEX_MAX_SEGMENTS를 넘으면 병합합니다. 추가한 문서 수를 반환합니다.
+    """
+    if len(doc_ids) != len(texts):
+        raise ValueError("doc_ids and texts must have the same length.")
+    if not doc_ids:
+        return 0
+    start = time.time()
+    doc_terms = tokenize_many(texts)
+    arrays = _build_segment_arrays([int(doc_id) for doc_id in doc_ids], doc_terms)
+    collection_dir = _collection_dir(collection_name, index_dir)
+    with _write_lock:
+        os.makedirs(collection_dir, exist_ok=True)
+        manifest = _read_manifest(collection_dir)
+        manifest["segments"].append(_write_segment(collection_dir, arrays))
+        manifest["num_docs"] += len(doc_ids)
+        manifest["total_len"] += int(arrays["doc_lens"].sum())
+        if len(manifest["segments"]) > config.LEXICAL_INDEX_MAX_SEGMENTS:
+            _merge_segments(collection_dir, manifest)
+        _write_manifest(collection_dir, manifest)
+    print(f"Lexical index for '{collection_name}': added {len(doc_ids)} documents "
+          f"({len(arrays['term_hashes'])} terms) in {time.time() - start:.2f}s.")
+    return len(doc_ids)
+
+def _merge_segments(collection_dir: str, manifest: Dict[str, Any]):
+    """모든 세그먼트의 포스팅을 (다시 토큰화하지 않고) 하나의 세그먼트로 합칩니다."""
+    old_segments = list(manifest["segments"])
+    postings: Dict[int, List[Tuple[int, int]]] = {}
+    doc_ids, doc_lens = [], []
+    doc_base = 0
+    for name in old_segments:
+        segment = _load_segment(collection_dir, name, mmap=False)
+        offsets = segment["offsets"]
+        for i, h in enumerate(segment["term_hashes"].tolist()):
+            start, end = offsets[i], offsets[i + 1]
+            postings.setdefault(h, []).extend(
+                zip((segment["post_docs"][start:end].astype(np.int64) + doc_base).tolist(),
+                    segment["post_tfs"][start:end].tolist())
+            )
+        doc_ids.append(segment["doc_ids"])
+        doc_lens.append(segment["doc_lens"])
+        doc_base += len(segment["doc_ids"])
+    arrays = _postings_to_arrays(postings, np.concatenate(doc_ids), np.concatenate(doc_lens))
+    manifest["segments"] = [_write_segment(collection_dir, arrays)]
+    for name in old_segments:  # 열려 있는 memory-map은 파일이 지워져도 유효 (다음 검색에서 새 세그먼트를 엶)
+        shutil.rmtree(os.path.join(collection_dir, name), ignore_errors=True)
+    print(f"Merged {len(old_segments)} lexical index segments ({doc_base} documents).")
+
+
+# --- Serving (읽기) ---
+class LexicalIndex:
+    """한 컬렉션의 세그먼트들을 memory-map으로 열어 BM25로 검색합니다."""
+
+    def __init__(self, collection_name: str, index_dir: Optional[str] = None):
+        self.collection_name = collection_name
+        self.collection_dir = _collection_dir(collection_name, index_dir)
+        manifest = _read_manifest(self.collection_dir)
+        self.version = manifest["version"]
+        self.num_docs = int(manifest["num_docs"])
+        self.avg_doc_len = manifest["total_len"] / self.num_docs if self.num_docs else 0.0
+        self.segments = [_load_segment(self.collection_dir, name) for name in manifest["segments"]]
+
+    def is_current(self) -> bool:
+        return _read_manifest(self.collection_dir)["version"] == self.version
+
+    def search(self, terms: List[str], top_k: int, k1: Optional[float] = None,
+               b: Optional[float] = None) -> List[Tuple[int, float]]:
+        """BM25 점수 상위 top_k개의 (Milvus ID, 점수)를 점수순으로 반환합니다."""
+        if not terms or not self.num_docs or top_k <= 0:
+            return []
+        k1 = config.BM25_K1 if k1 is None else k1
+        b = config.BM25_B if b is None else b
+        query_hashes = np.array(sorted({term_hash(term) for term in terms}), dtype=np.uint64)
+
+        # 세그먼트별 포스팅 범위와 전체 문서 빈도(df)
+        ranges = []
+        df = np.zeros(len(query_hashes), dtype=np.int64)
+        for segment in self.segments:
+            hashes = segment["term_hashes"]
+            positions = np.searchsorted(hashes, query_hashes)
+            found = positions < len(hashes)
+            found[found] = hashes[positions[found]] == query_hashes[found]
+            starts = np.where(found, segment["offsets"][np.minimum(positions, len(hashes))], 0)
+            ends = np.where(found, segment["offsets"][np.minimum(positions + 1, len(hashes))], 0)
+            ranges.append((starts, ends))
+            df += ends - starts
+        idf = np.log1p((self.num_docs - df + 0.5) / (df + 0.5))
+
+        candidates: List[Tuple[float, int]] = []
+        for segment, (starts, ends) in zip(self.segments, ranges):
+            scores = None
+            for term_index in np.nonzero(ends > starts)[0]:
+                start, end = starts[term_index], ends[term_index]
+                docs = segment["post_docs"][start:end]
+                tfs = segment["post_tfs"][start:end].astype(np.float32)
+                norm = k1 * (1.0 - b + b * segment["doc_lens"][docs] / self.avg_doc_len)
+                if scores is None:
+                    scores = np.zeros(len(segment["doc_ids"]), dtype=np.float32)
+                scores[docs] += idf[term_index] * tfs * (k1 + 1.0) / (tfs + norm)
+            if scores is None:
+                continue
+            matched = np.nonzero(scores)[0]
+            if len(matched) > top_k:
+                matched = matched[np.argpartition(-scores[matched], top_k - 1)[:top_k]]
+            candidates.extend((float(scores[i]), int(segment["doc_ids"][i])) for i in matched)
+        candidates.sort(key=lambda item: -item[0])
+        return [(doc_id, score) for score, doc_id in candidates[:top_k]]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "num_docs": self.num_docs,
+            "segments": len(self.segments),
+            "avg_doc_len": round(self.avg_doc_len, 2),
+            "terms": sum(len(segment["term_hashes"]) for segment in self.segments),
+            "postings": sum(len(segment["post_docs"]) for segment in self.segments),
+        }
+
+
+class LexicalIndexRegistry:
+    """컬렉션 이름 -> LexicalIndex. 처음 사용할 때 열고, 적재로 manifest가 바뀌면 다시 엽니다."""
+
+    def __init__(self, index_dir: Optional[str] = None, check_interval_seconds: float = 5.0):
+        self.index_dir = index_dir
+        self.check_interval_seconds = check_interval_seconds
+        self._indexes: Dict[str, Tuple[Optional[LexicalIndex], float]] = {}  # -> (색인, 확인 시각)
+        self._lock = threading.Lock()
+
+    def get(self, collection_name: str) -> Optional[LexicalIndex]:
+        """색인이 없으면 None."""
+        now = time.time()
+        with self._lock:
+            index, checked_at = self._indexes.get(collection_name, (None, 0.0))
+            if now - checked_at < self.check_interval_seconds:
+                return index
+            if index is not None and index.is_current():
+                self._indexes[collection_name] = (index, now)
+                return index
+            manifest_path = os.path.join(_collection_dir(collection_name, self.index_dir), MANIFEST_NAME)
+            index = None
+            if os.path.exists(manifest_path):
+                try:
+                    index = LexicalIndex(collection_name, self.index_dir)
+                    print(f"Lexical index for '{collection_name}' opened: {index.stats()}")
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"Warning: Could not open lexical index for '{collection_name}': {e}")
+            self._indexes[collection_name] = (index, now)
+            return index
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            indexes = dict(self._indexes)
+        return {name: index.stats() if index is not None else None for name, (index, _) in indexes.items()}
+
+
+def build_from_milvus(collection_name: str, page_size: int = 1000) -> int:
+    """기존 Milvus 컬렉션의 텍스트를 읽어 색인을 새로 만듭니다 (page_size개씩 세그먼트 추가)."""
+    import utils
+
+    utils.ensure_milvus_connection()
+    text_field = config.COLLECTION_FIELD_MAPPINGS[collection_name]["text_field"]
+    handle = utils.collection_registry.get(collection_name)
+    if handle is None:
+        raise RuntimeError(f"Collection '{collection_name}' does not exist.")
+    collection = handle.collection
+    reset_index(collection_name)
+    total = 0
+    if hasattr(collection, "query_iterator"):
+        iterator = collection.query_iterator(batch_size=page_size, expr="id >= 0", output_fields=["id", text_field])
+        try:
+            while True:
+                rows = iterator.next()
+                if not rows:
+                    break
+                total += add_documents(collection_name, [row["id"] for row in rows],
+                                       [row.get(text_field) or "" for row in rows])
+        finally:
+            iterator.close()
+        return total
+    # query_iterator가 없는 pymilvus: 전체를 한 번에 읽음 (download_original_data와 같은 방식)
+    rows = collection.query(expr="id >= 0", output_fields=["id", text_field], limit=collection.num_entities)
+    for start in range(0, len(rows), page_size):
+        page = rows[start:start + page_size]
+        total += add_documents(collection_name, [row["id"] for row in page], [row.get(text_field) or "" for row in page])
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Milvus 컬렉션 텍스트로 BM25 색인 생성")
+    parser.add_argument("--collection", action="append", help="색인할 컬렉션 (여러 번 지정 가능, 기본: 모든 컬렉션)")
+    parser.add_argument("--page-size", type=int, default=1000)
+    args = parser.parse_args()
+    for collection_name in args.collection or config.COLLECTION_NAMES:
+        start = time.time()
+        count = build_from_milvus(collection_name, args.page_size)
+        print(f"Indexed {count} documents from '{collection_name}' in {time.time() - start:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
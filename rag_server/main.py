@@ -1,7 +1,15 @@
 # main.py
 from fastapi import FastAPI, HTTPException, status, Path, Body, File, UploadFile, Form
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, HttpUrl, Field
 from typing import Optional, List, Dict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import contextlib
+import functools
+import json
+import os
 import time
 import urllib.parse
 
@@ -11,10 +19,69 @@ import crawling  # Then import crawling
 from crawling import NewsItemResponse  # Import specific classes
 import config  # Config import is fine
 import rag_report_pipeline  # Import RAG pipeline last since it depends on utils
+import report_jobs
+import cache_utils
+import admission
 
 # --- FastAPI App Initialization ---
 app = FastAPI(title="RAG Corporate Analysis Report Generator")
 
+# 동기식 RAG 파이프라인(OpenAI, pymilvus, torch)은 이벤트 루프를 막지 않도록 전용 스레드 풀에서 실행
+report_executor = ThreadPoolExecutor(
+    max_workers=config.REPORT_EXECUTOR_MAX_WORKERS,
+    thread_name_prefix="report-worker"
+)
+
+async def run_in_report_executor(func, *args, **kwargs):
+    """블로킹 함수를 보고서 전용 스레드 풀에서 실행하고 결과를 기다립니다."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(report_executor, functools.partial(func, *args, **kwargs))
+
+# /reports 동시 실행 수 제한 + 대기열 (가득 차면 429 + Retry-After)
+report_admission = admission.AdmissionController(
+    name="reports",
+    max_concurrent=config.REPORT_ADMISSION_MAX_CONCURRENT,
+    max_queue=config.REPORT_ADMISSION_MAX_QUEUE,
+    queue_timeout_seconds=config.REPORT_ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    default_retry_after=config.REPORT_ADMISSION_RETRY_AFTER_SECONDS
+)
+
+# 동일한 요청을 다시 생성하지 않도록 완성된 보고서를 캐시 (요청 + 코퍼스 버전 기준)
+report_cache = cache_utils.LRUTTLCache(
+    name="report",
+    max_entries=config.REPORT_CACHE_MAX_ENTRIES,
+    ttl_seconds=config.REPORT_CACHE_TTL_SECONDS,
+    disk_dir=os.path.join(config.CACHE_DIR, "reports") if config.REPORT_CACHE_DISK_ENABLED else None,
+    max_disk_entries=config.REPORT_CACHE_MAX_DISK_ENTRIES
+) if config.REPORT_CACHE_ENABLED else None
+
+# 작업 기반(POST /reports/jobs) 보고서 생성을 위한 매니저
+report_job_manager = report_jobs.ReportJobManager(
+    store=report_jobs.create_job_store(),
+    max_workers=config.REPORT_JOB_MAX_WORKERS,
+    max_pending=config.REPORT_JOB_MAX_PENDING
+)
+
+@app.on_event("startup")
+def start_model_warmup():
+    # 임베딩 모델은 백그라운드에서 로딩 (앱은 바로 요청을 받고, /news, /stocks 등은 모델을 기다리지 않음)
+    if config.MODEL_WARMUP_ON_STARTUP:
+        utils.start_model_warmup()
+
+@app.on_event("startup")
+def start_collection_validation():
+    # Milvus 컬렉션 스키마를 설정과 대조하고 컬렉션 핸들을 미리 확인 (백그라운드)
+    if config.MILVUS_VALIDATE_ON_STARTUP:
+        utils.start_collection_validation()
+
+@app.on_event("shutdown")
+def shutdown_report_executor():
+    report_executor.shutdown(wait=False)
+    report_job_manager.shutdown()
+    rag_report_pipeline.shutdown_section_pipeline()
+    utils.shutdown_search_executor()
+    utils.save_query_usage()
+
 # --- Pydantic Models (for potential future request/response structure) ---
 class ReportRequest(BaseModel):
     title: str  # 보고서 제목
@@ -23,11 +90,34 @@ class ReportRequest(BaseModel):
     chapter: str  # 목차의 목록, \n\n으로 구분
     indicator: str = "none"  # 보고서 생성 시 관심 지표, 현재는 none으로 고정
     evaluations: str = ""  # 섹션별 평가 기준, \n\n으로 구분
+    use_cache: bool = True  # False이면 보고서 캐시를 읽지도 저장하지도 않음
+    refresh_cache: bool = False  # True이면 캐시를 무시하고 새로 생성한 뒤 캐시를 갱신
 
 class ReportResponse(BaseModel):
     report: str
     generation_time_seconds: float
     domain_specific_terms: Optional[List[Dict[str, str]]] = None  # Added field for domain-specific terms
+    cached: bool = False  # 보고서 캐시에서 반환된 경우 True
+    section_cache_hits: List[str] = []  # 섹션 캐시에서 재사용된 섹션 번호 목록
+
+class ReportJobCreatedResponse(BaseModel):
+    job_id: str
+    status: str
+
+class ReportSectionProgress(BaseModel):
+    section: str  # 섹션 번호
+    title: str  # 섹션 제목
+    status: str  # pending / running / completed
+
+class ReportJobStatusResponse(BaseModel):
+    job_id: str
+    status: str  # queued / running / completed / failed
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    sections: List[ReportSectionProgress] = []
+    result: Optional[ReportResponse] = None  # 완료된 경우에만 채워짐
+    error: Optional[str] = None
 
 class NewsItem(BaseModel):
     rank: int # 순위
@@ -102,43 +192,153 @@ class QuestionResponse(BaseModel):
 class AudioQuestionRequest(BaseModel):
     report: str = Field(..., description="기업 분석 보고서 내용")
 
+# --- Report Generation ---
+def get_report_cache_key(request: ReportRequest) -> str:
+    """정규화된 요청 파라미터, LLM 모델, 코퍼스 버전으로 보고서 캐시 키를 만듭니다."""
+    return cache_utils.make_cache_key("report", {
+        "title": cache_utils.normalize_text(request.title),
+        "company": cache_utils.normalize_text(request.company),
+        "date": cache_utils.normalize_text(request.date),
+        "chapter": cache_utils.normalize_text(request.chapter),
+        "indicator": cache_utils.normalize_text(request.indicator).lower(),
+        "evaluations": cache_utils.normalize_text(request.evaluations),
+        "models": [config.LLM_MODEL, config.KEYWORD_LLM_MODEL, config.SUMMARY_LLM_MODEL],
+        "corpus_version": cache_utils.get_corpus_version(),
+    })
+
+def replay_cached_report(cached_report: Dict, progress_callback) -> None:
+    """캐시된 보고서의 목차와 섹션을 생성할 때와 같은 진행 이벤트로 다시 전달합니다 (cached=True)."""
+    rag_report_pipeline.notify_progress(
+        progress_callback, "report_started", sections=cached_report.get("outline", []),
+        summary_section=cached_report.get("summary_section"), cached=True
+    )
+    for item in cached_report.get("sections", []):
+        rag_report_pipeline.notify_progress(progress_callback, "section_completed", **{**item, "cached": True})
+
+def build_report_response(request: ReportRequest, progress_callback=None, stream_tokens: bool = False) -> ReportResponse:
+    """
+    Runs the blocking RAG pipeline and domain term extraction for a report request.
+    Must be called from a worker thread, never directly on the event loop.
+    """
+    start_api_time = time.time()
+
+    # 보고서 캐시 확인 (use_cache=False이면 우회, refresh_cache=True이면 새로 생성 후 갱신)
+    cache_key = None
+    if report_cache is not None and request.use_cache:
+        cache_key = get_report_cache_key(request)
+        if not request.refresh_cache:
+            cached_report = report_cache.get(cache_key)
+            # 진행 이벤트가 필요한 요청(스트리밍, 작업)은 섹션 목록이 함께 저장된 캐시 항목만 사용
+            if cached_report is not None and progress_callback is not None and "sections" not in cached_report:
+                cached_report = None
+            if cached_report is not None:
+                print(f"Report cache hit ({cache_key[:20]}...).")
+                if progress_callback is not None:
+                    replay_cached_report(cached_report, progress_callback)
+                return ReportResponse(
+                    report=cached_report["report"],
+                    generation_time_seconds=round(time.time() - start_api_time, 3),
+                    domain_specific_terms=cached_report.get("domain_specific_terms"),
+                    cached=True
+                )
+
+    # Ensure models are loaded and Milvus connection established
+    # (모델이 아직 워밍업 중이면 이 워커 스레드에서만 기다림)
+    utils.wait_for_models(config.MODEL_READY_TIMEOUT_SECONDS)
+    utils.ensure_milvus_connection()
+
+    # 섹션 캐시에서 재사용된 섹션을 기록하면서 원래 콜백으로 이벤트 전달
+    section_cache_hits = []
+    report_result = {}
+
+    def on_progress(event, payload):
+        if event == "section_completed" and payload.get("cached"):
+            section_cache_hits.append(payload.get("section"))
+        if event == "report_completed":
+            report_result.update(payload)
+        if progress_callback is not None:
+            progress_callback(event, payload)
+
+    # Call the main RAG pipeline function with request parameters
+    generated_report = rag_report_pipeline.generate_full_report(
+        title=request.title,
+        company=request.company,
+        date=request.date,
+        chapter=request.chapter,
+        indicator=request.indicator,
+        evaluations=request.evaluations,
+        progress_callback=on_progress,
+        stream_tokens=stream_tokens,
+        use_cache=request.use_cache,
+        refresh_cache=request.refresh_cache
+    )
+
+    # Extract domain-specific terms from the generated report
+    print("Extracting domain-specific terms from the report...")
+    domain_terms = utils.extract_domain_specific_terms(generated_report)
+
+    end_api_time = time.time()
+    total_api_time = end_api_time - start_api_time
+    print(f"Report generation successful. Total API time: {total_api_time:.2f}s")
+
+    # 실패한 섹션(LLM/파이프라인 오류 문구)이 있는 보고서는 캐시하지 않음
+    failed_sections = report_result.get("failed_sections", [])
+    if failed_sections:
+        print(f"Not caching report: sections {failed_sections} failed.")
+    elif cache_key is not None:
+        report_cache.set(cache_key, {
+            "report": generated_report,
+            "domain_specific_terms": domain_terms,
+            "outline": report_result.get("outline", []),
+            "summary_section": report_result.get("summary_section"),
+            "sections": report_result.get("sections", []),
+        })
+
+    return ReportResponse(
+        report=generated_report,
+        generation_time_seconds=round(total_api_time, 2),
+        domain_specific_terms=domain_terms,
+        section_cache_hits=section_cache_hits
+    )
+
 # --- API Endpoint ---
-@app.post("/reports", response_model=ReportResponse, status_code=status.HTTP_201_CREATED)
+@app.post(
+    "/reports",
+    response_model=ReportResponse,
+    status_code=status.HTTP_201_CREATED,
+    responses={
+        429: {"description": "동시에 처리 중인 보고서 요청이 너무 많습니다. Retry-After 이후 다시 시도해주세요."},
+        503: {"description": "임베딩 모델이 아직 준비되지 않았습니다."}
+    }
+)
 async def create_report(request: ReportRequest): 
     """
     Generates a corporate analysis report using RAG based on provided parameters.
     """
     print(f"Received request for /reports endpoint: {request.dict()}")
-    start_api_time = time.time()
 
     try:
-        # Ensure models are loaded and Milvus connection established
-        utils.ensure_milvus_connection()
-
-        # Call the main RAG pipeline function with request parameters
-        generated_report = rag_report_pipeline.generate_full_report(
-            title=request.title,
-            company=request.company,
-            date=request.date,
-            chapter=request.chapter,
-            indicator=request.indicator,
-            evaluations=request.evaluations
-        )
+        # 동시 실행 수를 넘으면 대기열에서 기다리고, 대기열도 가득 차면 429로 거절
+        async with report_admission.admit() as waited:
+            if waited > 0.01:
+                print(f"/reports request admitted after waiting {waited:.2f}s.")
+            # 파이프라인은 report_executor에서 실행되므로 다른 요청(/health, /news 등)은 계속 처리됨
+            return await run_in_report_executor(build_report_response, request)
 
-        # Extract domain-specific terms from the generated report
-        print("Extracting domain-specific terms from the report...")
-        domain_terms = utils.extract_domain_specific_terms(generated_report)
-        
-        end_api_time = time.time()
-        total_api_time = end_api_time - start_api_time
-        print(f"Report generation successful. Total API time: {total_api_time:.2f}s")
-
-        return ReportResponse(
-            report=generated_report,
-            generation_time_seconds=round(total_api_time, 2),
-            domain_specific_terms=domain_terms
+    except admission.AdmissionRejectedError as e:
+        print(f"/reports request rejected: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="동시에 처리 중인 보고서 요청이 너무 많습니다. 잠시 후 다시 시도해주세요.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except utils.ModelsNotReadyError as e:
+        print(f"/reports request failed: embedding models not ready: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"임베딩 모델이 아직 준비되지 않았습니다. 잠시 후 다시 시도해주세요. ({e})",
+            headers={"Retry-After": "10"}
         )
-
     except RuntimeError as e:
          # Catch critical errors like Milvus connection or model loading failures
          print(f"Runtime Error during report generation: {e}")
@@ -157,6 +357,154 @@ async def create_report(request: ReportRequest):
             detail=f"An unexpected error occurred: {e}",
         )
 
+@app.delete(
+    "/reports/cache",
+    summary="보고서 캐시 비우기",
+    description="저장된 전체 보고서 캐시를 삭제합니다. Milvus 재구축 시에는 코퍼스 버전이 바뀌어 자동으로 무효화됩니다."
+)
+async def clear_report_cache():
+    if report_cache is None:
+        return {"cleared": 0, "enabled": False}
+    cleared = await run_in_threadpool(report_cache.clear)
+    return {"cleared": cleared, "enabled": True}
+
+def format_sse(event: str, data) -> str:
+    """Server-Sent Events 형식의 메시지를 만듭니다."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.post(
+    "/reports/stream",
+    summary="보고서 섹션을 생성되는 즉시 스트리밍 (SSE)",
+    description=(
+        "Server-Sent Events로 보고서를 전송합니다. 각 섹션이 완성되는 즉시 `section` 이벤트가 전송되고, "
+        "요약(`summary`)과 용어 사전(`terms`), 완료(`done`) 이벤트가 마지막에 전송됩니다. "
+        "`stream_tokens=true`이면 LLM 토큰 단위의 `token` 이벤트도 함께 전송됩니다."
+    ),
+    responses={
+        200: {"content": {"text/event-stream": {}}, "description": "SSE 스트림"},
+        429: {"description": "동시에 처리 중인 보고서 요청이 너무 많습니다. Retry-After 이후 다시 시도해주세요."}
+    }
+)
+async def stream_report(request: ReportRequest, stream_tokens: bool = False):
+    print(f"Received request for /reports/stream endpoint: {request.dict()}")
+    # /reports와 같은 승인 제어를 스트림을 열기 전에 적용 (거절되면 SSE 대신 429 + Retry-After)
+    admission_slot = contextlib.AsyncExitStack()
+    try:
+        waited = await admission_slot.enter_async_context(report_admission.admit())
+    except admission.AdmissionRejectedError as e:
+        print(f"/reports/stream request rejected: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="동시에 처리 중인 보고서 요청이 너무 많습니다. 잠시 후 다시 시도해주세요.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    if waited > 0.01:
+        print(f"/reports/stream request admitted after waiting {waited:.2f}s.")
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+    summary_section = {"key": None}
+
+    def on_progress(event: str, payload: Dict):
+        # 워커 스레드에서 호출되므로 이벤트 루프로 안전하게 넘김
+        loop.call_soon_threadsafe(events.put_nowait, (event, payload))
+
+    async def run_pipeline():
+        try:
+            response = await run_in_report_executor(build_report_response, request, on_progress, stream_tokens)
+            await events.put(("__done__", response))
+        except Exception as e:
+            print(f"Unexpected Error during streamed report generation: {e}")
+            import traceback
+            traceback.print_exc()
+            await events.put(("__error__", str(e)))
+        finally:
+            # 클라이언트가 먼저 끊어도 생성이 끝날 때까지 슬롯을 유지 (워커 스레드는 계속 실행되므로)
+            await admission_slot.aclose()
+
+    # 스트림 시작 여부와 관계없이 슬롯이 반환되도록 파이프라인은 바로 시작
+    pipeline_task = asyncio.create_task(run_pipeline())
+
+    async def event_stream():
+        try:
+            while True:
+                event, payload = await events.get()
+                if event == "report_started":
+                    summary_section["key"] = payload.get("summary_section")
+                    yield format_sse("outline", {"sections": payload.get("sections", [])})
+                elif event == "section_started":
+                    yield format_sse("section_started", payload)
+                elif event == "section_token":
+                    yield format_sse("token", payload)
+                elif event == "section_completed":
+                    # 요약은 본문 섹션이 모두 끝난 뒤 생성되므로 마지막 이벤트 중 하나가 됨
+                    name = "summary" if payload.get("section") == summary_section["key"] else "section"
+                    yield format_sse(name, payload)
+                elif event == "__done__":
+                    yield format_sse("terms", {"domain_specific_terms": payload.domain_specific_terms or []})
+                    yield format_sse("done", {
+                        "report": payload.report,
+                        "generation_time_seconds": payload.generation_time_seconds,
+                        "cached": bool(payload.cached)
+                    })
+                    break
+                elif event == "__error__":
+                    yield format_sse("error", {"detail": f"An unexpected error occurred: {payload}"})
+                    break
+        finally:
+            if not pipeline_task.done():
+                # 클라이언트가 연결을 끊어도 실행 중인 섹션은 워커 스레드에서 마무리됨
+                print("Report stream closed before completion.")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post(
+    "/reports/jobs",
+    response_model=ReportJobCreatedResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="보고서 생성 작업 등록",
+    description="보고서 생성 작업을 대기열에 등록하고 즉시 작업 ID를 반환합니다. 결과는 GET /reports/jobs/{job_id}로 조회합니다.",
+    responses={
+        202: {"description": "작업이 등록되었습니다."},
+        503: {"description": "대기 중인 작업이 너무 많습니다. 잠시 후 다시 시도해주세요."}
+    }
+)
+async def create_report_job(request: ReportRequest):
+    print(f"Received request for /reports/jobs endpoint: {request.dict()}")
+    try:
+        job = report_job_manager.submit(
+            lambda progress_callback: build_report_response(request, progress_callback).dict()
+        )
+    except report_jobs.JobQueueFullError as e:
+        print(f"Report job rejected: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="대기 중인 보고서 생성 작업이 너무 많습니다. 잠시 후 다시 시도해주세요.",
+            headers={"Retry-After": "30"}
+        )
+    return ReportJobCreatedResponse(job_id=job["job_id"], status=job["status"])
+
+@app.get(
+    "/reports/jobs/{job_id}",
+    response_model=ReportJobStatusResponse,
+    summary="보고서 생성 작업 상태 조회",
+    description="작업 상태, 섹션별 진행 상황, 완료된 경우 최종 보고서를 반환합니다.",
+    responses={
+        200: {"description": "작업 상태를 성공적으로 가져왔습니다."},
+        404: {"description": "작업을 찾을 수 없거나 보관 기간이 만료되었습니다."}
+    }
+)
+async def get_report_job(
+    job_id: str = Path(..., title="작업 ID", description="POST /reports/jobs 에서 받은 작업 ID")
+):
+    job = await run_in_threadpool(report_job_manager.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"작업 '{job_id}'을(를) 찾을 수 없습니다.")
+    return ReportJobStatusResponse(**job)
+
 @app.get(
     "/news/{company_name}", 
     response_model=List[NewsItemResponse],  # NewsItem 대신 NewsItemResponse 사용
@@ -183,7 +531,7 @@ async def get_company_news(
         if not company_name or company_name.strip() == "":
             raise HTTPException(status_code=400, detail="회사명이 비어있습니다. 유효한 회사명을 입력해주세요.")
             
-        news_items = crawling.crawl_naver_news_for_company(company_name, limit=10)
+        news_items = await run_in_threadpool(crawling.crawl_naver_news_for_company, company_name, limit=10)
         
         # 디버깅용 로그 추가
         print(f"크롤링 결과: {len(news_items)}개 기사 발견")
@@ -231,7 +579,7 @@ async def get_stock_info_by_company_name_updated(
     company_name_query: str = Path(..., title="회사명", description="검색할 회사명 (예: 셀트리온, 삼성전자).")
 ):
     try:
-        stock_data = crawling.get_stock_data_with_search(company_name_query)
+        stock_data = await run_in_threadpool(crawling.get_stock_data_with_search, company_name_query)
 
         if not stock_data:
              raise HTTPException(status_code=404, detail=f"'{company_name_query}'에 대한 주식 정보를 구성할 수 없습니다.")
@@ -367,7 +715,8 @@ async def answer_report_question(request: QuestionRequest):
             )
             
         # 질문에 대한 답변 생성
-        answer = utils.answer_question_about_report(
+        answer = await run_in_threadpool(
+            utils.answer_question_about_report,
             question=request.question,
             report_content=request.report
         )
@@ -447,7 +796,7 @@ async def answer_speech_question(
             )
             
         # 음성을 텍스트로 변환
-        stt_question = utils.transcribe_audio(audio_content)
+        stt_question = await run_in_threadpool(utils.transcribe_audio, audio_content)
         if not stt_question or len(stt_question.strip()) < 5:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -457,7 +806,8 @@ async def answer_speech_question(
         print(f"음성 변환 결과: '{stt_question}'")
         
         # 변환된 텍스트로 질문 답변 생성
-        answer = utils.answer_question_about_report(
+        answer = await run_in_threadpool(
+            utils.answer_question_about_report,
             question=stt_question,
             report_content=report
         )
@@ -488,6 +838,49 @@ async def answer_speech_question(
 def health_check():
     return {"status": "ok"}
 
+# Readiness check: 임베딩 모델이 로딩되어 보고서 생성이 가능한지 (/health는 프로세스 생존 여부만 확인)
+@app.get(
+    "/ready",
+    summary="보고서 생성 준비 상태",
+    responses={200: {"description": "모델 준비 및 워밍업 완료"}, 503: {"description": "모델 로딩 또는 워밍업 중이거나 로딩 실패"}}
+)
+def readiness_check():
+    model_status = utils.get_model_status()
+    # 워밍업(forward pass, 쿼리 사전 계산)이 끝나기 전에는 트래픽을 받지 않음
+    if not model_status["ready"] or (config.READY_REQUIRES_WARMUP and model_status.get("warming_up")):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=model_status,
+            headers={"Retry-After": "5"}
+        )
+    return {"status": "ready", "models": model_status}
+
+@app.get(
+    "/metrics",
+    summary="파이프라인 및 캐시 지표",
+    description="섹션 파이프라인의 단계별 대기열 길이/워커 사용률, /reports 승인 대기열 길이/대기 시간, 보고서 작업 대기 수, 캐시(보고서/섹션/키워드/임베딩) 적중률과 임베딩 배치 통계를 반환합니다."
+)
+def get_metrics():
+    caches = {
+        "report": report_cache,
+        "section": rag_report_pipeline.section_cache,
+        "keywords": utils.keyword_cache,
+        "hit_texts": utils.hit_text_cache,
+    }
+    return {
+        "pipeline": rag_report_pipeline.get_pipeline_stats(),
+        "admission": {"reports": report_admission.stats()},
+        "embedding": utils.get_embedding_stats(),
+        "milvus_collections": utils.collection_registry.stats(),
+        "hydration": utils.get_hydration_stats(),
+        "lexical_indexes": utils.lexical_indexes.stats(),
+        "report_jobs": {
+            "pending": report_job_manager.pending_count,
+            "max_pending": report_job_manager.max_pending,
+        },
+        "caches": {name: cache.stats() for name, cache in caches.items() if cache is not None},
+    }
+
 # --- Running the App (for local development) ---
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,91 @@
+# micro_batcher.py
+"""
+동적 마이크로 배칭(Micro-batching)
+
+여러 스레드(동시에 생성 중인 보고서의 섹션들)에서 들어오는 단건 요청을 모아 한 번의 배치 호출로 처리합니다.
+첫 요청이 들어온 뒤 max_wait_ms 동안 또는 max_batch_size 개가 모일 때까지 기다렸다가 batch_fn을 호출합니다.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List
+
+
+class MicroBatcher:
+    """
+    단건 요청을 모아 batch_fn(items) -> results 로 처리하는 백그라운드 배처.
+
+    batch_fn은 입력과 같은 길이/순서의 결과 리스트를 반환해야 합니다.
+    """
+
+    def __init__(self, name: str, batch_fn: Callable[[List[Any]], List[Any]], max_batch_size: int = 16,
+                 max_wait_ms: float = 5.0):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max(0.0, max_wait_ms) / 1000.0
+        self._requests: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._max_observed_batch = 0
+        self._thread = threading.Thread(target=self._worker_loop, name=f"{name}-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, item: Any) -> Future:
+        future: Future = Future()
+        self._requests.put((item, future))
+        return future
+
+    def __call__(self, item: Any) -> Any:
+        """요청을 제출하고 배치 결과를 기다립니다."""
+        return self.submit(item).result()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+                "queue_depth": self._requests.qsize(),
+                "batches": self._batches,
+                "items": self._items,
+                "avg_batch_size": round(self._items / self._batches, 3) if self._batches else 0.0,
+                "max_observed_batch_size": self._max_observed_batch,
+            }
+
+    def _collect_batch(self) -> List[tuple]:
+        batch = [self._requests.get()]  # 첫 요청이 올 때까지 대기
+        deadline = time.monotonic() + self.max_wait_seconds
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._requests.get_nowait())  # 이미 쌓여 있는 요청은 함께 처리
+                else:
+                    batch.append(self._requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _worker_loop(self):
+        while True:
+            batch = self._collect_batch()
+            items = [item for item, _ in batch]
+            try:
+                results = self.batch_fn(items)
+                if len(results) != len(items):
+                    raise RuntimeError(f"batch_fn returned {len(results)} results for {len(items)} items")
+            except Exception as e:
+                print(f"Error in micro-batcher '{self.name}': {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            with self._lock:
+                self._batches += 1
+                self._items += len(items)
+                self._max_observed_batch = max(self._max_observed_batch, len(items))
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
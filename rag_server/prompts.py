@@ -189,6 +189,23 @@ def parse_nested_chapter(chapter_text):
     
     return sections, main_sections, summary_section
 
+# 섹션별 평가 기준을 섹션 번호에 매핑하는 함수
+def map_section_evaluations(evaluations, main_section_nums):
+    """
+    \n\n으로 구분된 평가 기준을 대목차 번호 순서대로 매핑합니다.
+    
+    Returns:
+        dict: 섹션 번호 -> 평가 기준 문자열 (평가 기준이 없는 섹션은 포함되지 않음)
+    """
+    if not evaluations:
+        return {}
+    eval_sections = evaluations.split("\n\n")
+    return {
+        section_num: eval_sections[i]
+        for i, section_num in enumerate(main_section_nums)
+        if i < len(eval_sections)
+    }
+
 # 전체 프롬프트를 동적으로 구성하는 함수
 def build_base_prompt(title, company, date, chapter, indicator="none", evaluations=""):
     """
@@ -227,21 +244,15 @@ def build_base_prompt(title, company, date, chapter, indicator="none", evaluatio
     
     # 섹션별 평가 기준 처리
     section_evaluations = ""
-    if evaluations:
-        # \n\n으로 구분된 각 섹션의 평가 기준을 분리
-        eval_sections = evaluations.split("\n\n")
-        
-        # 각 섹션에 해당하는 평가 기준을 매핑 (순서대로)
-        for i, section_num in enumerate(main_section_nums):
-            if i < len(eval_sections):
-                section = sections.get(section_num)
-                if section:
-                    section_title = section["title"]
-                    section_evaluations += SECTION_EVALUATION_TEMPLATE.format(
-                        section_number=section_num,
-                        section_title=section_title,
-                        evaluation_criteria=eval_sections[i]
-                    ) + "\n\n"
+    for section_num, evaluation_criteria in map_section_evaluations(evaluations, main_section_nums).items():
+        section = sections.get(section_num)
+        if section:
+            section_title = section["title"]
+            section_evaluations += SECTION_EVALUATION_TEMPLATE.format(
+                section_number=section_num,
+                section_title=section_title,
+                evaluation_criteria=evaluation_criteria
+            ) + "\n\n"
     
     # 모든 템플릿 조합
     complete_prompt = (
@@ -354,18 +365,43 @@ BASE_PROMPT_TEXT = """
 - 컨텍스트 기반: 내용이 컨텍스트에서 직접 확인 가능한 정보인가?
 """
 
+# 키워드 작성 지침 (단일 섹션 / 여러 섹션 키워드 프롬프트 공통)
+KEYWORD_GUIDELINES_TEMPLATE = """가능한 다양하고 관련성 높은 키워드를 포함해 주세요.
+회사명({company})과 관련 제품명, 분기({date}), 실적, 재무, 사업, 전략 등의 키워드를 포함하세요."""
+
 # 동적으로 키워드 프롬프트를 생성하는 함수
 def create_keyword_prompt(section_number, section_title, company, date, top_k):
     """섹션에 맞는 키워드 생성 프롬프트를 동적으로 생성"""
+    guidelines = KEYWORD_GUIDELINES_TEMPLATE.format(company=company, date=date)
     return f"""
 {date} {company} 기업 분석 보고서를 만들기 위해 RAG 파이프라인을 활용할 것입니다.
 벡터 DB인 Milvus에서 검색을 통해 상위 {top_k}개 청크를 가져올 것입니다.
 보고서의 {section_number}번인 '{section_title}'을(를) 만들 때 필요한 검색을 위한 키워드를 제출하세요.
-가능한 다양하고 관련성 높은 키워드를 포함해 주세요.
-회사명({company})과 관련 제품명, 분기({date}), 실적, 재무, 사업, 전략 등의 키워드를 포함하세요.
+{guidelines}
 결과를 출력할 때에는 키워드만 제출해주시고, 각 키워드들을 띄어쓰기로 구분하여 제출하세요.
 """
 
+# 여러 섹션의 키워드를 한 번의 호출로 생성하는 프롬프트
+def create_batch_keyword_prompt(sections, company, date, top_k):
+    """
+    여러 섹션의 검색 키워드를 한 번에 요청하는 JSON 응답용 프롬프트를 생성
+    
+    Args:
+        sections: (섹션 번호, 섹션 제목) 튜플 목록
+    """
+    guidelines = KEYWORD_GUIDELINES_TEMPLATE.format(company=company, date=date)
+    section_lines = "\n".join(f"- {section_number}번: '{section_title}'" for section_number, section_title in sections)
+    example_keys = ", ".join(f'"{section_number}": "키워드1 키워드2 ..."' for section_number, _ in sections[:2])
+    return f"""
+{date} {company} 기업 분석 보고서를 만들기 위해 RAG 파이프라인을 활용할 것입니다.
+벡터 DB인 Milvus에서 섹션마다 검색을 통해 상위 {top_k}개 청크를 가져올 것입니다.
+보고서의 다음 섹션들을 만들 때 필요한 검색을 위한 키워드를 섹션별로 제출하세요.
+{section_lines}
+{guidelines}
+각 섹션의 키워드는 해당 섹션 주제에 맞게 작성하고, 키워드들을 띄어쓰기로 구분한 하나의 문자열로 제출하세요.
+결과는 섹션 번호를 키로 하는 JSON 객체로만 출력하세요. 예: {{"keywords": {{{example_keys}}}}}
+"""
+
 # 기존 프롬프트 템플릿은 레거시 지원을 위해 유지
 MAKE_KEYWORD_PROMPT_TEMPLATE = """
 24년 4분기 셀트리온 기업 분석 보고서를 만들기 위해 RAG 파이프라인을 활용할 것입니다.
@@ -1,19 +1,52 @@
 # rag_pipeline.py
 import time
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Callable
 import os
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # Import utility functions and config
 import utils
 import config
-from prompts import build_base_prompt, create_keyword_prompt, create_summary_prompt, parse_nested_chapter
+import cache_utils
+from staged_pipeline import PipelineStage, StagedPipeline
+from prompts import (build_base_prompt, create_keyword_prompt, create_summary_prompt, parse_nested_chapter,
+                     map_section_evaluations)
 
 # 로깅을 위한 디렉토리 설정
 LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
 os.makedirs(LOG_DIR, exist_ok=True)
 
+# 진행 상황 콜백 타입: (이벤트 이름, 페이로드) -> None
+ProgressCallback = Callable[[str, Dict[str, Any]], None]
+
+# 섹션 단위 메모이제이션: 목차 중 일부만 바뀌면 바뀐 섹션과 요약만 다시 생성
+section_cache = cache_utils.LRUTTLCache(
+    name="section",
+    max_entries=config.SECTION_CACHE_MAX_ENTRIES,
+    ttl_seconds=config.SECTION_CACHE_TTL_SECONDS,
+    disk_dir=os.path.join(config.CACHE_DIR, "sections") if config.SECTION_CACHE_DISK_ENABLED else None
+) if config.SECTION_CACHE_ENABLED else None
+
+# 생성 실패 시 반환되는 문구 (캐시에 저장하지 않음)
+SECTION_ERROR_MARKERS = (
+    "키워드 생성 중 오류 발생",
+    "키워드 임베딩 중 오류 발생",
+    "OpenAI API 오류가 발생했습니다",
+    "LLM 호출 중 오류가 발생했습니다",
+)
+
+def notify_progress(progress_callback: Optional[ProgressCallback], event: str, **payload):
+    """진행 상황 콜백을 호출합니다. 콜백 오류가 보고서 생성을 중단시키지 않도록 예외는 로그만 남깁니다."""
+    if progress_callback is None:
+        return
+    try:
+        progress_callback(event, payload)
+    except Exception as e:
+        print(f"Warning: progress callback failed for event '{event}': {e}")
+
 def save_debug_info(section_number, section_title, keywords, retrieved_data, prompt, section_content):
     """디버깅 정보를 JSON 파일로 저장"""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -48,10 +81,55 @@ def save_debug_info(section_number, section_title, keywords, retrieved_data, pro
     except Exception as e:
         print(f"Error saving debug info: {e}")
 
-def generate_report_section(section_number: str, section_title: str, report_params: Dict, subsections: Dict = None) -> str:
-    """Generates content for a single report section using the RAG pipeline."""
+def generate_report_section(section_number: str, section_title: str, report_params: Dict, subsections: Dict = None,
+                            on_token: Optional[Callable[[str], None]] = None, keywords: Optional[str] = None,
+                            retrieval: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Generates content for a single report section using the RAG pipeline.
+    If on_token is given, the LLM output is streamed to it while the section is written.
+    If keywords are given (e.g. from the batched keyword planner), keyword generation is skipped.
+    If retrieval is given (from retrieve_sections_batch), embedding and search are skipped.
+    """
+    task = _create_section_task(section_number, section_title, report_params, subsections, on_token, keywords,
+                                retrieval=retrieval)
+    for stage_func in (_stage_keywords, _stage_embed, _stage_search, _stage_llm):
+        task = stage_func(task)
+    return task["content"]
+
+
+# --- Section Stages ---
+# generate_report_section의 각 단계. 파이프라인 실행기에서 단계별로 나누어 실행할 수 있도록 분리
+# task dict를 받아 결과를 채워 반환하며, 앞 단계에서 content가 정해지면(오류) 이후 단계는 건너뜀
+
+def _create_section_task(section_number: str, section_title: str, report_params: Dict, subsections: Dict = None,
+                         on_token: Optional[Callable[[str], None]] = None, keywords: Optional[str] = None,
+                         progress_callback: Optional[ProgressCallback] = None,
+                         retrieval: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    return {
+        "section_number": section_number,
+        "section_title": section_title,
+        "report_params": report_params,
+        "subsections": subsections,
+        "on_token": on_token,
+        "keywords": keywords,
+        "progress_callback": progress_callback,
+        "start_time": None,
+        # 보고서 단위 배치 검색 결과가 있으면 임베딩/검색 단계를 건너뜀
+        "retrieval_prefetched": retrieval is not None,
+        "embedding": retrieval["embedding"] if retrieval is not None else None,
+        "retrieved_data": retrieval["retrieved_data"] if retrieval is not None else [],
+        "context": "",
+        "content": None,
+    }
+
+
+def _stage_keywords(task: Dict[str, Any]) -> Dict[str, Any]:
+    section_number = task["section_number"]
+    section_title = task["section_title"]
+    report_params = task["report_params"]
+    notify_progress(task["progress_callback"], "section_started", section=section_number, title=section_title)
     print(f"\n--- Generating Section {section_number}: {section_title} ---")
-    start_time = time.time()
+    task["start_time"] = time.time()
 
     # Extract report parameters
     title = report_params.get('title', '기업 분석 보고서')
@@ -62,41 +140,66 @@ def generate_report_section(section_number: str, section_title: str, report_para
     print(f"[DEBUG] 섹션: {section_number}. {section_title}")
     print(f"[DEBUG] 파라미터: 제목={title}, 기업={company}, 시기={date}, 관심지표={indicator}")
     
-    # 하위 섹션 정보가 있는 경우 쿼리에 포함
-    subsection_info = ""
-    if subsections and len(subsections) > 0:
-        subsection_info = "이 섹션은 다음과 같은 하위 섹션을 포함하고 있습니다:\n"
-        for sub_num, sub_data in subsections.items():
-            subsection_info += f"  - {sub_num} {sub_data['title']}\n"
-        subsection_info += "각 하위 섹션에 맞게 내용을 구성해주세요.\n"
-        print(f"[DEBUG] 하위 섹션 정보:\n{subsection_info}")
-    
-    # 1. Generate Keywords using LLM with dynamic prompt
-    keywords = utils.generate_keywords_for_section(
-        section_number, 
-        section_title,
-        company=company,
-        date=date
-    )
+    # 1. Generate Keywords using LLM with dynamic prompt (미리 계획된 키워드가 있으면 재사용)
+    keywords = task["keywords"]
+    if keywords:
+        print(f"Using planned keywords: {keywords}")
+    else:
+        keywords = utils.generate_keywords_for_section(
+            section_number, 
+            section_title,
+            company=company,
+            date=date
+        )
+    task["keywords"] = keywords
     if not keywords or "오류" in keywords:
         print(f"Error generating keywords for section {section_number}. Skipping.")
-        return f"### {section_number}. {section_title}\n\n키워드 생성 중 오류 발생.\n"
+        task["content"] = f"### {section_number}. {section_title}\n\n키워드 생성 중 오류 발생.\n"
+    return task
+
 
+def _stage_embed(task: Dict[str, Any]) -> Dict[str, Any]:
+    if task["content"] is not None or task["retrieval_prefetched"]:
+        return task
     # 2. Get Keyword Embedding
     print("Embedding keywords...")
-    keyword_embedding = utils.get_embedding(keywords)
-    if keyword_embedding is None:
-        print(f"Error embedding keywords for section {section_number}. Skipping.")
-        return f"### {section_number}. {section_title}\n\n키워드 임베딩 중 오류 발생.\n"
+    # 컬렉션별 임베딩 모델로 임베딩 (같은 모델을 쓰는 컬렉션끼리는 한 번만)
+    task["embedding"] = utils.get_query_vectors_for_collections(task["keywords"], config.COLLECTION_NAMES)
+    utils.record_query_usage(task["keywords"])  # 자주 쓰이는 쿼리는 다음 시작 시 미리 임베딩
+    if not any(vector is not None for vector in task["embedding"].values()):
+        print(f"Error embedding keywords for section {task['section_number']}. Skipping.")
+        task["content"] = f"### {task['section_number']}. {task['section_title']}\n\n키워드 임베딩 중 오류 발생.\n"
+        return task
     print("Keyword embedding complete.")
+    return task
 
-    # 3. Search Milvus
-    print("Searching Milvus for relevant context...")
-    retrieved_data = utils.search_milvus(
-        keyword_embedding,
-        config.COLLECTION_NAMES,
-        config.SEARCH_TOP_K
-    )
+
+def _stage_search(task: Dict[str, Any]) -> Dict[str, Any]:
+    if task["content"] is not None:
+        return task
+    section_number = task["section_number"]
+    section_title = task["section_title"]
+
+    # 3. Search Milvus (보고서 단위 배치 검색 결과가 있으면 재사용)
+    if task["retrieval_prefetched"]:
+        print("Using batched retrieval results...")
+        retrieved_data = task["retrieved_data"]
+    else:
+        print("Searching Milvus for relevant context...")
+        if config.HYBRID_SEARCH_ENABLED:
+            # 키워드 BM25 결과와 벡터 검색 결과를 RRF로 결합 (정확한 제품명/지표 토큰 보완)
+            retrieved_data = utils.hybrid_search(
+                task["keywords"],
+                task["embedding"],
+                config.COLLECTION_NAMES,
+                config.SEARCH_TOP_K
+            )
+        else:
+            retrieved_data = utils.search_milvus(
+                task["embedding"],
+                config.COLLECTION_NAMES,
+                config.SEARCH_TOP_K
+            )
     if not retrieved_data:
         print("No relevant context found in Milvus. Using fallback prompt...")
         # 검색 결과가 없을 경우 최소한의 섹션 구조를 생성하는 프롬프트 전달
@@ -114,6 +217,35 @@ def generate_report_section(section_number: str, section_title: str, report_para
         
         context_for_llm = utils.format_context(retrieved_data)
 
+    task["retrieved_data"] = retrieved_data or []
+    task["context"] = context_for_llm
+    return task
+
+
+def _stage_llm(task: Dict[str, Any]) -> Dict[str, Any]:
+    if task["content"] is not None:
+        return task
+    section_number = task["section_number"]
+    section_title = task["section_title"]
+    report_params = task["report_params"]
+    subsections = task["subsections"]
+    context_for_llm = task["context"]
+    retrieved_data = task["retrieved_data"]
+
+    title = report_params.get('title', '기업 분석 보고서')
+    company = report_params.get('company', '셀트리온')
+    date = report_params.get('date', '24년 4분기')
+    indicator = report_params.get('indicator', 'none')
+
+    # 하위 섹션 정보가 있는 경우 쿼리에 포함
+    subsection_info = ""
+    if subsections and len(subsections) > 0:
+        subsection_info = "이 섹션은 다음과 같은 하위 섹션을 포함하고 있습니다:\n"
+        for sub_num, sub_data in subsections.items():
+            subsection_info += f"  - {sub_num} {sub_data['title']}\n"
+        subsection_info += "각 하위 섹션에 맞게 내용을 구성해주세요.\n"
+        print(f"[DEBUG] 하위 섹션 정보:\n{subsection_info}")
+
     # 4. Generate Section Content using LLM with dynamic prompt
     print("Generating section content with LLM...")
     # Construct the specific query for the LLM for this section
@@ -150,11 +282,12 @@ def generate_report_section(section_number: str, section_title: str, report_para
         query=user_query_for_section,
         context=context_for_llm,
         base_prompt=dynamic_base_prompt,
-        model=config.LLM_MODEL
+        model=config.LLM_MODEL,
+        on_token=task["on_token"]
     )
 
     end_time = time.time()
-    print(f"Section {section_number} generation finished in {end_time - start_time:.2f} seconds.")
+    print(f"Section {section_number} generation finished in {end_time - task['start_time']:.2f} seconds.")
 
     # Ensure the output starts with the correct heading format
     expected_heading = f"### {section_number}. {section_title}"
@@ -163,17 +296,223 @@ def generate_report_section(section_number: str, section_title: str, report_para
          section_content = f"{expected_heading}\n\n{section_content}"
     
     # 디버깅 정보 저장
-    save_debug_info(section_number, section_title, keywords, retrieved_data, full_prompt, section_content)
+    save_debug_info(section_number, section_title, task["keywords"], retrieved_data, full_prompt, section_content)
     
     # 최종 생성 결과 미리보기 출력
     content_preview = section_content[:500] + "..." if len(section_content) > 500 else section_content
     print(f"[DEBUG] 생성된 내용 미리보기:\n{content_preview}")
 
-    return section_content
+    task["content"] = section_content
+    return task
+
+
+def _stage_llm_and_notify(task: Dict[str, Any]) -> Dict[str, Any]:
+    """파이프라인의 마지막 단계: 섹션을 생성하고 (앞 단계에서 오류로 끝난 경우 포함) 완료 이벤트를 발생시킵니다."""
+    task = _stage_llm(task)
+    notify_progress(
+        task["progress_callback"], "section_completed",
+        section=task["section_number"], title=task["section_title"], content=task["content"]
+    )
+    return task
+
+
+# --- Section Pipeline ---
+# 모든 보고서 요청이 공유하는 단계별 파이프라인 (처음 사용할 때 생성)
+_section_pipeline: Optional[StagedPipeline] = None
+_section_pipeline_lock = threading.Lock()
+
+def get_section_pipeline() -> StagedPipeline:
+    """키워드 -> 임베딩(CPU 전용 워커) -> 검색 -> LLM 단계로 구성된 섹션 파이프라인을 반환합니다."""
+    global _section_pipeline
+    with _section_pipeline_lock:
+        if _section_pipeline is None:
+            queue_size = config.PIPELINE_STAGE_QUEUE_SIZE
+            _section_pipeline = StagedPipeline("section", [
+                PipelineStage("keywords", _stage_keywords, config.PIPELINE_KEYWORD_WORKERS, queue_size),
+                PipelineStage("embed", _stage_embed, config.PIPELINE_EMBED_WORKERS, queue_size),
+                PipelineStage("search", _stage_search, config.PIPELINE_SEARCH_WORKERS, queue_size),
+                PipelineStage("llm", _stage_llm_and_notify, config.PIPELINE_LLM_WORKERS, queue_size),
+            ])
+        return _section_pipeline
+
+def get_pipeline_stats() -> Dict[str, Any]:
+    """단계별 대기열 길이와 워커 사용률 (파이프라인이 아직 생성되지 않았으면 빈 dict)."""
+    with _section_pipeline_lock:
+        pipeline = _section_pipeline
+    return pipeline.stats() if pipeline is not None else {}
+
+def shutdown_section_pipeline():
+    global _section_pipeline
+    with _section_pipeline_lock:
+        if _section_pipeline is not None:
+            _section_pipeline.shutdown()
+            _section_pipeline = None
+
+
+def get_section_cache_key(section_number: str, section_title: str, subsections: Optional[Dict],
+                          report_params: Dict, evaluation_criteria: str = "") -> str:
+    """
+    섹션 생성 결과를 결정하는 입력값(보고서 제목, 기업, 시기, 섹션, 평가 기준, 모델, 코퍼스 버전)으로 캐시 키를 만듭니다.
+    보고서 제목은 섹션 프롬프트(GOAL_TEMPLATE)에 들어가므로 제목이 다르면 다른 섹션으로 취급합니다.
+    """
+    return cache_utils.make_cache_key("section", {
+        "title": cache_utils.normalize_text(report_params.get("title", "")),
+        "company": cache_utils.normalize_text(report_params.get("company", "")),
+        "date": cache_utils.normalize_text(report_params.get("date", "")),
+        "indicator": cache_utils.normalize_text(report_params.get("indicator", "none")).lower(),
+        "section_number": section_number,
+        "section_title": cache_utils.normalize_text(section_title),
+        "subsections": subsections or {},
+        "evaluation_criteria": cache_utils.normalize_text(evaluation_criteria),
+        "models": [config.LLM_MODEL, config.KEYWORD_LLM_MODEL],
+        "corpus_version": cache_utils.get_corpus_version(),
+    })
+
+
+def _is_failed_section(content: str) -> bool:
+    return any(marker in content for marker in SECTION_ERROR_MARKERS)
+
+
+def _token_notifier(progress_callback: Optional[ProgressCallback], section_key: str,
+                    stream_tokens: bool) -> Optional[Callable[[str], None]]:
+    """LLM 토큰 스트리밍이 요청된 경우 section_token 이벤트를 발생시키는 콜백을 만듭니다."""
+    if not stream_tokens or progress_callback is None:
+        return None
+    return lambda delta: notify_progress(progress_callback, "section_token", section=section_key, delta=delta)
+
+
+def _generate_section_with_progress(section_key: str, section_title: str, report_params: Dict,
+                                    subsections: Dict, progress_callback: Optional[ProgressCallback],
+                                    stream_tokens: bool = False, keywords: Optional[str] = None,
+                                    retrieval: Optional[Dict[str, Any]] = None) -> str:
+    """generate_report_section 전후로 진행 상황 이벤트를 발생시킵니다."""
+    notify_progress(progress_callback, "section_started", section=section_key, title=section_title)
+    content = generate_report_section(
+        section_key, section_title, report_params, subsections,
+        on_token=_token_notifier(progress_callback, section_key, stream_tokens),
+        keywords=keywords, retrieval=retrieval
+    )
+    notify_progress(progress_callback, "section_completed", section=section_key, title=section_title, content=content)
+    return content
+
+
+def retrieve_sections_batch(keywords_by_section: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+    """
+    여러 섹션의 검색 키워드를 한 번에 임베딩하고, 컬렉션마다 모든 키워드 벡터로 한 번만 검색한 뒤
+    섹션별 결과로 나눕니다 (Milvus 검색 RPC: 섹션 수 x 컬렉션 수 -> 컬렉션 수).
+
+    Returns:
+        섹션 번호 -> {"embedding": 컬렉션별 쿼리 벡터, "retrieved_data": 검색 결과}
+        키워드가 없거나 임베딩에 실패한 섹션은 포함하지 않음 (섹션 단계에서 개별 처리)
+    """
+    section_keys = [key for key, keywords in keywords_by_section.items() if keywords and "오류" not in keywords]
+    if not section_keys:
+        return {}
+    batch_start = time.time()
+    texts = [keywords_by_section[key] for key in section_keys]
+    query_vectors = utils.get_query_vectors_for_collections_batch(texts, config.COLLECTION_NAMES)
+    for text in texts:
+        utils.record_query_usage(text)  # 자주 쓰이는 쿼리는 다음 시작 시 미리 임베딩
+    embedded = [
+        (key, vectors) for key, vectors in zip(section_keys, query_vectors)
+        if any(vector is not None for vector in vectors.values())
+    ]
+    if not embedded:
+        return {}
+    if config.HYBRID_SEARCH_ENABLED:
+        results = utils.hybrid_search_batch(
+            [keywords_by_section[key] for key, _ in embedded], [vectors for _, vectors in embedded],
+            config.COLLECTION_NAMES, config.SEARCH_TOP_K
+        )
+    else:
+        results = utils.search_milvus_batch(
+            [vectors for _, vectors in embedded], config.COLLECTION_NAMES, config.SEARCH_TOP_K
+        )
+    print(f"Batched retrieval for {len(embedded)} sections finished in {time.time() - batch_start:.2f}s.")
+    return {
+        key: {"embedding": vectors, "retrieved_data": retrieved_data}
+        for (key, vectors), retrieved_data in zip(embedded, results)
+    }
+
+
+def generate_sections_concurrently(section_jobs: List[Tuple[str, str, Dict]], report_params: Dict,
+                                   max_workers: Optional[int] = None,
+                                   progress_callback: Optional[ProgressCallback] = None,
+                                   stream_tokens: bool = False,
+                                   planned_keywords: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    서로 독립적인 섹션들을 스레드 풀에서 동시에 생성합니다.
+
+    Args:
+        section_jobs: (섹션 번호, 섹션 제목, 하위 섹션) 튜플 목록
+        report_params: 보고서 파라미터
+        max_workers: 최대 동시 실행 수 (None이면 config.SECTION_MAX_WORKERS, 1이면 순차 실행)
+            (SECTION_PIPELINE_ENABLED이면 공유 파이프라인의 단계별 워커 수가 동시 실행 수를 정하며,
+            LLM 단계 워커 수 PIPELINE_LLM_WORKERS의 기본값은 SECTION_MAX_WORKERS)
+        progress_callback: 섹션 시작/완료 시 호출되는 콜백 (선택)
+        stream_tokens: True이면 LLM 토큰마다 section_token 이벤트 발생
+        planned_keywords: 섹션 번호 -> 미리 생성된 검색 키워드 (없는 섹션은 개별 생성)
+            (두 섹션 이상이면 SECTION_BATCH_RETRIEVAL_ENABLED에 따라 임베딩/검색을 한 번에 실행)
+
+    Returns:
+        섹션 번호 -> 생성된 내용 (입력 순서 유지)
+    """
+    planned_keywords = planned_keywords or {}
+    # 키워드가 미리 계획된 섹션은 임베딩/검색을 보고서 단위로 한 번에 실행
+    retrievals = {}
+    if config.SECTION_BATCH_RETRIEVAL_ENABLED and len(planned_keywords) > 1:
+        retrievals = retrieve_sections_batch({
+            section_key: planned_keywords[section_key]
+            for section_key, _, _ in section_jobs if section_key in planned_keywords
+        })
+    if max_workers is None:
+        max_workers = config.SECTION_MAX_WORKERS
+    max_workers = max(1, min(max_workers, len(section_jobs) or 1))
+
+    # 동시 실행이 필요 없는 경우 기존처럼 순차 실행
+    if max_workers == 1:
+        return {
+            section_key: _generate_section_with_progress(
+                section_key, section_title, report_params, subsections, progress_callback, stream_tokens,
+                planned_keywords.get(section_key), retrievals.get(section_key)
+            )
+            for section_key, section_title, subsections in section_jobs
+        }
+
+    # 단계별 파이프라인: 한 섹션의 검색/LLM 호출과 다른 섹션의 키워드/임베딩 단계가 겹쳐서 실행됨
+    if config.SECTION_PIPELINE_ENABLED:
+        print(f"Generating {len(section_jobs)} sections through the staged pipeline...")
+        pipeline = get_section_pipeline()
+        futures = {
+            section_key: pipeline.submit(_create_section_task(
+                section_key, section_title, report_params, subsections,
+                on_token=_token_notifier(progress_callback, section_key, stream_tokens),
+                keywords=planned_keywords.get(section_key),
+                progress_callback=progress_callback,
+                retrieval=retrievals.get(section_key)
+            ))
+            for section_key, section_title, subsections in section_jobs
+        }
+        return {section_key: future.result()["content"] for section_key, future in futures.items()}
+
+    print(f"Generating {len(section_jobs)} sections concurrently (max_workers={max_workers})...")
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="report-section") as executor:
+        futures = {
+            section_key: executor.submit(
+                _generate_section_with_progress,
+                section_key, section_title, report_params, subsections, progress_callback, stream_tokens,
+                planned_keywords.get(section_key), retrievals.get(section_key)
+            )
+            for section_key, section_title, subsections in section_jobs
+        }
+        # 모든 섹션이 끝날 때까지 기다린 뒤 원래 순서대로 결과를 모음 (요약 생성 전 join)
+        return {section_key: future.result() for section_key, future in futures.items()}
 
 
 def generate_full_report(title="기업 분석 보고서", company="셀트리온", date="24년 4분기", 
-                        chapter="", indicator="none", evaluations="") -> str:
+                        chapter="", indicator="none", evaluations="",
+                        progress_callback: Optional[ProgressCallback] = None,
+                        stream_tokens: bool = False, use_cache: bool = True, refresh_cache: bool = False) -> str:
     """
     Orchestrates the generation of the full multi-section report.
     
@@ -184,6 +523,11 @@ def generate_full_report(title="기업 분석 보고서", company="셀트리온"
         chapter: 목차 목록 (중첩 구조 가능)
         indicator: 관심 지표 (없으면 'none')
         evaluations: 섹션별 평가 기준 (\n\n으로 구분)
+        progress_callback: 진행 상황 콜백 (report_started, section_started, section_completed 이벤트, 마지막에
+            report_completed: 목차, 섹션별 내용, 생성에 실패한 섹션 목록 failed_sections)
+        stream_tokens: True이면 LLM 토큰마다 section_token 이벤트도 발생
+        use_cache: False이면 섹션 캐시를 사용하지 않음
+        refresh_cache: True이면 섹션 캐시를 읽지 않고 새로 생성한 결과로 갱신
     """
     full_report_start_time = time.time()
     print(f"Starting full report generation for '{title}' about {company} ({date})...")
@@ -205,6 +549,9 @@ def generate_full_report(title="기업 분석 보고서", company="셀트리온"
     print(f"Parsed sections structure: {sections}")
     print(f"Main section numbers (no duplicates): {main_section_nums}")
     print(f"Summary section key: {summary_key}")
+
+    # 섹션 캐시 키에 사용할 섹션별 평가 기준 (build_base_prompt와 같은 방식으로 매핑)
+    section_evaluations = map_section_evaluations(evaluations, main_section_nums)
     
     # 중복 섹션 번호 확인
     section_count = {}
@@ -232,38 +579,73 @@ def generate_full_report(title="기업 분석 보고서", company="셀트리온"
     
     print(f"Generation order (after processing): {generation_order}")
     
-    generated_sections = {}
-
-    # Generate content sections first (excluding summary)
+    # Collect content sections first (excluding summary)
     processed_sections = set()  # 이미 처리된 섹션을 추적하기 위한 세트
-    
+    section_jobs = []
+
     for section_key in generation_order:
         if section_key in sections and section_key not in processed_sections:
             # 이미 처리된 섹션으로 표시
             processed_sections.add(section_key)
-            
+
             section_data = sections[section_key]
             section_title = section_data["title"]
             subsections = section_data.get("subsections", {})
-            
-            print(f"\nProcessing main section {section_key}: {section_title}")
-            
-            # 중복 섹션 생성 방지: 이미 생성된 섹션은 건너뛴다
-            if section_key in generated_sections:
-                print(f"Section {section_key} already generated. Skipping.")
-                continue
-            
-            # 해당 섹션 생성 (하위 섹션 정보 포함)
-            generated_content = generate_report_section(
-                section_key, 
-                section_title, 
-                report_params,
-                subsections
-            )
-            generated_sections[section_key] = generated_content
+
+            print(f"\nQueueing main section {section_key}: {section_title}")
+            section_jobs.append((section_key, section_title, subsections))
         else:
              print(f"Warning: Section key '{section_key}' not found in sections mapping or already processed.")
 
+    # 진행 상황 추적을 위해 생성할 섹션 목록(요약 포함)을 먼저 알림
+    planned_sections = [{"section": key, "title": title_} for key, title_, _ in section_jobs]
+    if summary_key and summary_key in sections:
+        planned_sections.insert(0, {"section": summary_key, "title": sections[summary_key]["title"]})
+    notify_progress(progress_callback, "report_started", sections=planned_sections, summary_section=summary_key)
+
+    # 섹션 캐시 확인: 캐시에 있는 섹션은 건너뛰고 바뀐 섹션만 생성
+    generated_sections = {}
+    section_cache_keys = {}
+    jobs_to_generate = []
+    for section_key, section_title, subsections in section_jobs:
+        if section_cache is None or not use_cache:
+            jobs_to_generate.append((section_key, section_title, subsections))
+            continue
+        cache_key = get_section_cache_key(
+            section_key, section_title, subsections, report_params, section_evaluations.get(section_key, "")
+        )
+        section_cache_keys[section_key] = cache_key
+        cached_content = None if refresh_cache else section_cache.get(cache_key)
+        if cached_content is not None:
+            print(f"Section {section_key} cache hit. Skipping generation.")
+            generated_sections[section_key] = cached_content
+            notify_progress(
+                progress_callback, "section_completed",
+                section=section_key, title=section_title, content=cached_content, cached=True
+            )
+        else:
+            jobs_to_generate.append((section_key, section_title, subsections))
+
+    # 생성할 섹션들의 검색 키워드를 한 번의 LLM 호출로 미리 계획 (섹션별 키워드 호출 N번 대신 1번)
+    planned_keywords = {}
+    if config.KEYWORD_BATCH_ENABLED and len(jobs_to_generate) > 1:
+        planned_keywords = utils.generate_keywords_for_sections(
+            [(section_key, section_title) for section_key, section_title, _ in jobs_to_generate],
+            company=company,
+            date=date
+        )
+
+    # 섹션 2~6은 서로 독립적이므로 동시에 생성 (하위 섹션 정보 포함)
+    new_sections = generate_sections_concurrently(
+        jobs_to_generate, report_params, progress_callback=progress_callback, stream_tokens=stream_tokens,
+        planned_keywords=planned_keywords
+    )
+    for section_key, content in new_sections.items():
+        generated_sections[section_key] = content
+        if section_key in section_cache_keys and not _is_failed_section(content):
+            section_cache.set(section_cache_keys[section_key], content)
+    print(f"Sections from cache: {len(section_jobs) - len(jobs_to_generate)}, generated: {len(jobs_to_generate)}")
+
     # Combine sections for summary context
     print("\nCombining generated sections for summary context...")
     combined_context_for_summary = "\n\n".join(
@@ -274,6 +656,7 @@ def generate_full_report(title="기업 분석 보고서", company="셀트리온"
     if summary_key and summary_key in sections:
         summary_section_title = sections[summary_key]["title"]
         print(f"\n--- Generating Section {summary_key}: {summary_section_title} ---")
+        notify_progress(progress_callback, "section_started", section=summary_key, title=summary_section_title)
         summary_start_time = time.time()
         
         # 동적으로 생성된 요약 프롬프트 사용
@@ -281,7 +664,8 @@ def generate_full_report(title="기업 분석 보고서", company="셀트리온"
             combined_context_for_summary,
             company=company,
             date=date,
-            title=title
+            title=title,
+            on_token=_token_notifier(progress_callback, summary_key, stream_tokens)
         )
         
         summary_end_time = time.time()
@@ -292,6 +676,10 @@ def generate_full_report(title="기업 분석 보고서", company="셀트리온"
         if not summary_content.strip().startswith(expected_summary_heading):
              summary_content = f"{expected_summary_heading}\n\n{summary_content}"
         generated_sections[summary_key] = summary_content
+        notify_progress(
+            progress_callback, "section_completed",
+            section=summary_key, title=summary_section_title, content=summary_content
+        )
     else:
         print("Warning: No summary section defined.")
 
@@ -310,6 +698,19 @@ def generate_full_report(title="기업 분석 보고서", company="셀트리온"
 
     final_report = "\n\n".join(final_report_parts)
 
+    # 보고서 캐시 저장 여부 판단과 캐시된 보고서의 이벤트 재전송에 사용 (요약은 마지막)
+    completed_sections = [
+        {"section": key, "title": sections[key]["title"], "content": generated_sections[key]}
+        for key in generation_order + [summary_key] if key in generated_sections
+    ]
+    failed_sections = [item["section"] for item in completed_sections if _is_failed_section(item["content"])]
+    if failed_sections:
+        print(f"Warning: Sections failed during generation: {failed_sections}")
+    notify_progress(
+        progress_callback, "report_completed", outline=planned_sections, summary_section=summary_key,
+        sections=completed_sections, failed_sections=failed_sections
+    )
+
     full_report_end_time = time.time()
     total_time = full_report_end_time - full_report_start_time
     print(f"\nFull report generation completed in {total_time:.2f} seconds.")
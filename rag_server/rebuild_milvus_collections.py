@@ -22,6 +22,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 # 프로젝트의 모듈 import
 import config
 import utils
+import cache_utils
+import lexical_index
 
 # 로깅을 위한 디렉토리
 LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rebuild_logs")
@@ -147,8 +149,14 @@ def download_original_data(collection_name: str, output_path: str) -> bool:
         print(f"Error downloading data from '{collection_name}': {e}")
         return False
 
-def rebuild_collection_from_source(collection_name: str, source_data_path: str) -> bool:
-    """원본 데이터로부터 Milvus 컬렉션 재구축"""
+def rebuild_collection_from_source(collection_name: str, source_data_path: str,
+                                   source_model: Optional[str] = None) -> bool:
+    """
+    원본 데이터로부터 Milvus 컬렉션 재구축
+
+    원본 임베딩을 만든 모델(source_model, 없으면 원본의 'embedding_model' 열)이 컬렉션에 묶인 모델과 다르면
+    텍스트 필드를 묶인 모델로 다시 임베딩합니다. 벡터 차원이 맞지 않으면 기존 컬렉션을 삭제하지 않고 중단합니다.
+    """
     print(f"Rebuilding collection '{collection_name}' from {source_data_path}...")
     
     # 1. 원본 데이터 로드
@@ -177,15 +185,49 @@ def rebuild_collection_from_source(collection_name: str, source_data_path: str)
                 print(f"Required field '{field}' not found in source data.")
                 return False
         
+        # 임베딩 벡터 형식 변환 (문자열 또는 리스트를 numpy 배열로)
+        if isinstance(df['embedding'].iloc[0], str):
+            df['embedding'] = df['embedding'].apply(lambda x: json.loads(x) if isinstance(x, str) else x)
+        
+        # 원본을 만든 모델이 컬렉션에 묶인 모델과 다르면 텍스트를 다시 임베딩
+        bound_model = utils.embedding_registry.model_for_collection(collection_name)
+        if source_model is None and "embedding_model" in df.columns:
+            source_models = df["embedding_model"].dropna().unique()
+            if len(source_models) > 0:
+                source_model = ", ".join(str(model) for model in source_models)  # 여러 모델이 섞였으면 모두 다시 임베딩
+        if "embedding_model" in df.columns:
+            df = df.drop(columns=["embedding_model"])
+        if source_model is not None and source_model != bound_model:
+            if collection_name not in config.COLLECTION_FIELD_MAPPINGS:
+                print(f"Cannot re-embed '{collection_name}' with '{bound_model}': no text field mapping.")
+                return False
+            print(f"Source embeddings were built with '{source_model}'. "
+                  f"Re-embedding {len(df)} records with '{bound_model}'...")
+            texts = [text if isinstance(text, str) else "" for text in df[text_field]]
+            embeddings = utils.get_embeddings_for_model(texts, bound_model)
+            if any(embedding is None for embedding in embeddings):
+                print(f"Re-embedding failed for {sum(e is None for e in embeddings)} records. Aborting rebuild.")
+                return False
+            df['embedding'] = [np.asarray(embedding, dtype=np.float32).tolist() for embedding in embeddings]
+        
+        # 기존 컬렉션을 삭제하기 전에 벡터 차원 확인
+        vector_dim = utils.embedding_registry.vector_dim_for_collection(collection_name)
+        source_dim = len(df['embedding'].iloc[0])
+        if source_dim != vector_dim:
+            print(f"Source embedding dim {source_dim} != '{bound_model}' dim {vector_dim} for '{collection_name}'. "
+                  f"Pass the source model to re-embed. Existing collection left unchanged.")
+            return False
+        
         # 3. 기존 컬렉션이 있으면 삭제
         if utility.has_collection(collection_name):
             utility.drop_collection(collection_name)
             print(f"Dropped existing collection '{collection_name}'")
+        lexical_index.reset_index(collection_name)
         
-        # 4. 스키마 정의
+        # 4. 스키마 정의 (컬렉션에 묶인 임베딩 모델의 벡터 차원)
         fields = [
             FieldSchema(name="id", dtype=DataType.INT64, is_primary=True),
-            FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=config.VECTOR_DIM)
+            FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=vector_dim)
         ]
         
         # 텍스트 및 기타 필드 추가
@@ -218,10 +260,6 @@ def rebuild_collection_from_source(collection_name: str, source_data_path: str)
         print(f"Created index on 'embedding' field")
         
         # 7. 데이터 삽입
-        # 임베딩 벡터 형식 변환 (문자열 또는 리스트를 numpy 배열로)
-        if isinstance(df['embedding'].iloc[0], str):
-            df['embedding'] = df['embedding'].apply(lambda x: json.loads(x) if isinstance(x, str) else x)
-        
         insert_data = []
         for _, row in df.iterrows():
             data_dict = row.to_dict()
@@ -232,6 +270,14 @@ def rebuild_collection_from_source(collection_name: str, source_data_path: str)
         
         collection.insert(insert_data)
         print(f"Inserted {len(insert_data)} records into '{collection_name}'")
+        # 삽입한 청크 텍스트를 BM25 색인에 세그먼트로 추가 (하이브리드 검색)
+        if collection_name in config.COLLECTION_FIELD_MAPPINGS:
+            lexical_index.add_documents(
+                collection_name, [record["id"] for record in insert_data],
+                [record[text_field] if isinstance(record[text_field], str) else "" for record in insert_data]
+            )
+        # 컬렉션 내용이 바뀌었으므로 코퍼스 버전에 묶인 캐시(보고서 캐시 등)를 무효화
+        cache_utils.bump_corpus_version()
         
         # 8. 컬렉션 로드 및 카운트 확인
         collection.load()
@@ -255,11 +301,13 @@ def create_dummy_data(collection_name: str, count: int = 100) -> bool:
         if utility.has_collection(collection_name):
             utility.drop_collection(collection_name)
             print(f"Dropped existing collection '{collection_name}'")
+        lexical_index.reset_index(collection_name)
         
-        # 2. 스키마 정의
+        # 2. 스키마 정의 (컬렉션에 묶인 임베딩 모델의 벡터 차원)
+        vector_dim = utils.embedding_registry.vector_dim_for_collection(collection_name)
         fields = [
             FieldSchema(name="id", dtype=DataType.INT64, is_primary=True),
-            FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=config.VECTOR_DIM)
+            FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=vector_dim)
         ]
         
         # 컬렉션별 필드 매핑에 따라 텍스트 필드 추가
@@ -298,7 +346,7 @@ def create_dummy_data(collection_name: str, count: int = 100) -> bool:
         dummy_data = []
         for i in range(count):
             # 임베딩 벡터 생성
-            embedding = np.random.random(config.VECTOR_DIM).tolist()
+            embedding = np.random.random(vector_dim).tolist()
             
             # 컬렉션별 더미 텍스트 생성
             if collection_name == "celltrion_embeddings":
@@ -326,6 +374,11 @@ def create_dummy_data(collection_name: str, count: int = 100) -> bool:
         # 6. 데이터 삽입
         collection.insert(dummy_data)
         print(f"Inserted {len(dummy_data)} dummy records into '{collection_name}'")
+        lexical_index.add_documents(
+            collection_name, [record["id"] for record in dummy_data], [record[text_field] for record in dummy_data]
+        )
+        # 컬렉션 내용이 바뀌었으므로 코퍼스 버전에 묶인 캐시(보고서 캐시 등)를 무효화
+        cache_utils.bump_corpus_version()
         
         # 7. 컬렉션 로드 및 카운트 확인
         collection.load()
@@ -432,6 +485,10 @@ if __name__ == "__main__":
                 connect_to_milvus()
                 for collection in config.COLLECTION_NAMES:
                     create_dummy_data(collection)
+        elif sys.argv[1] == "--rebuild" and len(sys.argv) > 3:
+            # --rebuild <collection> <source_path> [source_model]
+            connect_to_milvus()
+            rebuild_collection_from_source(sys.argv[2], sys.argv[3], sys.argv[4] if len(sys.argv) > 4 else None)
         elif sys.argv[1] == "--check":
             connect_to_milvus()
             for collection in config.COLLECTION_NAMES:
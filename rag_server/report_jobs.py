@@ -0,0 +1,253 @@
+# report_jobs.py
+"""
+비동기 보고서 생성 작업(Job) 관리 모듈
+
+POST /reports/jobs 로 접수된 보고서 생성 요청을 제한된 크기의 워커 풀에서 실행하고,
+섹션별 진행 상황과 최종 결과를 교체 가능한 저장소(메모리 / SQLite)에 TTL과 함께 보관합니다.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+import config
+
+# 작업 상태 값
+JOB_STATUS_QUEUED = "queued"
+JOB_STATUS_RUNNING = "running"
+JOB_STATUS_COMPLETED = "completed"
+JOB_STATUS_FAILED = "failed"
+
+# 섹션 상태 값
+SECTION_STATUS_PENDING = "pending"
+SECTION_STATUS_RUNNING = "running"
+SECTION_STATUS_COMPLETED = "completed"
+
+
+class JobQueueFullError(Exception):
+    """대기 중인 작업 수가 한도를 넘어 새 작업을 받을 수 없을 때 발생합니다."""
+
+
+# --- Job Stores ---
+class JobStore(ABC):
+    """작업 레코드(dict)를 저장하는 저장소 인터페이스. 레코드는 JSON 직렬화 가능해야 합니다."""
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+
+    @abstractmethod
+    def save(self, job: Dict[str, Any]) -> None:
+        ...
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def evict_expired(self) -> int:
+        """만료된 작업을 삭제하고 삭제된 개수를 반환합니다."""
+
+
+class InMemoryJobStore(JobStore):
+    """프로세스 메모리에 작업을 보관하는 저장소 (단일 워커 배포용)."""
+
+    def __init__(self, ttl_seconds: int):
+        super().__init__(ttl_seconds)
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._expires_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def save(self, job: Dict[str, Any]) -> None:
+        with self._lock:
+            # 외부에서 dict를 수정해도 저장된 값이 바뀌지 않도록 복사본 저장
+            self._jobs[job["job_id"]] = json.loads(json.dumps(job, ensure_ascii=False))
+            self._expires_at[job["job_id"]] = time.time() + self.ttl_seconds
+        self.evict_expired()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        self.evict_expired()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return json.loads(json.dumps(job, ensure_ascii=False)) if job is not None else None
+
+    def evict_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [job_id for job_id, expires_at in self._expires_at.items() if expires_at <= now]
+            for job_id in expired:
+                self._jobs.pop(job_id, None)
+                self._expires_at.pop(job_id, None)
+        return len(expired)
+
+
+class SQLiteJobStore(JobStore):
+    """SQLite 파일에 작업을 보관하는 저장소 (재시작 후에도 결과 조회 가능)."""
+
+    def __init__(self, db_path: str, ttl_seconds: int):
+        super().__init__(ttl_seconds)
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(db_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS report_jobs ("
+                "job_id TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_report_jobs_expires ON report_jobs (expires_at)")
+
+    def save(self, job: Dict[str, Any]) -> None:
+        data = json.dumps(job, ensure_ascii=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO report_jobs (job_id, data, expires_at) VALUES (?, ?, ?)",
+                (job["job_id"], data, time.time() + self.ttl_seconds)
+            )
+        self.evict_expired()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM report_jobs WHERE job_id = ? AND expires_at > ?",
+                (job_id, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def evict_expired(self) -> int:
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM report_jobs WHERE expires_at <= ?", (time.time(),))
+        return cursor.rowcount
+
+
+def create_job_store() -> JobStore:
+    """config.REPORT_JOB_STORE 설정에 따라 작업 저장소를 생성합니다."""
+    backend = config.REPORT_JOB_STORE.lower()
+    if backend == "sqlite":
+        print(f"Using SQLite report job store: {config.REPORT_JOB_DB_PATH}")
+        return SQLiteJobStore(config.REPORT_JOB_DB_PATH, config.REPORT_JOB_TTL_SECONDS)
+    if backend != "memory":
+        print(f"Warning: Unknown REPORT_JOB_STORE '{config.REPORT_JOB_STORE}'. Falling back to in-memory store.")
+    return InMemoryJobStore(config.REPORT_JOB_TTL_SECONDS)
+
+
+# --- Job Manager ---
+class ReportJobManager:
+    """
+    보고서 생성 작업을 제한된 워커 풀에서 실행하고 진행 상황을 저장소에 기록합니다.
+
+    max_workers 개의 작업이 동시에 실행되고, 나머지는 최대 max_pending 개까지 대기열에 쌓입니다.
+    """
+
+    def __init__(self, store: JobStore, max_workers: int, max_pending: int):
+        self.store = store
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="report-job")
+        self._pending = 0  # 대기 + 실행 중인 작업 수
+        self._lock = threading.Lock()
+
+    @property
+    def pending_count(self) -> int:
+        with self._lock:
+            return self._pending
+
+    def submit(self, run_report: Callable[[Callable[[str, Dict[str, Any]], None]], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        작업을 등록하고 즉시 작업 레코드를 반환합니다.
+
+        Args:
+            run_report: 진행 상황 콜백을 받아 보고서 결과(dict)를 반환하는 블로킹 함수
+
+        Raises:
+            JobQueueFullError: 대기 중인 작업이 max_pending 개 이상인 경우
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise JobQueueFullError(f"Too many pending report jobs ({self._pending}/{self.max_pending}).")
+            self._pending += 1
+
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": JOB_STATUS_QUEUED,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "sections": [],
+            "result": None,
+            "error": None,
+        }
+        self.store.save(job)
+        snapshot = dict(job)  # 워커 스레드가 job을 갱신하기 전의 상태를 반환
+        try:
+            self._executor.submit(self._run_job, job, run_report)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        print(f"Report job {job['job_id']} queued ({self.pending_count} pending).")
+        return snapshot
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(job_id)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    def _run_job(self, job: Dict[str, Any], run_report):
+        job_lock = threading.Lock()  # 섹션이 동시에 생성되므로 레코드 갱신을 직렬화
+
+        def on_progress(event: str, payload: Dict[str, Any]):
+            with job_lock:
+                if event == "report_started":
+                    job["sections"] = [
+                        {"section": item["section"], "title": item["title"], "status": SECTION_STATUS_PENDING}
+                        for item in payload.get("sections", [])
+                    ]
+                elif event in ("section_started", "section_completed"):
+                    status = SECTION_STATUS_RUNNING if event == "section_started" else SECTION_STATUS_COMPLETED
+                    for item in job["sections"]:
+                        if item["section"] == payload.get("section"):
+                            item["status"] = status
+                            break
+                    else:
+                        job["sections"].append({
+                            "section": payload.get("section"),
+                            "title": payload.get("title"),
+                            "status": status,
+                        })
+                else:
+                    return
+                self.store.save(job)
+
+        try:
+            with job_lock:
+                job["status"] = JOB_STATUS_RUNNING
+                job["started_at"] = time.time()
+                self.store.save(job)
+            print(f"Report job {job['job_id']} started.")
+
+            result = run_report(on_progress)
+
+            with job_lock:
+                job["status"] = JOB_STATUS_COMPLETED
+                job["result"] = result
+                job["finished_at"] = time.time()
+                self.store.save(job)
+            print(f"Report job {job['job_id']} completed.")
+        except Exception as e:
+            print(f"Report job {job['job_id']} failed: {e}")
+            traceback.print_exc()
+            with job_lock:
+                job["status"] = JOB_STATUS_FAILED
+                job["error"] = str(e)
+                job["finished_at"] = time.time()
+                self.store.save(job)
+        finally:
+            with self._lock:
+                self._pending -= 1
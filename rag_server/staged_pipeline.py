@@ -0,0 +1,136 @@
+# staged_pipeline.py
+"""
+단계별(Stage) 파이프라인 실행기
+
+각 단계는 자체 크기 제한 대기열과 워커 스레드를 가지며, 한 단계를 마친 작업은 다음 단계의 대기열로 넘어갑니다.
+예) 키워드(네트워크) -> 임베딩(CPU) -> 검색(네트워크) -> LLM(네트워크)
+섹션 N이 검색 중일 때 섹션 N+1의 키워드 호출이 동시에 진행되고,
+CPU를 쓰는 단계는 별도 워커에서 실행되므로 네트워크 단계를 막지 않습니다.
+
+다음 단계의 대기열이 가득 차면 앞 단계 워커가 기다리므로(backpressure) 메모리 사용량이 제한됩니다.
+"""
+
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+
+class PipelineStage:
+    """파이프라인의 한 단계: 처리 함수, 워커 수, 대기열 크기."""
+
+    def __init__(self, name: str, func: Callable[[Any], Any], workers: int = 1, queue_size: int = 16):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.queue: "queue.Queue" = queue.Queue(maxsize=max(1, queue_size))
+        self._lock = threading.Lock()
+        self._busy_workers = 0
+        self._busy_seconds = 0.0
+        self._processed = 0
+        self._failed = 0
+        self._started_at = time.time()
+
+    def _mark_busy(self):
+        with self._lock:
+            self._busy_workers += 1
+
+    def _mark_idle(self, elapsed: float, failed: bool):
+        with self._lock:
+            self._busy_workers -= 1
+            self._busy_seconds += elapsed
+            self._processed += 1
+            if failed:
+                self._failed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            uptime = max(time.time() - self._started_at, 1e-9)
+            return {
+                "workers": self.workers,
+                "queue_depth": self.queue.qsize(),
+                "queue_capacity": self.queue.maxsize,
+                "busy_workers": self._busy_workers,
+                # 시작 이후 워커들이 작업을 처리한 시간의 비율 (0~1)
+                "utilization": round(self._busy_seconds / (uptime * self.workers), 4),
+                "processed": self._processed,
+                "failed": self._failed,
+            }
+
+
+class StagedPipeline:
+    """
+    여러 PipelineStage를 순서대로 연결한 실행기.
+
+    submit(item)은 즉시 Future를 반환하며, 마지막 단계의 반환값으로 완료됩니다.
+    어느 단계에서든 예외가 발생하면 이후 단계는 건너뛰고 Future에 예외가 설정됩니다.
+    """
+
+    def __init__(self, name: str, stages: List[PipelineStage]):
+        if not stages:
+            raise ValueError("StagedPipeline requires at least one stage.")
+        self.name = name
+        self.stages = stages
+        self._threads: List[threading.Thread] = []
+        self._closed = False
+        for index, stage in enumerate(stages):
+            next_stage = stages[index + 1] if index + 1 < len(stages) else None
+            for worker_num in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._worker_loop, args=(stage, next_stage),
+                    name=f"{name}-{stage.name}-{worker_num}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+        print(f"Pipeline '{name}' started: " + ", ".join(f"{s.name}(workers={s.workers})" for s in stages))
+
+    def submit(self, item: Any, timeout: Optional[float] = None) -> Future:
+        """첫 단계 대기열에 작업을 넣습니다. 대기열이 가득 차면 자리가 날 때까지 기다립니다."""
+        if self._closed:
+            raise RuntimeError(f"Pipeline '{self.name}' is shut down.")
+        future: Future = Future()
+        future.set_running_or_notify_cancel()
+        self.stages[0].queue.put((item, future), timeout=timeout)
+        return future
+
+    def stats(self) -> Dict[str, Any]:
+        return {stage.name: stage.stats() for stage in self.stages}
+
+    def shutdown(self):
+        """워커들에게 종료 신호를 보냅니다 (대기 중인 작업은 처리하지 않음)."""
+        if self._closed:
+            return
+        self._closed = True
+        for stage in self.stages:
+            for _ in range(stage.workers):
+                try:
+                    stage.queue.put_nowait(None)
+                except queue.Full:
+                    pass  # 데몬 스레드이므로 프로세스 종료 시 함께 정리됨
+
+    def _worker_loop(self, stage: PipelineStage, next_stage: Optional[PipelineStage]):
+        while True:
+            entry = stage.queue.get()
+            if entry is None:
+                return
+            item, future = entry
+            stage._mark_busy()
+            start = time.time()
+            failed = False
+            try:
+                result = stage.func(item)
+            except Exception as e:
+                failed = True
+                print(f"Pipeline '{self.name}' stage '{stage.name}' failed: {e}")
+                traceback.print_exc()
+                future.set_exception(e)
+                continue
+            finally:
+                stage._mark_idle(time.time() - start, failed)
+
+            if next_stage is None:
+                future.set_result(result)
+            else:
+                next_stage.queue.put((result, future))  # 다음 단계가 가득 차면 대기 (backpressure)
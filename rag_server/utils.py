@@ -1,23 +1,45 @@
 # utils.py
-import torch
-from transformers import AutoTokenizer, AutoModel
-from pymilvus import connections, Collection, utility, MilvusException
+# torch / transformers는 무거우므로 모듈 import 시점이 아니라 initialize_models()에서 필요할 때 불러옵니다
+from pymilvus import connections, Collection, MilvusException
 from openai import OpenAI, OpenAIError
 import numpy as np
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Tuple, Union
 from pydantic import BaseModel
 import tempfile
+import json
+import heapq
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
 import os
 
 # Import config variables
 import config
+import cache_utils
 import prompts # 동적 프롬프트 함수 import
+from micro_batcher import MicroBatcher
+import vector_utils
+from embedding_cache import EmbeddingCache
+from embedding_registry import EmbeddingModelRegistry, encode_texts
+from collection_registry import CollectionRegistry
+import lexical_index
 
 # --- Global Variables for Model & Tokenizer ---
-# Load models only once when the module is imported
-tokenizer: Optional[AutoTokenizer] = None
-embedding_model: Optional[AutoModel] = None
-device: Optional[torch.device] = None
+# Loaded once, lazily (background warm-up on server startup or the first embedding call)
+tokenizer: Optional[Any] = None  # transformers AutoTokenizer
+embedding_model: Optional[Any] = None  # transformers AutoModel (torch 백엔드인 경우)
+device: Optional[Any] = None  # torch.device
+embedding_backend: Optional[Any] = None  # embedding_backends.EmbeddingBackend
+embedding_cache: Optional[EmbeddingCache] = None
+# 모델 로딩 상태 (/ready 엔드포인트와 RAG 요청의 준비 대기에 사용)
+_models_ready = threading.Event()
+_model_init_lock = threading.Lock()
+_model_status: Dict[str, Any] = {"state": "not_loaded", "error": None, "load_seconds": None, "warmup": None}
+_warmup_thread: Optional[threading.Thread] = None
+_warmup_thread_lock = threading.Lock()
+# 섹션을 동시에 생성할 때 (fast) 토크나이저/모델을 여러 스레드가 동시에 사용하지 않도록 보호
+_embedding_lock = threading.Lock()
 
 class StockInfo(BaseModel):
     retrieved_at: str  # API 호출 시각 (정보 가져온 시간)
@@ -63,25 +85,187 @@ class StockInfo(BaseModel):
     
     industry_per_info: Optional[str] = None # 동일업종 PER
 
+class ModelsNotReadyError(RuntimeError):
+    """임베딩 모델이 정해진 시간 안에 준비되지 않았거나 로딩에 실패한 경우 발생합니다."""
+
 def initialize_models():
-    """Initializes the tokenizer and embedding model."""
-    global tokenizer, embedding_model, device
-    if tokenizer is None or embedding_model is None:
+    """
+    Initializes the tokenizer and embedding model (backend selected by config.EMBEDDING_BACKEND).
+    Safe to call from several threads: only the first caller loads, the others wait for it.
+    """
+    global tokenizer, embedding_model, device, embedding_backend, embedding_cache
+    if _models_ready.is_set():
+        return
+    with _model_init_lock:
+        if _models_ready.is_set():
+            return
         print("Initializing embedding model and tokenizer...")
+        _model_status.update(state="loading", error=None)
+        load_start = time.time()
         try:
-            tokenizer = AutoTokenizer.from_pretrained(config.EMBEDDING_MODEL_NAME)
-            embedding_model = AutoModel.from_pretrained(config.EMBEDDING_MODEL_NAME)
-            device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-            embedding_model.to(device)
-            embedding_model.eval() # Set to evaluation mode
-            print(f"Embedding models initialized on device: {device}")
+            import embedding_backends
+
+            tokenizer = embedding_backends.load_tokenizer(config.EMBEDDING_MODEL_NAME)
+            embedding_backend = embedding_backends.create_embedding_backend(config.EMBEDDING_MODEL_NAME, tokenizer)
+            embedding_model = getattr(embedding_backend, "model", None)  # torch 백엔드인 경우에만 존재
+            device = embedding_backend.device
+            print(f"Embedding models initialized: {embedding_backend.describe()}")
+            if config.EMBEDDING_CACHE_ENABLED:
+                # 같은 문자열(기본 키워드, 반복되는 키워드 조합 등)은 forward pass 없이 재사용
+                embedding_cache = EmbeddingCache(
+                    model_id=embedding_backend.model_id,
+                    max_entries=config.EMBEDDING_CACHE_MAX_ENTRIES,
+                    db_path=config.EMBEDDING_CACHE_DB_PATH if config.EMBEDDING_CACHE_DISK_ENABLED else None,
+                    dtype=config.EMBEDDING_CACHE_DTYPE,
+                    memory_dtype=config.EMBEDDING_CACHE_MEMORY_DTYPE
+                )
         except Exception as e:
             print(f"Fatal Error initializing embedding models: {e}")
+            _model_status.update(state="failed", error=str(e))
             # Exit or raise a critical error if models can't load
             raise RuntimeError(f"Could not initialize embedding models: {e}")
+        _model_status.update(state="ready", load_seconds=round(time.time() - load_start, 2))
+        _models_ready.set()
+
+WARMUP_TEXTS = [
+    "모델 워밍업",
+    "셀트리온 24년 4분기 실적 분석 매출 영업이익 바이오시밀러 짐펜트라 램시마 SC 미국 유럽 시장 점유율 전망 " * 4,
+]
+
+def _run_warmup_passes(passes: int):
+    """배치 크기와 입력 길이를 바꿔가며 forward pass를 실행합니다 (첫 요청의 메모리 할당/JIT 비용을 미리 처리)."""
+    shapes = [[WARMUP_TEXTS[0]], [WARMUP_TEXTS[1]], WARMUP_TEXTS * max(1, config.EMBEDDING_BATCH_SIZE // 2)]
+    for i in range(passes):
+        _encode_batch(shapes[i % len(shapes)])
+
+def _warm_up_models():
+    try:
+        initialize_models()
+    except Exception as e:
+        print(f"Embedding model warm-up failed: {e}")
+        return
+    _model_status["warmup"] = {"state": "running"}
+    warmup_start = time.time()
+    try:
+        _run_warmup_passes(max(1, config.MODEL_WARMUP_PASSES))
+        _warm_up_collection_models()
+        precomputed = precompute_query_embeddings() if config.EMBEDDING_PRECOMPUTE_ON_STARTUP else None
+        _model_status["warmup"] = {
+            "state": "done",
+            "seconds": round(time.time() - warmup_start, 2),
+            "passes": max(1, config.MODEL_WARMUP_PASSES),
+            "precomputed": precomputed,
+        }
+        print(f"Embedding model warm-up finished ({_model_status['load_seconds']}s to load, "
+              f"{_model_status['warmup']['seconds']}s to warm up).")
+    except Exception as e:
+        _model_status["warmup"] = {"state": "failed", "error": str(e)}
+        print(f"Embedding model warm-up failed: {e}")
+
+def get_precompute_queries() -> List[str]:
+    """
+    미리 임베딩할 검색 쿼리 목록.
+    - 기본 보고서 템플릿(config.REPORT_SECTIONS)의 섹션별 기본/fallback 키워드
+    - 키워드 캐시에 남아 있는 같은 섹션의 생성 키워드 (다음 요청이 그대로 임베딩할 문자열)
+    - 최근 자주 쓰인 쿼리
+    """
+    queries = []
+    for target in config.EMBEDDING_PRECOMPUTE_TARGETS.split(","):
+        company, _, date = target.partition(":")
+        if not company.strip() or not date.strip():
+            continue
+        for section_number in config.SECTION_GENERATION_ORDER:
+            section_title = config.REPORT_SECTIONS[section_number]
+            queries.append(get_default_keywords(company.strip(), date.strip(), section_title))
+            cached_keywords = get_cached_keywords(section_number, section_title, company.strip(), date.strip())
+            if cached_keywords:
+                queries.append(cached_keywords)
+    queries.extend(get_frequent_queries(config.EMBEDDING_PRECOMPUTE_FREQUENT_QUERIES))
+    return list(dict.fromkeys(queries))  # 순서를 유지하며 중복 제거
+
+def precompute_query_embeddings(queries: Optional[List[str]] = None) -> Dict[str, Any]:
+    """예측 가능한 검색 쿼리를 미리 임베딩하여 임베딩 캐시에 넣습니다 (디스크 캐시에 있으면 메모리로만 불러옴)."""
+    if embedding_cache is None:
+        print("Embedding cache is disabled. Skipping query precompute.")
+        return {"queries": 0, "embedded": 0, "seconds": 0.0}
+    queries = get_precompute_queries() if queries is None else queries
+    start = time.time()
+    vectors = get_embeddings_local(queries)
+    embedded = sum(vector is not None for vector in vectors)
+    # 다른 모델에 묶인 컬렉션도 같은 쿼리로 검색하므로 함께 계산
+    for model_name in embedding_registry.group_collections_by_model(config.COLLECTION_NAMES):
+        if not embedding_registry.is_default(model_name):
+            get_embeddings_for_model(queries, model_name)
+    elapsed = round(time.time() - start, 2)
+    print(f"Precomputed {embedded}/{len(queries)} query embeddings in {elapsed}s.")
+    return {"queries": len(queries), "embedded": embedded, "seconds": elapsed}
+
+def start_model_warmup() -> Optional[threading.Thread]:
+    """서버 시작 시 호출: 백그라운드 스레드에서 모델을 불러와 워밍업합니다 (앱 시작을 막지 않음)."""
+    global _warmup_thread
+    if use_embedding_server():
+        print(f"Using embedding server at {config.EMBEDDING_SERVER_SOCKET}. Skipping local model warm-up.")
+        return None
+    with _warmup_thread_lock:
+        if _warmup_thread is None or not _warmup_thread.is_alive():
+            _warmup_thread = threading.Thread(target=_warm_up_models, name="model-warmup", daemon=True)
+            _warmup_thread.start()
+        return _warmup_thread
+
+def models_ready() -> bool:
+    return get_model_status()["ready"]
+
+def get_model_status() -> Dict[str, Any]:
+    if use_embedding_server():
+        try:
+            server_status = _get_embedding_client().status()
+        except Exception as e:
+            return {"state": "unreachable", "error": str(e), "ready": False, "mode": "server",
+                    "socket": config.EMBEDDING_SERVER_SOCKET}
+        return {key: server_status.get(key) for key in
+                ("state", "error", "load_seconds", "ready", "warming_up", "warmup", "model", "mode", "pid")}
+    return {
+        **_model_status,
+        "ready": _models_ready.is_set(),
+        # 모델은 준비되었지만 워밍업/쿼리 사전 계산이 진행 중인 상태 (READY_REQUIRES_WARMUP이면 /ready가 503)
+        "warming_up": _warmup_thread is not None and _warmup_thread.is_alive(),
+        "model": config.EMBEDDING_MODEL_NAME,
+        "mode": "local",
+    }
+
+def wait_for_models(timeout: Optional[float] = None) -> None:
+    """
+    임베딩 모델이 준비될 때까지 기다립니다 (워커 스레드에서 호출).
+    워밍업이 진행 중이 아니면 직접 로딩합니다.
+
+    Raises:
+        ModelsNotReadyError: timeout 안에 준비되지 않았거나 로딩에 실패한 경우
+    """
+    if use_embedding_server():
+        try:
+            _get_embedding_client().wait_until_ready(timeout)
+        except TimeoutError as e:
+            raise ModelsNotReadyError(str(e))
+        return
+    if _models_ready.is_set():
+        return
+    deadline = time.time() + timeout if timeout is not None else None
+    warmup_thread = _warmup_thread
+    # 워밍업 스레드가 끝날 때까지(성공 또는 실패) 기다림
+    while warmup_thread is not None and warmup_thread.is_alive():
+        if _models_ready.wait(0.5):
+            return
+        if deadline is not None and time.time() > deadline:
+            raise ModelsNotReadyError(f"Embedding models are still loading after {timeout}s.")
+    try:
+        initialize_models()
+    except RuntimeError as e:
+        raise ModelsNotReadyError(str(e))
 
-# Ensure models are initialized when this module is loaded
-initialize_models()
+def mean_pooling(model_output, attention_mask):
+    """Mean Pooling helper function."""
+    from embedding_backends import mean_pooling as _mean_pooling
+    return _mean_pooling(model_output, attention_mask)
 
 # --- Milvus Connection Management ---
 def ensure_milvus_connection():
@@ -100,156 +284,636 @@ def ensure_milvus_connection():
 # ensure_milvus_connection() # Connect on module load
 
 # --- Embedding Function ---
-def mean_pooling(model_output, attention_mask):
-    """Mean Pooling helper function."""
-    token_embeddings = model_output[0]
-    input_mask_expanded = attention_mask.unsqueeze(-1).expand(token_embeddings.size()).float()
-    sum_embeddings = torch.sum(token_embeddings * input_mask_expanded, 1)
-    sum_mask = torch.clamp(input_mask_expanded.sum(1), min=1e-9)
-    return sum_embeddings / sum_mask
+def _encode_batch(texts: List[str]) -> np.ndarray:
+    """텍스트 묶음을 한 번의 forward pass로 임베딩합니다 (shape: [len(texts), dim])."""
+    with _embedding_lock:
+        return embedding_backend.embed(texts, max_length=512)
+
+# --- Embedding Server Client ---
+_embedding_client = None
+_embedding_client_lock = threading.Lock()
+
+def use_embedding_server() -> bool:
+    """True이면 이 프로세스는 모델을 올리지 않고 로컬 임베딩 서버(embedding_server.py)에 요청합니다."""
+    return config.EMBEDDING_SERVER_ENABLED
+
+def _get_embedding_client():
+    global _embedding_client
+    with _embedding_client_lock:
+        if _embedding_client is None:
+            from embedding_server import EmbeddingClient
+            _embedding_client = EmbeddingClient(
+                config.EMBEDDING_SERVER_SOCKET, timeout=config.EMBEDDING_SERVER_TIMEOUT_SECONDS
+            )
+        return _embedding_client
+
+def get_embeddings(texts: List[str], batch_size: Optional[int] = None,
+                   check_cache: bool = True) -> List[Optional[np.ndarray]]:
+    """
+    Generates embedding vectors for several texts (via the embedding server if EMBEDDING_SERVER_ENABLED).
+    Results are returned in input order (None for texts that failed).
+    """
+    if not use_embedding_server():
+        return get_embeddings_local(texts, batch_size=batch_size, check_cache=check_cache)
+    if not texts:
+        return []
+    try:
+        return _get_embedding_client().embed([text or "" for text in texts])
+    except Exception as e:
+        print(f"Error requesting embeddings from embedding server ({config.EMBEDDING_SERVER_SOCKET}): {e}")
+        return [None] * len(texts)
+
+def get_embeddings_local(texts: List[str], batch_size: Optional[int] = None,
+                         check_cache: bool = True) -> List[Optional[np.ndarray]]:
+    """
+    Generates embedding vectors for several texts with the model loaded in this process.
+    Texts are sorted by length and encoded in buckets of batch_size so that each forward pass pads
+    to a similar length. Results are returned in input order (None for texts that failed).
+    Cached vectors are reused unless check_cache is False (new vectors are always stored).
+    """
+    if not texts:
+        return []
+    try:
+        initialize_models()  # 이미 로딩되었으면 즉시 반환, 로딩 중이면 완료될 때까지 대기
+    except RuntimeError:
+        print("Error: Embedding models not initialized.")
+        return [None] * len(texts)
+    return encode_texts(_encode_batch, texts, cache=embedding_cache, batch_size=batch_size, check_cache=check_cache)
+
+# 동시에 들어오는 단건 임베딩 요청을 모아 한 번에 인코딩하는 마이크로 배처 (처음 사용할 때 생성)
+_embedding_batcher: Optional[MicroBatcher] = None
+_embedding_batcher_lock = threading.Lock()
+
+def _get_embedding_batcher() -> MicroBatcher:
+    global _embedding_batcher
+    with _embedding_batcher_lock:
+        if _embedding_batcher is None:
+            _embedding_batcher = MicroBatcher(
+                "embedding",
+                # get_embedding에서 이미 캐시를 확인했으므로 다시 조회하지 않음
+                lambda texts: get_embeddings(texts, check_cache=False),
+                max_batch_size=config.EMBEDDING_MICROBATCH_MAX_SIZE,
+                max_wait_ms=config.EMBEDDING_MICROBATCH_MAX_WAIT_MS
+            )
+        return _embedding_batcher
+
+def get_embedding_stats() -> Dict[str, Any]:
+    """임베딩 백엔드, 캐시 적중률, 마이크로 배처 통계."""
+    if use_embedding_server():
+        try:
+            server_status = _get_embedding_client().status()
+            return {"mode": "server", "server": server_status.get("embedding"), "batcher": server_status.get("batcher")}
+        except Exception as e:
+            return {"mode": "server", "error": str(e)}
+    with _embedding_batcher_lock:
+        batcher = _embedding_batcher
+    return {
+        "backend": embedding_backend.describe() if embedding_backend is not None else None,
+        "cache": embedding_cache.stats() if embedding_cache is not None else None,
+        "micro_batcher": batcher.stats() if batcher is not None else None,
+        "registry": embedding_registry.stats(),
+        "long_text": get_long_text_stats(),
+    }
 
 def get_embedding(text: str) -> Optional[np.ndarray]:
     """Generates an embedding vector for the given text."""
-    if not tokenizer or not embedding_model or not device:
+    if use_embedding_server():
+        # 서버가 여러 워커의 요청을 모아 배치 처리하고 캐시도 공유하므로 로컬 배처/캐시는 사용하지 않음
+        embedding = get_embeddings([text])[0]
+        return vector_utils.as_query_vector(embedding) if embedding is not None else None
+    try:
+        initialize_models()
+    except RuntimeError:
         print("Error: Embedding models not initialized.")
         return None
     try:
-        encoded_input = tokenizer(
-            text, padding=True, truncation=True, max_length=512, return_tensors='pt'
-        ).to(device)
-        with torch.no_grad():
-            model_output = embedding_model(**encoded_input)
-        embedding = mean_pooling(model_output, encoded_input['attention_mask'])
-        return embedding.cpu().numpy().flatten() # Return as NumPy array
+        cached = embedding_cache.get(text) if embedding_cache is not None else None
+        if cached is not None:
+            return cached  # 캐시 적중: 마이크로 배처 대기 없이 바로 반환
+        if config.EMBEDDING_MICROBATCH_ENABLED:
+            embedding = _get_embedding_batcher()(text)
+        else:
+            embedding = get_embeddings([text], check_cache=False)[0]
+        if embedding is None:
+            raise RuntimeError("embedding batch failed")
+        return vector_utils.as_query_vector(embedding) # 연속된 float32 NumPy 배열 (복사 없음)
     except Exception as e:
         print(f"Error generating embedding for text '{text[:50]}...': {e}")
         return None
 
-# --- Milvus Search Function ---
-def search_milvus(query_vector: np.ndarray, collection_names_list: List[str], top_k_total: int) -> List[Dict[str, Any]]:
-    """Searches multiple Milvus collections and returns merged, sorted results."""
-    ensure_milvus_connection() # Ensure connection before searching
-    all_retrieved_chunks = []
-    query_list = [query_vector.tolist()] # Milvus search expects a list of vectors
+# --- Per-Collection Embedding Models ---
+# 컬렉션마다 다른 임베딩 모델을 쓸 수 있도록 (예: 뉴스 코퍼스는 더 작은 모델) 바인딩과 추가 모델을 관리
+embedding_registry = EmbeddingModelRegistry(
+    default_model_name=config.EMBEDDING_MODEL_NAME,
+    default_vector_dim=config.VECTOR_DIM,
+    collection_mappings=config.COLLECTION_FIELD_MAPPINGS
+)
 
-    for c_name in collection_names_list:
-        print(f"\nSearching in collection: '{c_name}'...")
-        if not utility.has_collection(c_name):
-            print(f"  Warning: Collection '{c_name}' does not exist. Skipping.")
-            continue
+def get_embeddings_for_model(texts: List[str], model_name: Optional[str] = None) -> List[Optional[np.ndarray]]:
+    """지정한 모델로 임베딩합니다. 기본 모델은 get_embeddings 경로, 그 외 모델은 레지스트리(또는 임베딩 서버)를 사용합니다."""
+    model_name = model_name or config.EMBEDDING_MODEL_NAME
+    if embedding_registry.is_default(model_name):
+        return get_embeddings(texts)
+    if not texts:
+        return []
+    if use_embedding_server():
+        try:
+            return _get_embedding_client().embed([text or "" for text in texts], model=model_name)
+        except Exception as e:
+            print(f"Error requesting '{model_name}' embeddings from embedding server: {e}")
+            return [None] * len(texts)
+    return embedding_registry.get_model(model_name).embed(texts)
 
-        if c_name not in config.COLLECTION_FIELD_MAPPINGS:
-            print(f"  Warning: Field mapping for collection '{c_name}' not found in config. Skipping.")
-            continue
+def get_query_vectors_for_collections(text: str, collection_names: List[str]) -> Dict[str, Optional[np.ndarray]]:
+    """
+    검색 쿼리를 컬렉션별 임베딩 모델로 임베딩합니다. 같은 모델을 쓰는 컬렉션끼리는 한 번만 임베딩합니다.
+
+    Returns:
+        컬렉션 이름 -> 쿼리 벡터 (임베딩에 실패한 모델의 컬렉션은 None)
+    """
+    vectors: Dict[str, Optional[np.ndarray]] = {}
+    for model_name, model_collections in embedding_registry.group_collections_by_model(collection_names).items():
+        if embedding_registry.is_default(model_name):
+            vector = get_embedding(text)  # 마이크로 배처/캐시 경로
+        else:
+            vector = get_embeddings_for_model([text], model_name)[0]
+            vector = vector_utils.as_query_vector(vector) if vector is not None else None
+        for collection_name in model_collections:
+            vectors[collection_name] = vector
+    return vectors
+
+def get_query_vectors_for_collections_batch(texts: List[str],
+                                            collection_names: List[str]) -> List[Dict[str, Optional[np.ndarray]]]:
+    """
+    여러 검색 쿼리를 컬렉션별 임베딩 모델로 한 번에 임베딩합니다 (모델마다 배치 한 번).
+
+    Returns:
+        쿼리별 (컬렉션 이름 -> 쿼리 벡터) 목록 (입력 순서, 임베딩에 실패한 경우 None)
+    """
+    vectors: List[Dict[str, Optional[np.ndarray]]] = [{} for _ in texts]
+    for model_name, model_collections in embedding_registry.group_collections_by_model(collection_names).items():
+        embeddings = get_embeddings_for_model(texts, model_name)
+        for query_vectors, embedding in zip(vectors, embeddings):
+            vector = vector_utils.as_query_vector(embedding) if embedding is not None else None
+            for collection_name in model_collections:
+                query_vectors[collection_name] = vector
+    return vectors
+
+def _warm_up_collection_models():
+    """검색 대상 컬렉션에 묶인 (기본 모델이 아닌) 모델을 미리 불러옵니다."""
+    for model_name in embedding_registry.group_collections_by_model(config.COLLECTION_NAMES):
+        if not embedding_registry.is_default(model_name):
+            get_embeddings_for_model(WARMUP_TEXTS[:1], model_name)
+
+# --- Long Text Embedding ---
+# 512 토큰을 넘는 문서/보고서/요약은 잘라내지 않고 겹치는 토큰 윈도우로 나누어 임베딩한 뒤 풀링
+LONG_TEXT_POOLING_MODES = ("mean", "token_count")
+
+# 긴 텍스트 임베딩 통계 (truncated_texts가 늘면 LONG_TEXT_MAX_WINDOWS를 확인)
+_long_text_stats = {"texts": 0, "windows": 0, "truncated_texts": 0}
+_long_text_stats_lock = threading.Lock()
+
+def split_token_windows(text: str, window_tokens: Optional[int] = None,
+                        stride_tokens: Optional[int] = None) -> Tuple[List[List[int]], bool]:
+    """
+    텍스트를 한 번만 토큰화하고 겹치는 토큰 윈도우로 나눕니다.
+
+    Returns:
+        (윈도우별 토큰 ID 목록(특수 토큰 제외), LONG_TEXT_MAX_WINDOWS에서 잘렸는지 여부)
+    """
+    initialize_models()
+    window_tokens = max(1, window_tokens or config.LONG_TEXT_WINDOW_TOKENS)
+    stride_tokens = config.LONG_TEXT_OVERLAP_TOKENS if stride_tokens is None else stride_tokens
+    step = max(1, window_tokens - stride_tokens)
+    with _embedding_lock:
+        token_ids = tokenizer(text or "", add_special_tokens=False, truncation=False, verbose=False)["input_ids"]
+
+    windows = []
+    start = 0
+    while True:
+        windows.append(token_ids[start:start + window_tokens])
+        if start + window_tokens >= len(token_ids):
+            return windows, False
+        if len(windows) >= config.LONG_TEXT_MAX_WINDOWS:
+            covered = start + window_tokens
+            print(f"Warning: Long text truncated at {len(windows)} windows "
+                  f"({covered}/{len(token_ids)} tokens embedded, LONG_TEXT_MAX_WINDOWS={config.LONG_TEXT_MAX_WINDOWS}).")
+            return windows, True
+        start += step
+
+def pool_window_embeddings(vectors: np.ndarray, token_counts: List[int], pooling: str = "token_count") -> np.ndarray:
+    """
+    윈도우 임베딩을 하나의 벡터로 합칩니다.
+    - mean: 윈도우 벡터의 단순 평균
+    - token_count: 윈도우의 토큰 수로 가중 평균 (짧은 마지막 윈도우의 영향이 작아짐)
+    """
+    if pooling == "mean":
+        return vectors.mean(axis=0)
+    weights = np.asarray(token_counts, dtype=np.float32)
+    return (vectors * weights[:, np.newaxis]).sum(axis=0) / max(float(weights.sum()), 1e-9)
 
-        mapping = config.COLLECTION_FIELD_MAPPINGS[c_name]
-        output_fields = mapping["output_fields"]
-        text_field = mapping["text_field"]
+def get_long_text_stats() -> Dict[str, int]:
+    with _long_text_stats_lock:
+        return dict(_long_text_stats)
 
+def get_long_text_embeddings_local(texts: List[str], pooling: Optional[str] = None) -> List[Optional[np.ndarray]]:
+    """모든 텍스트의 윈도우를 모아 길이순 배치로 임베딩한 뒤 텍스트별로 풀링합니다 (이 프로세스의 모델 사용)."""
+    pooling = pooling or config.LONG_TEXT_POOLING
+    if pooling not in LONG_TEXT_POOLING_MODES:
+        print(f"Warning: Unknown long text pooling '{pooling}'. Using 'token_count'.")
+        pooling = "token_count"
+    try:
+        initialize_models()
+    except RuntimeError:
+        print("Error: Embedding models not initialized.")
+        return [None] * len(texts)
+
+    # 캐시 키에 풀링/윈도우 설정을 포함하여 일반(잘린) 임베딩과 구분
+    cache_texts = [
+        f"long:{pooling}:{config.LONG_TEXT_WINDOW_TOKENS}:{config.LONG_TEXT_OVERLAP_TOKENS}\0{text or ''}"
+        for text in texts
+    ]
+    results: List[Optional[np.ndarray]] = (
+        embedding_cache.get_many(cache_texts) if embedding_cache is not None else [None] * len(texts)
+    )
+
+    all_windows = []  # (텍스트 인덱스, 토큰 윈도우)
+    truncated_texts = 0
+    for i, text in enumerate(texts):
+        if results[i] is None:
+            windows, truncated = split_token_windows(text)
+            truncated_texts += truncated
+            all_windows.extend((i, window) for window in windows)
+    with _long_text_stats_lock:
+        _long_text_stats["texts"] += sum(result is None for result in results)
+        _long_text_stats["windows"] += len(all_windows)
+        _long_text_stats["truncated_texts"] += truncated_texts
+
+    window_vectors: Dict[int, List[Tuple[np.ndarray, int]]] = {}
+    order = sorted(range(len(all_windows)), key=lambda k: len(all_windows[k][1]))
+    batch_size = max(1, config.EMBEDDING_BATCH_SIZE)
+    failed = set()
+    for start in range(0, len(order), batch_size):
+        bucket = [all_windows[k] for k in order[start:start + batch_size]]
         try:
-            collection = Collection(c_name)
-            # Ensure collection is loaded before searching
-            if not utility.load_state(c_name) == "Loaded":
-                 print(f"  Loading collection '{c_name}'...")
-                 collection.load()
-                 utility.wait_for_loading_complete(c_name)
-                 print(f"  Collection '{c_name}' loaded.")
-            else:
-                 print(f"  Collection '{c_name}' is already loaded.")
-
-            print(f"  Executing search with top_k={top_k_total}...")
-            search_results = collection.search(
-                data=query_list,
-                anns_field="embedding", # Assuming the vector field is named 'embedding'
-                param=config.SEARCH_PARAMS,
-                limit=top_k_total, # Fetch enough to sort later
-                output_fields=output_fields
+            with _embedding_lock:
+                vectors = embedding_backend.embed_token_windows([window for _, window in bucket])
+            for (i, window), vector in zip(bucket, vectors):
+                window_vectors.setdefault(i, []).append((vector, len(window) + 2))  # [CLS], [SEP] 포함
+        except Exception as e:
+            print(f"Error embedding a batch of {len(bucket)} long text windows: {e}")
+            failed.update(i for i, _ in bucket)
+
+    new_texts, new_vectors = [], []
+    for i, items in window_vectors.items():
+        if i in failed:
+            continue
+        results[i] = pool_window_embeddings(
+            np.stack([vector for vector, _ in items]), [count for _, count in items], pooling
+        ).astype(np.float32)
+        new_texts.append(cache_texts[i])
+        new_vectors.append(results[i])
+    if embedding_cache is not None and new_texts:
+        embedding_cache.set_many(new_texts, new_vectors)
+    return results
+
+def get_long_text_embeddings(texts: List[str], pooling: Optional[str] = None) -> List[Optional[np.ndarray]]:
+    """
+    Embeds texts of any length (documents, reports, summaries) without truncation at 512 tokens.
+    Each text is split into overlapping token windows, the windows are embedded in batches and pooled.
+    """
+    if not texts:
+        return []
+    if not use_embedding_server():
+        return get_long_text_embeddings_local(texts, pooling)
+    try:
+        return _get_embedding_client().embed([text or "" for text in texts], long_text_pooling=pooling or config.LONG_TEXT_POOLING)
+    except Exception as e:
+        print(f"Error requesting long text embeddings from embedding server: {e}")
+        return [None] * len(texts)
+
+def get_long_text_embedding(text: str, pooling: Optional[str] = None) -> Optional[np.ndarray]:
+    """get_long_text_embeddings의 단건 버전."""
+    return get_long_text_embeddings([text], pooling)[0]
+
+# --- Milvus Search Function ---
+# 컬렉션 검색을 동시에 실행하는 스레드 풀 (모든 요청이 공유, 처음 사용할 때 생성)
+_search_executor: Optional[ThreadPoolExecutor] = None
+_search_executor_lock = threading.Lock()
+
+def _get_search_executor() -> ThreadPoolExecutor:
+    global _search_executor
+    with _search_executor_lock:
+        if _search_executor is None:
+            _search_executor = ThreadPoolExecutor(
+                max_workers=max(1, config.MILVUS_SEARCH_MAX_WORKERS), thread_name_prefix="milvus-search"
             )
-            print(f"  Search completed for '{c_name}'. Processing results...")
-
-            if search_results and search_results[0]:
-                for hit in search_results[0]:
-                    try:
-                        # 디버깅을 위한 로깅 추가
-                        print(f"  Processing hit ID: {hit.id}")
-                        entity_data = hit.entity.to_dict()
-                        
-                        # 엔티티 데이터 로깅 (처음 5개 필드만)
-                        print(f"  Entity data keys: {list(entity_data.keys())[:5]}")
-                        print(f"  Text field name: {text_field}")
-                        
-                        # 텍스트 필드가 없는 경우 직접 쿼리
-                        if text_field not in entity_data or not entity_data.get(text_field):
-                            print(f"  Text field '{text_field}' not found in entity or empty. Trying direct query...")
-                            
-                            # ID로 직접 쿼리하여 모든 필드 가져오기
-                            query_result = collection.query(
-                                expr=f"id == {hit.id}",
-                                output_fields=["*"],
-                                limit=1
-                            )
-                            
-                            if query_result and len(query_result) > 0:
-                                direct_data = query_result[0]
-                                print(f"  Direct query result keys: {list(direct_data.keys())[:5]}")
-                                
-                                # 직접 쿼리에서 텍스트 필드 추출
-                                if text_field in direct_data:
-                                    entity_data[text_field] = direct_data[text_field]
-                                    print(f"  Text retrieved from direct query: {entity_data[text_field][:50]}...")
-                                else:
-                                    print(f"  Warning: Text field '{text_field}' still not found after direct query")
-                            else:
-                                print(f"  Warning: No results from direct query for ID {hit.id}")
-                        
-                        # 텍스트 값 확인 로깅
-                        text_value = entity_data.get(text_field, "")
-                        print(f"  Text value type: {type(text_value)}, empty: {not bool(text_value)}")
-                        if text_value:
-                            print(f"  Text preview: {text_value[:50]}...")
-                        else:
-                            print(f"  Warning: Empty text for ID {hit.id}")
-                                                        
-                        chunk_data = {
-                            "collection": c_name,
-                            "id": hit.id,
-                            "score": hit.distance,
-                            "source_type": c_name, # Default source type
-                            "text": entity_data.get(text_field, "") # Get the main text
-                        }
-                        # Add other metadata fields specified in output_fields
-                        for field in output_fields:
-                            if field != text_field and field in entity_data:
-                                chunk_data[field] = entity_data[field]
-                            # Handle potential default value overrides if schema had source_type
-                            # if field == "source_type" and "source_type" in entity_data:
-                            #    chunk_data["source_type"] = entity_data["source_type"]
-
-                        # 디버깅용 로깅 추가
-                        print(f"  Final chunk data: id={chunk_data['id']}, has_text={bool(chunk_data['text'])}")
-                        all_retrieved_chunks.append(chunk_data)
-                    except Exception as process_err:
-                        print(f"  Warning: Error processing hit ID {getattr(hit, 'id', 'N/A')} in '{c_name}': {process_err}")
-                        import traceback
-                        traceback.print_exc()
-                        continue # Skip to next hit
-
-                print(f"  Added {len(search_results[0])} results from '{c_name}'.")
-            else:
-                 print(f"  No results found in '{c_name}'.")
-
-        except MilvusException as me:
-            print(f"  Milvus error searching collection '{c_name}': {me}")
-        except Exception as search_err:
-            print(f"  Unexpected error searching collection '{c_name}': {search_err}")
-            import traceback
-            traceback.print_exc()
-
-    # Sort all collected chunks by score (ascending for L2 distance) and limit
-    if all_retrieved_chunks:
-        all_retrieved_chunks.sort(key=lambda x: x['score'])
-        print(f"\nTotal results from all collections: {len(all_retrieved_chunks)}")
-        final_chunks = all_retrieved_chunks[:top_k_total]
+        return _search_executor
+
+def shutdown_search_executor():
+    global _search_executor
+    with _search_executor_lock:
+        if _search_executor is not None:
+            _search_executor.shutdown(wait=False)
+            _search_executor = None
+
+# 컬렉션 핸들/스키마/로드 상태를 한 번 확인해 재사용 (MilvusException 또는 코퍼스 버전 변경 시 다시 확인)
+collection_registry = CollectionRegistry(
+    collection_mappings=config.COLLECTION_FIELD_MAPPINGS,
+    missing_retry_seconds=config.MILVUS_MISSING_COLLECTION_RETRY_SECONDS,
+    version_check_seconds=config.MILVUS_CORPUS_VERSION_CHECK_SECONDS
+)
+
+def validate_collections() -> Dict[str, Dict[str, Any]]:
+    """
+    COLLECTION_FIELD_MAPPINGS의 컬렉션이 존재하고 스키마(텍스트/출력 필드, 벡터 차원)가 설정과 맞는지
+    collection_registry로 확인합니다 (확인한 핸들은 이후 검색에서 재사용).
+    """
+    ensure_milvus_connection()
+    collection_names = list(config.COLLECTION_FIELD_MAPPINGS)
+    expected_dims = {name: embedding_registry.configured_vector_dim(name) for name in collection_names}
+    return collection_registry.validate(collection_names, expected_dims)
+
+def start_collection_validation():
+    """시작 시 컬렉션 검증을 백그라운드 스레드에서 실행합니다 (Milvus가 늦게 떠도 앱 시작을 막지 않음)."""
+    def _run():
+        try:
+            validate_collections()
+        except Exception as e:
+            print(f"Warning: Milvus collection validation failed: {e}")
+
+    threading.Thread(target=_run, name="collection-validation", daemon=True).start()
+
+def is_distance_metric() -> bool:
+    """L2처럼 값이 작을수록 가까운 metric이면 True (IP, COSINE은 클수록 가까움)."""
+    return str(config.SEARCH_PARAMS.get("metric_type", "L2")).upper() not in ("IP", "COSINE")
+
+def merge_top_k(result_lists: List[List[Dict[str, Any]]], top_k: int) -> List[Dict[str, Any]]:
+    """
+    컬렉션별로 이미 점수순으로 정렬된 결과를 힙 기반 k-way merge로 합쳐 상위 top_k개만 반환합니다
+    (전체를 정렬한 뒤 자르지 않음).
+    """
+    if is_distance_metric():
+        merged = heapq.merge(*result_lists, key=lambda chunk: chunk["score"])
+    else:
+        merged = heapq.merge(*result_lists, key=lambda chunk: -chunk["score"])
+    return list(itertools.islice(merged, top_k))
+
+# --- Hit Text Hydration ---
+# 검색 결과(hit.entity)에 텍스트가 없을 때 채운 텍스트를 재사용 ((코퍼스 버전, 컬렉션, ID) -> 텍스트, 메모리 전용)
+hit_text_cache = cache_utils.LRUTTLCache(
+    name="hit_texts",
+    max_entries=config.HIT_TEXT_CACHE_MAX_ENTRIES,
+    ttl_seconds=config.HIT_TEXT_CACHE_TTL_SECONDS
+) if config.HIT_TEXT_CACHE_ENABLED else None
+
+# 컬렉션별 텍스트 채우기 통계 (hydration_rate가 높으면 output_fields 설정을 확인)
+# - hits, missing_text_hits: 검색 히트 단위 (같은 ID가 여러 쿼리에 나오면 여러 번 셈)
+# - missing_ids, cache_hits, queried_ids, not_found: 호출마다 중복을 제거한 ID 단위 (missing_ids = cache_hits + queried_ids)
+_hydration_stats: Dict[str, Dict[str, int]] = {}
+_hydration_stats_lock = threading.Lock()
+
+def _record_hydration(c_name: str, **counts: int):
+    with _hydration_stats_lock:
+        stats = _hydration_stats.setdefault(c_name, {
+            "hits": 0, "missing_text_hits": 0, "missing_ids": 0, "cache_hits": 0, "queried_ids": 0, "query_rpcs": 0,
+            "not_found": 0
+        })
+        for name, count in counts.items():
+            stats[name] += count
+
+def get_hydration_stats() -> Dict[str, Dict[str, Any]]:
+    with _hydration_stats_lock:
+        return {
+            c_name: {**stats,
+                     "hydration_rate": round(stats["missing_text_hits"] / stats["hits"], 4) if stats["hits"] else 0.0}
+            for c_name, stats in _hydration_stats.items()
+        }
+
+def _hydrate_hit_texts(collection: Collection, c_name: str, text_field: str, missing_ids: List[Any],
+                       hit_count: int) -> Dict[Any, str]:
+    """
+    텍스트가 없는 히트의 텍스트를 ID→텍스트 캐시와 한 번의 `id in [...]` 쿼리로 가져옵니다.
+    반환값은 ID -> 텍스트 (찾지 못한 ID는 포함하지 않음).
+    """
+    unique_ids = list(dict.fromkeys(missing_ids))
+    _record_hydration(c_name, hits=hit_count, missing_text_hits=len(missing_ids), missing_ids=len(unique_ids))
+    if not unique_ids:
+        return {}
+    print(f"  Text field '{text_field}' missing for {len(missing_ids)}/{hit_count} hits "
+          f"({len(unique_ids)} unique IDs) in '{c_name}' (check output_fields). Hydrating in one query...")
+
+    texts: Dict[Any, str] = {}
+    corpus_version = cache_utils.get_corpus_version() # 재구축 후에는 이전 텍스트를 사용하지 않음
+    if hit_text_cache is not None:
+        for hit_id in unique_ids:
+            text = hit_text_cache.get(f"{corpus_version}:{c_name}:{hit_id}")
+            if text is not None:
+                texts[hit_id] = text
+    to_query = [hit_id for hit_id in unique_ids if hit_id not in texts]
+    _record_hydration(c_name, cache_hits=len(texts))
+    if not to_query:
+        return texts
+
+    try:
+        # json.dumps: 정수 ID는 그대로, 문자열 ID는 따옴표로 감싼 Milvus 리스트 표현
+        query_result = collection.query(
+            expr=f"id in {json.dumps(to_query, ensure_ascii=False)}",
+            output_fields=["id", text_field],
+            limit=len(to_query)
+        )
+    except Exception as e:
+        print(f"  Warning: Text hydration query failed for '{c_name}': {e}")
+        _record_hydration(c_name, query_rpcs=1, queried_ids=len(to_query), not_found=len(to_query))
+        return texts
+
+    for row in query_result or []:
+        hit_id, text = row.get("id"), row.get(text_field)
+        if text:
+            texts[hit_id] = text
+            if hit_text_cache is not None:
+                hit_text_cache.set(f"{corpus_version}:{c_name}:{hit_id}", text)
+    not_found = [hit_id for hit_id in to_query if hit_id not in texts]
+    _record_hydration(c_name, query_rpcs=1, queried_ids=len(to_query), not_found=len(not_found))
+    if not_found:
+        print(f"  Warning: No text found for {len(not_found)} IDs in '{c_name}' after hydration query.")
+    return texts
+
+def _build_chunk(c_name: str, hit_id: Any, score: Optional[float], entity_data: Dict[str, Any], text_field: str,
+                 output_fields: List[str]) -> Dict[str, Any]:
+    chunk_data = {
+        "collection": c_name,
+        "id": hit_id,
+        "score": score,
+        "source_type": c_name, # Default source type
+        "text": entity_data.get(text_field, "") # Get the main text
+    }
+    # Add other metadata fields specified in output_fields
+    for field in output_fields:
+        if field != text_field and field in entity_data:
+            chunk_data[field] = entity_data[field]
+        # Handle potential default value overrides if schema had source_type
+        # if field == "source_type" and "source_type" in entity_data:
+        #    chunk_data["source_type"] = entity_data["source_type"]
+    return chunk_data
+
+def _search_collection_batch(c_name: str, collection_vectors: List[Optional[np.ndarray]],
+                             top_k_total: int) -> List[List[Dict[str, Any]]]:
+    """
+    여러 쿼리 벡터로 컬렉션을 한 번의 search(data=[...]) 호출로 검색합니다.
+    쿼리별 점수순 결과 목록을 입력 순서대로 반환합니다 (오류가 나거나 벡터가 없는 쿼리는 빈 목록).
+    """
+    query_chunks: List[List[Dict[str, Any]]] = [[] for _ in collection_vectors]
+    search_start = time.time()
+    print(f"\nSearching in collection: '{c_name}' ({len(collection_vectors)} queries)...")
+    expected_dim = embedding_registry.configured_vector_dim(c_name)
+    query_indices = []
+    for i, collection_vector in enumerate(collection_vectors):
+        if collection_vector is None:
+            print(f"  Warning: No query vector for collection '{c_name}' (embedding failed). Skipping query {i}.")
+        elif expected_dim is not None and collection_vector.size != expected_dim:
+            print(f"  Warning: Query vector dimension {collection_vector.size} does not match "
+                  f"'{c_name}' ({expected_dim}, model {embedding_registry.model_for_collection(c_name)}). "
+                  f"Skipping query {i}.")
+        else:
+            query_indices.append(i)
+    if not query_indices:
+        return query_chunks
+    # 파이썬 리스트 변환 없이 float32 바이트로 전달 (wire 경계에서만 변환)
+    query_list = vector_utils.to_search_payload([collection_vectors[i] for i in query_indices])
+
+    if c_name not in config.COLLECTION_FIELD_MAPPINGS:
+        print(f"  Warning: Field mapping for collection '{c_name}' not found in config. Skipping.")
+        return query_chunks
+
+    mapping = config.COLLECTION_FIELD_MAPPINGS[c_name]
+    output_fields = mapping["output_fields"]
+    text_field = mapping["text_field"]
+
+    try:
+        # 캐시된 컬렉션 핸들 사용 (검색마다 has_collection/스키마 조회/load_state RPC를 보내지 않음)
+        if collection_registry.get(c_name) is None:
+            print(f"  Warning: Collection '{c_name}' does not exist. Skipping.")
+            return query_chunks
+
+        print(f"  Executing search with {len(query_list)} vectors, top_k={top_k_total}...")
+        # MilvusException이 나면 핸들을 다시 확인하고 한 번 재시도 (이후 직접 쿼리도 같은 핸들 사용)
+        collection, search_results = collection_registry.call(c_name, lambda collection: (collection, collection.search(
+            data=query_list,
+            anns_field="embedding", # Assuming the vector field is named 'embedding'
+            param=config.SEARCH_PARAMS,
+            limit=top_k_total, # Fetch enough to merge later
+            output_fields=output_fields
+        )))
+        print(f"  Search completed for '{c_name}'. Processing results...")
+
+        # 쿼리 i의 히트 목록 (search_results[k]는 query_indices[k]번째 쿼리의 결과)
+        hit_entities: List[Tuple[int, Any, Dict[str, Any]]] = []
+        for query_index, hits in zip(query_indices, search_results or []):
+            for hit in hits or []:
+                try:
+                    # 디버깅을 위한 로깅 추가
+                    print(f"  Processing hit ID: {hit.id}")
+                    hit_entities.append((query_index, hit, hit.entity.to_dict()))
+                except Exception as process_err:
+                    print(f"  Warning: Error processing hit ID {getattr(hit, 'id', 'N/A')} in '{c_name}': {process_err}")
+                    import traceback
+                    traceback.print_exc()
+                    continue # Skip to next hit
+
+        # 텍스트 필드가 없거나 빈 히트는 (모든 쿼리를 합쳐) 한 번의 `id in [...]` 쿼리로 채움
+        missing_ids = [hit.id for _, hit, entity_data in hit_entities if not entity_data.get(text_field)]
+        hydrated_texts = _hydrate_hit_texts(collection, c_name, text_field, missing_ids, len(hit_entities))
+
+        for query_index, hit, entity_data in hit_entities:
+            if hit.id in hydrated_texts:
+                entity_data[text_field] = hydrated_texts[hit.id]
+            if not entity_data.get(text_field):
+                print(f"  Warning: Empty text for ID {hit.id}")
+
+            chunk_data = _build_chunk(c_name, hit.id, hit.distance, entity_data, text_field, output_fields)
+            query_chunks[query_index].append(chunk_data)
+
+        if hit_entities:
+            print(f"  Added {len(hit_entities)} results from '{c_name}'.")
+        else:
+             print(f"  No results found in '{c_name}'.")
+
+    except LookupError as le:
+        print(f"  Warning: {le} Skipping.")
+    except MilvusException as me:
+        print(f"  Milvus error searching collection '{c_name}': {me}")
+    except Exception as search_err:
+        print(f"  Unexpected error searching collection '{c_name}': {search_err}")
+        import traceback
+        traceback.print_exc()
+    print(f"  Search in '{c_name}' took {time.time() - search_start:.3f}s.")
+    # Milvus는 점수순으로 반환하지만 merge_top_k의 전제를 보장하기 위해 정렬 (top_k개 이하이므로 비용이 작음)
+    for chunks in query_chunks:
+        chunks.sort(key=lambda chunk: chunk["score"], reverse=not is_distance_metric())
+    return query_chunks
+
+def _search_collection(c_name: str, collection_vector: Optional[np.ndarray], top_k_total: int) -> List[Dict[str, Any]]:
+    """컬렉션 하나를 쿼리 벡터 하나로 검색하여 점수순 결과를 반환합니다 (오류가 나면 빈 목록)."""
+    return _search_collection_batch(c_name, [collection_vector], top_k_total)[0]
+
+def _search_collections(query_vectors: List[Union[np.ndarray, Dict[str, Optional[np.ndarray]]]],
+                        collection_names_list: List[str], top_k_total: int) -> List[List[List[Dict[str, Any]]]]:
+    """컬렉션별(, 쿼리별) 점수순 결과. 여러 컬렉션은 동시에 검색합니다."""
+    ensure_milvus_connection() # Ensure connection before searching
+    collection_vectors = {
+        c_name: [
+            query_vector.get(c_name) if isinstance(query_vector, dict) else query_vector
+            for query_vector in query_vectors
+        ]
+        for c_name in collection_names_list
+    }
+
+    # 검색 지연 시간은 컬렉션별 지연의 합이 아니라 가장 느린 컬렉션의 지연이 됨
+    if config.MILVUS_SEARCH_PARALLEL and len(collection_names_list) > 1:
+        executor = _get_search_executor()
+        futures = [
+            executor.submit(_search_collection_batch, c_name, collection_vectors[c_name], top_k_total)
+            for c_name in collection_names_list
+        ]
+        return [future.result() for future in futures]
+    return [
+        _search_collection_batch(c_name, collection_vectors[c_name], top_k_total)
+        for c_name in collection_names_list
+    ]
+
+def search_milvus_batch(query_vectors: List[Union[np.ndarray, Dict[str, Optional[np.ndarray]]]],
+                        collection_names_list: List[str], top_k_total: int) -> List[List[Dict[str, Any]]]:
+    """
+    여러 쿼리(예: 보고서의 모든 섹션 키워드)를 컬렉션마다 한 번의 search 호출로 검색하고
+    쿼리별로 병합한 top-k 결과를 입력 순서대로 반환합니다.
+    Milvus 검색 RPC 수가 쿼리 수 × 컬렉션 수에서 컬렉션 수로 줄어듭니다.
+    각 쿼리 벡터는 search_milvus와 같이 벡터 하나 또는 컬렉션 이름 -> 벡터 dict입니다.
+    """
+    if not query_vectors:
+        return []
+    search_start = time.time()
+    per_collection = _search_collections(query_vectors, collection_names_list, top_k_total)
+
+    results = []
+    for query_index in range(len(query_vectors)):
+        result_lists = [collection_results[query_index] for collection_results in per_collection]
+        results.append(merge_top_k(result_lists, top_k_total))
+    total_results = sum(len(chunks) for chunks in results)
+    print(f"\nBatched search: {len(query_vectors)} queries x {len(collection_names_list)} collections, "
+          f"{total_results} merged results ({time.time() - search_start:.3f}s)")
+    return results
+
+def search_milvus(query_vector: Union[np.ndarray, Dict[str, Optional[np.ndarray]]], collection_names_list: List[str],
+                  top_k_total: int) -> List[Dict[str, Any]]:
+    """
+    Searches multiple Milvus collections concurrently and returns the merged top-k results.
+    query_vector may be a single vector or a mapping of collection name -> vector
+    (see get_query_vectors_for_collections) when collections use different embedding models.
+    검색 지연 시간은 컬렉션별 지연의 합이 아니라 가장 느린 컬렉션의 지연이 됩니다.
+    """
+    final_chunks = search_milvus_batch([query_vector], collection_names_list, top_k_total)[0]
+    if final_chunks:
         print(f"Returning top {len(final_chunks)} overall results.")
         
         # 로깅: 텍스트 없는 결과 카운트
@@ -266,6 +930,127 @@ def search_milvus(query_vector: np.ndarray, collection_names_list: List[str], to
         print("\nNo relevant chunks found across all collections.")
         return []
 
+# --- Hybrid (BM25 + Vector) Search ---
+# 청크 텍스트 BM25 색인 (lexical_index.py, 적재 시 생성). 색인이 없는 컬렉션은 벡터 검색만 사용
+lexical_indexes = lexical_index.LexicalIndexRegistry()
+
+def rrf_fuse(ranked_lists: List[List[Any]], k: Optional[int] = None) -> Dict[Any, float]:
+    """Reciprocal-rank fusion: 키 -> sum(1 / (k + 순위)) (순위는 1부터)."""
+    k = config.RRF_K if k is None else k
+    fused: Dict[Any, float] = {}
+    for ranked in ranked_lists:
+        for rank, key in enumerate(ranked, start=1):
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank)
+    return fused
+
+def search_lexical_batch(query_texts: List[str], collection_names_list: List[str],
+                         top_k: int) -> List[Dict[str, List[Tuple[Any, float]]]]:
+    """
+    쿼리별로 컬렉션 -> BM25 결과 (ID, 점수) 점수순 목록을 반환합니다.
+    BM25 점수는 컬렉션마다 IDF/문서 길이 통계가 달라 서로 비교할 수 없으므로 컬렉션별 순위 목록으로 유지합니다.
+    색인이 없거나 kiwipiepy가 없으면 빈 dict입니다 (결과가 없는 컬렉션은 포함하지 않음).
+    """
+    indexes = {c_name: lexical_indexes.get(c_name) for c_name in collection_names_list}
+    indexes = {c_name: index for c_name, index in indexes.items() if index is not None}
+    if not indexes:
+        return [{} for _ in query_texts]
+    try:
+        query_terms = [lexical_index.tokenize(text) for text in query_texts]
+    except ImportError as e:
+        print(f"Warning: kiwipiepy is not available ({e}). Skipping lexical search.")
+        return [{} for _ in query_texts]
+    results = []
+    for terms in query_terms:
+        per_collection = {c_name: index.search(terms, top_k) for c_name, index in indexes.items()}
+        results.append({c_name: hits for c_name, hits in per_collection.items() if hits})
+    return results
+
+def _fetch_chunks(c_name: str, ids: List[Any]) -> Dict[Any, Dict[str, Any]]:
+    """BM25에서만 찾은 ID의 텍스트/메타데이터를 한 번의 `id in [...]` 쿼리로 가져옵니다."""
+    mapping = config.COLLECTION_FIELD_MAPPINGS[c_name]
+    output_fields = list(dict.fromkeys(["id", mapping["text_field"]] + mapping["output_fields"]))
+    try:
+        rows = collection_registry.call(c_name, lambda collection: collection.query(
+            expr=f"id in {json.dumps(ids, ensure_ascii=False)}",
+            output_fields=output_fields,
+            limit=len(ids)
+        ))
+    except (LookupError, MilvusException) as e:
+        print(f"  Warning: Could not fetch lexical hits from '{c_name}': {e}")
+        return {}
+    return {
+        row["id"]: _build_chunk(c_name, row["id"], None, row, mapping["text_field"], mapping["output_fields"])
+        for row in rows
+    }
+
+def hybrid_search_batch(query_texts: List[str],
+                        query_vectors: List[Union[np.ndarray, Dict[str, Optional[np.ndarray]]]],
+                        collection_names_list: List[str], top_k_total: int) -> List[List[Dict[str, Any]]]:
+    """
+    벡터 검색(search_milvus_batch와 같은 컬렉션별 배치 검색)과 BM25 검색 결과를
+    reciprocal-rank fusion으로 결합하여 쿼리별 top-k를 반환합니다.
+    컬렉션마다 임베딩 모델과 BM25 통계가 달라 원점수끼리 비교할 수 없으므로, 컬렉션별 벡터 순위 목록과
+    컬렉션별 BM25 순위 목록을 각각 RRF에 넣습니다 (merge_top_k는 벡터 전용 경로에서만 사용).
+    각 결과에는 rrf_score, bm25_score(BM25에서 찾은 경우)와 retrieval("vector" | "lexical" | "both")이 추가되며,
+    score는 벡터 검색 점수입니다 (BM25에서만 찾은 결과는 None).
+    """
+    if not query_vectors:
+        return []
+    search_start = time.time()
+    per_collection = _search_collections(query_vectors, collection_names_list, top_k_total)
+    lexical_results = search_lexical_batch(query_texts, collection_names_list, config.LEXICAL_TOP_K or top_k_total)
+
+    fused_keys = []
+    missing: Dict[str, List[Any]] = {}  # 컬렉션 -> BM25에서만 찾은 ID (모든 쿼리 합산)
+    for query_index, lexical_hits in enumerate(lexical_results):
+        vector_lists = [
+            [(c_name, chunk["id"]) for chunk in collection_results[query_index]]
+            for c_name, collection_results in zip(collection_names_list, per_collection)
+        ]
+        lexical_lists = [[(c_name, doc_id) for doc_id, _ in hits] for c_name, hits in lexical_hits.items()]
+        fused = rrf_fuse(vector_lists + lexical_lists)
+        top_keys = sorted(fused, key=lambda key: -fused[key])[:top_k_total]
+        fused_keys.append((top_keys, fused))
+        vector_key_set = {key for keys in vector_lists for key in keys}
+        for c_name, doc_id in top_keys:
+            if (c_name, doc_id) not in vector_key_set:
+                missing.setdefault(c_name, []).append(doc_id)
+    fetched = {
+        c_name: _fetch_chunks(c_name, list(dict.fromkeys(ids))) for c_name, ids in missing.items()
+    }
+
+    results = []
+    for query_index, (lexical_hits, (top_keys, fused)) in enumerate(zip(lexical_results, fused_keys)):
+        vector_chunk_by_key = {
+            (c_name, chunk["id"]): chunk
+            for c_name, collection_results in zip(collection_names_list, per_collection)
+            for chunk in collection_results[query_index]
+        }
+        bm25_scores = {
+            (c_name, doc_id): score for c_name, hits in lexical_hits.items() for doc_id, score in hits
+        }
+        chunks = []
+        for key in top_keys:
+            chunk = vector_chunk_by_key.get(key) or fetched.get(key[0], {}).get(key[1])
+            if chunk is None:
+                continue
+            chunk = dict(chunk)
+            chunk["rrf_score"] = round(fused[key], 6)
+            chunk["bm25_score"] = bm25_scores.get(key)
+            in_vector, in_lexical = key in vector_chunk_by_key, key in bm25_scores
+            chunk["retrieval"] = "both" if in_vector and in_lexical else "vector" if in_vector else "lexical"
+            chunks.append(chunk)
+        results.append(chunks)
+    lexical_only = sum(len(ids) for ids in missing.values())
+    print(f"\nHybrid search: {len(query_vectors)} queries, {lexical_only} lexical-only results fetched "
+          f"({time.time() - search_start:.3f}s)")
+    return results
+
+def hybrid_search(query_text: str, query_vector: Union[np.ndarray, Dict[str, Optional[np.ndarray]]],
+                  collection_names_list: List[str], top_k_total: int) -> List[Dict[str, Any]]:
+    """search_milvus의 하이브리드 버전 (BM25 + 벡터, RRF 결합)."""
+    return hybrid_search_batch([query_text], [query_vector], collection_names_list, top_k_total)[0]
+
 # --- Context Formatting Function ---
 def format_context(retrieved_chunks: List[Dict[str, Any]]) -> str:
     """Formats retrieved chunks into a string for the LLM context."""
@@ -292,8 +1077,12 @@ def format_context(retrieved_chunks: List[Dict[str, Any]]) -> str:
     return context_str.strip()
 
 # --- LLM Interaction Functions ---
-def ask_llm(query: str, context: str = "", base_prompt: str = prompts.BASE_PROMPT_TEXT, model: str = config.LLM_MODEL) -> str:
-    """Sends a query and context to the LLM and returns the answer."""
+def ask_llm(query: str, context: str = "", base_prompt: str = prompts.BASE_PROMPT_TEXT, model: str = config.LLM_MODEL,
+            on_token: Optional[Callable[[str], None]] = None, temperature: float = 0.7) -> str:
+    """
+    Sends a query and context to the LLM and returns the answer.
+    If on_token is given, the response is streamed and on_token is called with each text delta.
+    """
     # 컨텍스트 정보가 없거나 비어있는 경우 명확한 메시지 제공
     if not context or context.strip() == "":
         context_message = """
@@ -332,11 +1121,27 @@ def ask_llm(query: str, context: str = "", base_prompt: str = prompts.BASE_PROMP
                 {"role": "system", "content": "You are a helpful assistant that answers questions based ONLY on the provided context in Korean. You must explicitly state when information is not available. Do not use outside knowledge."},
                 {"role": "user", "content": full_prompt}
             ],
-            temperature=0.7, # Adjust creativity
+            temperature=temperature, # Adjust creativity
             # max_tokens=1500 # Optional: Limit response length
+            stream=on_token is not None
         )
-        answer = response.choices[0].message.content.strip()
-        return answer
+        if on_token is None:
+            answer = response.choices[0].message.content.strip()
+            return answer
+
+        # 스트리밍 응답: 토큰을 받는 즉시 콜백으로 전달하고 전체 응답을 모아서 반환
+        answer_parts = []
+        for chunk in response:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                answer_parts.append(delta)
+                try:
+                    on_token(delta)
+                except Exception as callback_err:
+                    print(f"Warning: token callback failed: {callback_err}")
+        return "".join(answer_parts).strip()
     except OpenAIError as oai_err:
         print(f"OpenAI API Error: {oai_err}")
         return f"OpenAI API 오류가 발생했습니다: {oai_err}"
@@ -344,8 +1149,46 @@ def ask_llm(query: str, context: str = "", base_prompt: str = prompts.BASE_PROMP
         print(f"Error calling OpenAI API: {e}")
         return "LLM 호출 중 오류가 발생했습니다."
 
+# --- Keyword Cache ---
+# 같은 회사/분기/섹션에 대한 키워드는 거의 바뀌지 않으므로 재사용 (코퍼스와 무관하므로 코퍼스 버전은 키에 포함하지 않음)
+keyword_cache = cache_utils.LRUTTLCache(
+    name="keywords",
+    max_entries=config.KEYWORD_CACHE_MAX_ENTRIES,
+    ttl_seconds=config.KEYWORD_CACHE_TTL_SECONDS,
+    disk_dir=os.path.join(config.CACHE_DIR, "keywords") if config.KEYWORD_CACHE_DISK_ENABLED else None
+) if config.KEYWORD_CACHE_ENABLED else None
+
+def get_keyword_temperature() -> float:
+    """키워드 생성 temperature. 캐시를 채울 때 결정적으로 생성하도록 설정하면 0을 사용합니다."""
+    return 0.0 if keyword_cache is not None and config.KEYWORD_CACHE_DETERMINISTIC else 0.7
+
+def get_keyword_cache_key(section_number: str, section_title: str, company: str, date: str) -> str:
+    """회사, 분기, 섹션 번호와 제목으로 키워드 캐시 키를 만듭니다."""
+    return cache_utils.make_cache_key("keywords", {
+        "company": cache_utils.normalize_text(company),
+        "date": cache_utils.normalize_text(date),
+        "section_number": section_number,
+        "section_title": cache_utils.normalize_text(section_title),
+        "model": config.KEYWORD_LLM_MODEL,
+    })
+
+def get_cached_keywords(section_number: str, section_title: str, company: str, date: str) -> Optional[str]:
+    if keyword_cache is None:
+        return None
+    return keyword_cache.get(get_keyword_cache_key(section_number, section_title, company, date))
+
+def cache_keywords(section_number: str, section_title: str, company: str, date: str, keywords: str):
+    """생성에 성공한 키워드만 저장합니다 (기본 키워드 fallback은 저장하지 않음)."""
+    if keyword_cache is None or not is_valid_keywords(keywords):
+        return
+    keyword_cache.set(get_keyword_cache_key(section_number, section_title, company, date), keywords)
+
 def generate_keywords_for_section(section_number: str, section_title: str, company="셀트리온", date="24년 4분기") -> str:
     """Uses LLM to generate search keywords for a specific report section."""
+    cached_keywords = get_cached_keywords(section_number, section_title, company, date)
+    if cached_keywords:
+        print(f"Keyword cache hit for Section {section_number}: {cached_keywords}")
+        return cached_keywords
     print(f"Generating keywords for Section {section_number}: '{section_title}'...")
     
     # 키워드 생성 실패 방지를 위한 추가 처리
@@ -368,19 +1211,169 @@ def generate_keywords_for_section(section_number: str, section_title: str, compa
         query=keyword_prompt,
         context="", # No external context needed for keyword generation itself
         base_prompt="", # Use the query directly as the full prompt
-        model=config.KEYWORD_LLM_MODEL # Use specific model if configured
+        model=config.KEYWORD_LLM_MODEL, # Use specific model if configured
+        temperature=get_keyword_temperature()
     )
     
     # 키워드 생성 실패 시 기본값 제공
-    if not keywords or "오류" in keywords or "cannot" in keywords.lower():
-        default_keywords = f"{company} {date} {clean_title} 실적 분석 보고서 재무 전략"
+    if not is_valid_keywords(keywords):
+        default_keywords = get_default_keywords(company, date, clean_title)
         print(f"Warning: Failed to generate keywords. Using default: {default_keywords}")
         return default_keywords
     
     print(f"Generated keywords: {keywords}")
+    cache_keywords(section_number, section_title, company, date, keywords)
     return keywords
 
-def generate_summary_from_sections(combined_sections: str, company="셀트리온", date="24년 4분기", title="기업 분석 보고서") -> str:
+def generate_keywords_for_sections(sections: List[tuple], company="셀트리온", date="24년 4분기") -> Dict[str, str]:
+    """
+    Uses a single structured (JSON) LLM call to generate search keywords for several report sections.
+    Sections missing from the response fall back to generate_keywords_for_section.
+    
+    Args:
+        sections: (섹션 번호, 섹션 제목) 튜플 목록
+        
+    Returns:
+        섹션 번호 -> 키워드 문자열
+    """
+    planned_keywords = {}
+    # 캐시에 있는 섹션은 제외하고 나머지만 한 번에 요청
+    for section_number, section_title in sections:
+        cached_keywords = get_cached_keywords(section_number, section_title, company, date)
+        if cached_keywords:
+            print(f"Keyword cache hit for Section {section_number}: {cached_keywords}")
+            planned_keywords[section_number] = cached_keywords
+    sections = [(number, title) for number, title in sections if number not in planned_keywords]
+    if not sections:
+        return planned_keywords
+    print(f"Generating keywords for {len(sections)} sections in one batch...")
+    
+    batch_prompt = prompts.create_batch_keyword_prompt(
+        sections=sections,
+        company=company,
+        date=date,
+        top_k=config.SEARCH_TOP_K
+    )
+    
+    try:
+        client = OpenAI(api_key=config.OPENAI_API_KEY)
+        response = client.chat.completions.create(
+            model=config.KEYWORD_LLM_MODEL,
+            messages=[
+                {"role": "system", "content": "You generate Korean search keywords for a RAG retrieval system. Return your response in valid JSON format."},
+                {"role": "user", "content": batch_prompt}
+            ],
+            temperature=get_keyword_temperature(),
+            response_format={"type": "json_object"}
+        )
+        result = response.choices[0].message.content.strip()
+        
+        result_json = json.loads(result)
+        keyword_map = result_json.get("keywords", result_json) if isinstance(result_json, dict) else {}
+        for section_number, section_title in sections:
+            keywords = keyword_map.get(section_number) if isinstance(keyword_map, dict) else None
+            # 리스트로 응답한 경우 띄어쓰기로 연결
+            if isinstance(keywords, list):
+                keywords = " ".join(str(keyword) for keyword in keywords)
+            if isinstance(keywords, str) and is_valid_keywords(keywords):
+                planned_keywords[section_number] = keywords.strip()
+                cache_keywords(section_number, section_title, company, date, planned_keywords[section_number])
+    except OpenAIError as oai_err:
+        print(f"OpenAI API Error during batch keyword generation: {oai_err}")
+    except Exception as e:
+        print(f"Error during batch keyword generation: {e}")
+    
+    # 응답에 없는 섹션은 섹션별로 생성 (기본 키워드 fallback 포함)
+    for section_number, section_title in sections:
+        if section_number in planned_keywords:
+            print(f"Batch keywords for Section {section_number}: {planned_keywords[section_number]}")
+            continue
+        print(f"Warning: Batch keywords missing for Section {section_number}. Falling back to per-section generation.")
+        planned_keywords[section_number] = generate_keywords_for_section(
+            section_number, section_title, company=company, date=date
+        )
+    
+    return planned_keywords
+
+# --- Query Usage Tracking ---
+# 최근 자주 임베딩된 검색 쿼리를 기록하여 다음 시작 시 미리 임베딩 (파일로 저장하여 재시작 후에도 유지)
+_query_usage: Dict[str, Dict[str, float]] = {}
+_query_usage_lock = threading.Lock()
+_query_usage_loaded = False
+_query_usage_saved_at = 0.0
+QUERY_USAGE_SAVE_INTERVAL_SECONDS = 60
+
+def _load_query_usage():
+    global _query_usage_loaded
+    if _query_usage_loaded:
+        return
+    _query_usage_loaded = True
+    try:
+        with open(config.QUERY_USAGE_PATH, "r", encoding="utf-8") as f:
+            _query_usage.update(json.load(f))
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        print(f"Warning: Could not load query usage from {config.QUERY_USAGE_PATH}: {e}")
+
+def record_query_usage(query: str):
+    """검색에 사용된 쿼리(키워드 문자열)의 사용 횟수와 마지막 사용 시각을 기록합니다."""
+    if not query:
+        return
+    now = time.time()
+    with _query_usage_lock:
+        _load_query_usage()
+        entry = _query_usage.setdefault(query, {"count": 0, "last_used": now})
+        entry["count"] += 1
+        entry["last_used"] = now
+        if len(_query_usage) > config.QUERY_USAGE_MAX_ENTRIES:
+            # 사용 횟수가 적고 오래된 쿼리부터 제거
+            for stale in sorted(_query_usage, key=lambda q: (_query_usage[q]["count"], _query_usage[q]["last_used"]))[
+                :len(_query_usage) - config.QUERY_USAGE_MAX_ENTRIES
+            ]:
+                del _query_usage[stale]
+        should_save = now - _query_usage_saved_at > QUERY_USAGE_SAVE_INTERVAL_SECONDS
+    if should_save:
+        save_query_usage()
+
+def save_query_usage():
+    global _query_usage_saved_at
+    with _query_usage_lock:
+        if not _query_usage_loaded:
+            return
+        _query_usage_saved_at = time.time()
+        snapshot = dict(_query_usage)
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(config.QUERY_USAGE_PATH)), exist_ok=True)
+        tmp_path = f"{config.QUERY_USAGE_PATH}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp_path, config.QUERY_USAGE_PATH)
+    except OSError as e:
+        print(f"Warning: Could not save query usage to {config.QUERY_USAGE_PATH}: {e}")
+
+def get_frequent_queries(limit: int, max_age_days: Optional[float] = None) -> List[str]:
+    """최근 max_age_days(기본 config.QUERY_USAGE_MAX_AGE_DAYS) 안에 사용된 쿼리를 사용 횟수 순으로 반환합니다."""
+    if limit <= 0:
+        return []
+    max_age_days = config.QUERY_USAGE_MAX_AGE_DAYS if max_age_days is None else max_age_days
+    cutoff = time.time() - max_age_days * 86400
+    with _query_usage_lock:
+        _load_query_usage()
+        recent = [(query, entry) for query, entry in _query_usage.items() if entry["last_used"] >= cutoff]
+    recent.sort(key=lambda item: (item[1]["count"], item[1]["last_used"]), reverse=True)
+    return [query for query, _ in recent[:limit]]
+
+def is_valid_keywords(keywords: Optional[str]) -> bool:
+    """LLM이 반환한 키워드가 비어 있거나 오류 메시지인지 확인합니다."""
+    return bool(keywords) and "오류" not in keywords and "cannot" not in keywords.lower()
+
+def get_default_keywords(company: str, date: str, section_title: str) -> str:
+    """키워드 생성에 실패했을 때 사용하는 기본 검색 키워드."""
+    return f"{company} {date} {section_title} 실적 분석 보고서 재무 전략"
+
+def generate_summary_from_sections(combined_sections: str, company="셀트리온", date="24년 4분기", title="기업 분석 보고서",
+                                   on_token: Optional[Callable[[str], None]] = None) -> str:
     """Uses LLM to generate the summary from combined sections."""
     print("Generating report summary...")
     
@@ -396,7 +1389,8 @@ def generate_summary_from_sections(combined_sections: str, company="셀트리온
         query=summary_prompt,
         context=combined_sections, # Pass the combined sections here
         base_prompt=prompts.BASE_PROMPT_TEXT, # Provide base instructions
-        model=config.SUMMARY_LLM_MODEL # Use specific model if configured
+        model=config.SUMMARY_LLM_MODEL, # Use specific model if configured
+        on_token=on_token
     )
     print("Summary generation complete.")
     return summary
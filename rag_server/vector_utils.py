@@ -0,0 +1,119 @@
+# vector_utils.py
+"""
+검색 경로의 압축 벡터 표현
+
+- 프로세스 안에서는 연속된(contiguous) float32 1차원 numpy 배열로 다룹니다 (float64/파이썬 리스트 변환 없음).
+- 캐시에 저장할 때는 float16 또는 스칼라 int8 양자화(벡터별 scale)로 메모리를 줄일 수 있습니다.
+- Milvus로 보낼 때만(wire 경계) 검색 payload로 변환합니다. pymilvus가 스키마로 벡터 타입을 정하는 버전이면
+  float32 바이트를 그대로 보내고, 그렇지 않으면 리스트로 변환합니다.
+"""
+
+import inspect
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+
+import config
+
+STORAGE_DTYPES = ("float32", "float16", "int8")
+_INT8_SCALE_BYTES = np.dtype(np.float32).itemsize
+
+
+def as_query_vector(vector: np.ndarray) -> np.ndarray:
+    """임베딩을 연속된 float32 1차원 배열로 반환합니다 (이미 그렇다면 복사하지 않음)."""
+    return np.ascontiguousarray(np.asarray(vector, dtype=np.float32).reshape(-1))
+
+
+# --- Scalar int8 quantization ---
+def quantize_int8(vector: np.ndarray) -> Tuple[np.ndarray, float]:
+    """대칭 스칼라 양자화: int8 코드와 scale (원래 값 ≈ 코드 * scale)."""
+    vector = as_query_vector(vector)
+    max_abs = float(np.abs(vector).max()) if vector.size else 0.0
+    scale = max_abs / 127.0 if max_abs > 0 else 1.0
+    codes = np.clip(np.rint(vector / scale), -127, 127).astype(np.int8)
+    return codes, scale
+
+
+def dequantize_int8(codes: np.ndarray, scale: float) -> np.ndarray:
+    return codes.astype(np.float32) * np.float32(scale)
+
+
+# --- Storage encoding (캐시 메모리/디스크) ---
+def encode_vector(vector: np.ndarray, dtype: str) -> Union[np.ndarray, bytes]:
+    """
+    캐시에 저장할 압축 표현으로 변환합니다.
+    float32/float16은 해당 dtype 배열, int8은 [scale(float32 4바이트)][int8 코드] 바이트를 반환합니다.
+    """
+    if dtype == "int8":
+        codes, scale = quantize_int8(vector)
+        return np.float32(scale).tobytes() + codes.tobytes()
+    # 항상 복사하여 저장 (호출자의 배열을 읽기 전용으로 바꾸지 않도록)
+    stored = np.array(np.asarray(vector).reshape(-1), dtype=np.float16 if dtype == "float16" else np.float32)
+    stored.setflags(write=False)
+    return stored
+
+
+def decode_vector(stored: Union[np.ndarray, bytes], dtype: str) -> np.ndarray:
+    """encode_vector (또는 디스크 BLOB)의 역변환. 항상 읽기 전용 float32 배열을 반환합니다."""
+    if dtype == "int8":
+        scale = float(np.frombuffer(stored[:_INT8_SCALE_BYTES], dtype=np.float32)[0])
+        vector = dequantize_int8(np.frombuffer(stored[_INT8_SCALE_BYTES:], dtype=np.int8), scale)
+    elif isinstance(stored, np.ndarray):
+        if stored.dtype == np.float32 and not stored.flags.writeable:
+            return stored  # 이미 읽기 전용 float32 (복사하지 않음)
+        vector = stored.astype(np.float32)
+    else:
+        vector = np.frombuffer(stored, dtype=np.float16 if dtype == "float16" else np.float32).astype(np.float32)
+    vector.setflags(write=False)
+    return vector
+
+
+def encode_vector_bytes(vector: np.ndarray, dtype: str) -> bytes:
+    """디스크(BLOB) 저장용 바이트."""
+    stored = encode_vector(vector, dtype)
+    return stored if isinstance(stored, bytes) else stored.tobytes()
+
+
+def stored_nbytes(stored: Union[np.ndarray, bytes]) -> int:
+    return stored.nbytes if isinstance(stored, np.ndarray) else len(stored)
+
+
+# --- Milvus wire boundary ---
+def _pymilvus_supports_typed_bytes() -> bool:
+    """pymilvus가 컬렉션 스키마의 벡터 타입으로 바이트 검색 벡터를 해석하는지 확인합니다 (2.5 이후)."""
+    try:
+        from pymilvus.client.prepare import Prepare
+        return "vector_data_type" in inspect.signature(Prepare._prepare_placeholder_str).parameters
+    except (ImportError, AttributeError, TypeError, ValueError):
+        return False
+
+
+_search_payload_format: Optional[str] = None
+
+
+def get_search_payload_format() -> str:
+    """config.MILVUS_QUERY_VECTOR_FORMAT ("auto" | "bytes" | "list")를 실제 사용할 형식으로 결정합니다."""
+    global _search_payload_format
+    if _search_payload_format is None:
+        requested = config.MILVUS_QUERY_VECTOR_FORMAT.lower()
+        if requested == "auto":
+            _search_payload_format = "bytes" if _pymilvus_supports_typed_bytes() else "list"
+        elif requested in ("bytes", "list"):
+            _search_payload_format = requested
+        else:
+            print(f"Warning: Unknown MILVUS_QUERY_VECTOR_FORMAT '{config.MILVUS_QUERY_VECTOR_FORMAT}'. Using auto.")
+            _search_payload_format = "bytes" if _pymilvus_supports_typed_bytes() else "list"
+    return _search_payload_format
+
+
+def to_search_payload(vectors: List[np.ndarray], payload_format: Optional[str] = None) -> list:
+    """
+    Collection.search(data=...)에 넘길 검색 벡터 목록을 만듭니다.
+    - bytes: float32 바이트 (pymilvus가 그대로 placeholder에 넣음, 파이썬 float 객체 생성 없음)
+    - list: 파이썬 float 리스트 (바이트 검색 벡터를 지원하지 않는 이전 pymilvus)
+    """
+    payload_format = payload_format or get_search_payload_format()
+    vectors = [as_query_vector(vector) for vector in vectors]
+    if payload_format == "bytes":
+        return [vector.tobytes() for vector in vectors]
+    return [vector.tolist() for vector in vectors]